@@ -11,7 +11,7 @@ if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
 from app.db.base import Base  # noqa: E402
-from app.models import user, subscription, webhook_event, transaction, usage  # noqa: F401,E402
+from app.models import user, subscription, webhook_event, transaction, usage, batch_job  # noqa: F401,E402
 
 config = context.config
 
@@ -0,0 +1,59 @@
+"""batch job tables
+
+Revision ID: 0002_batch_jobs
+Revises: 0001_initial
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002_batch_jobs"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "batch_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("status", sa.Enum("pending", "running", "completed", name="batchjobstatus"), nullable=False),
+        sa.Column("options", sa.JSON(), nullable=False),
+        sa.Column("total_items", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("operation_type", sa.String(), nullable=False),
+        sa.Column("credits_charged", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_batch_jobs_user_id", "batch_jobs", ["user_id"], unique=False)
+    op.create_index("ix_batch_jobs_status", "batch_jobs", ["status"], unique=False)
+
+    op.create_table(
+        "batch_job_items",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("batch_id", sa.String(), sa.ForeignKey("batch_jobs.id"), nullable=False),
+        sa.Column("idx", sa.Integer(), nullable=False),
+        sa.Column("status", sa.Enum("pending", "running", "completed", "error", "skipped", name="batchitemstatus"), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("result", sa.JSON()),
+        sa.Column("error", sa.Text()),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True)),
+        sa.UniqueConstraint("batch_id", "idx", name="uq_batch_job_items_batch_idx"),
+    )
+    op.create_index("ix_batch_job_items_batch_id", "batch_job_items", ["batch_id"], unique=False)
+    op.create_index("ix_batch_job_items_status", "batch_job_items", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_batch_job_items_status", table_name="batch_job_items")
+    op.drop_index("ix_batch_job_items_batch_id", table_name="batch_job_items")
+    op.drop_table("batch_job_items")
+    op.drop_index("ix_batch_jobs_status", table_name="batch_jobs")
+    op.drop_index("ix_batch_jobs_user_id", table_name="batch_jobs")
+    op.drop_table("batch_jobs")
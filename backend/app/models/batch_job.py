@@ -0,0 +1,58 @@
+from enum import Enum as PyEnum
+from typing import Optional
+
+from sqlalchemy import String, DateTime, func, Enum, ForeignKey, Integer, Boolean, JSON, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class BatchJobStatus(PyEnum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+
+
+class BatchItemStatus(PyEnum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    error = "error"
+    skipped = "skipped"
+
+
+class BatchJob(Base):
+    __tablename__ = "batch_jobs"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)  # batch_id
+    user_id: Mapped[str] = mapped_column(String, index=True)
+    kind: Mapped[str] = mapped_column(String)  # json or csv
+    status: Mapped[BatchJobStatus] = mapped_column(
+        Enum(BatchJobStatus), index=True, default=BatchJobStatus.pending
+    )
+    options: Mapped[dict] = mapped_column(JSON, default=dict)  # tone, style, language, audience
+    total_items: Mapped[int] = mapped_column(Integer, default=0)
+    operation_type: Mapped[str] = mapped_column(String)
+    credits_charged: Mapped[bool] = mapped_column(Boolean, default=False)
+    created_at: Mapped[object] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    completed_at: Mapped[Optional[object]] = mapped_column(DateTime(timezone=True))
+
+
+class BatchJobItem(Base):
+    __tablename__ = "batch_job_items"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    batch_id: Mapped[str] = mapped_column(String, ForeignKey("batch_jobs.id"), index=True)
+    idx: Mapped[int] = mapped_column(Integer)
+    status: Mapped[BatchItemStatus] = mapped_column(
+        Enum(BatchItemStatus), index=True, default=BatchItemStatus.pending
+    )
+    payload: Mapped[dict] = mapped_column(JSON)
+    result: Mapped[Optional[dict]] = mapped_column(JSON)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    lease_expires_at: Mapped[Optional[object]] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (UniqueConstraint("batch_id", "idx", name="uq_batch_job_items_batch_idx"),)
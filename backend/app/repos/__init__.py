@@ -3,3 +3,4 @@ from .subscription_repo import *
 from .webhook_repo import *
 from .transaction_repo import *
 from .usage_repo import *
+from .batch_repo import *
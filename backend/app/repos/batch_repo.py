@@ -0,0 +1,179 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update, func, or_, and_
+from sqlalchemy.orm import Session
+
+from app.models.batch_job import BatchJob, BatchJobItem, BatchJobStatus, BatchItemStatus
+
+
+def create_job(
+    db: Session,
+    *,
+    batch_id: str,
+    user_id: str,
+    kind: str,
+    operation_type: str,
+    options: Dict[str, Any],
+    payloads: List[Dict[str, Any]],
+) -> BatchJob:
+    job = BatchJob(
+        id=batch_id,
+        user_id=user_id,
+        kind=kind,
+        status=BatchJobStatus.pending,
+        options=options,
+        total_items=len(payloads),
+        operation_type=operation_type,
+        credits_charged=False,
+    )
+    db.add(job)
+    db.flush()
+    db.add_all(
+        BatchJobItem(batch_id=batch_id, idx=idx, status=BatchItemStatus.pending, payload=payload, attempts=0)
+        for idx, payload in enumerate(payloads)
+    )
+    db.flush()
+    return job
+
+
+def get_job(db: Session, batch_id: str) -> Optional[BatchJob]:
+    return db.get(BatchJob, batch_id)
+
+
+def get_items(db: Session, batch_id: str) -> List[BatchJobItem]:
+    return list(
+        db.execute(
+            select(BatchJobItem).where(BatchJobItem.batch_id == batch_id).order_by(BatchJobItem.idx)
+        )
+        .scalars()
+        .all()
+    )
+
+
+def count_items_by_status(db: Session, batch_id: str) -> Dict[str, int]:
+    rows = db.execute(
+        select(BatchJobItem.status, func.count())
+        .where(BatchJobItem.batch_id == batch_id)
+        .group_by(BatchJobItem.status)
+    ).all()
+    counts = {status.value: 0 for status in BatchItemStatus}
+    for status, count in rows:
+        counts[status.value] = count
+    return counts
+
+
+def claim_items(
+    db: Session, *, limit: int, lease_seconds: int, max_attempts: int
+) -> Tuple[List[BatchJobItem], List[str]]:
+    """Lease up to ``limit`` pending items, including running items whose lease expired (crashed worker).
+
+    Expired items that already used ``max_attempts`` are marked ``error`` instead; returns the leased
+    items and the batch ids of the items given up on (their jobs may now be done).
+    """
+    now = datetime.now(timezone.utc)
+    candidates = (
+        db.execute(
+            select(BatchJobItem)
+            .where(
+                or_(
+                    BatchJobItem.status == BatchItemStatus.pending,
+                    and_(
+                        BatchJobItem.status == BatchItemStatus.running,
+                        BatchJobItem.lease_expires_at < now,
+                    ),
+                )
+            )
+            .order_by(BatchJobItem.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        .scalars()
+        .all()
+    )
+    claimed = []
+    abandoned = []
+    for item in candidates:
+        if item.attempts >= max_attempts:
+            item.status = BatchItemStatus.error
+            item.error = f"Gave up after {item.attempts} attempts"
+            item.lease_expires_at = None
+            if item.batch_id not in abandoned:
+                abandoned.append(item.batch_id)
+            continue
+        item.status = BatchItemStatus.running
+        item.attempts += 1
+        item.lease_expires_at = now + timedelta(seconds=lease_seconds)
+        claimed.append(item)
+
+    batch_ids = {item.batch_id for item in claimed}
+    if batch_ids:
+        db.execute(
+            update(BatchJob)
+            .where(BatchJob.id.in_(batch_ids), BatchJob.status == BatchJobStatus.pending)
+            .values(status=BatchJobStatus.running)
+        )
+    db.flush()
+    return claimed, abandoned
+
+
+def complete_item(db: Session, item_id: int, result: Dict[str, Any]) -> None:
+    item = db.get(BatchJobItem, item_id)
+    if item:
+        item.status = BatchItemStatus.completed
+        item.result = result
+        item.error = None
+        item.lease_expires_at = None
+        db.flush()
+
+
+def fail_item(db: Session, item_id: int, error: str, result: Optional[Dict[str, Any]] = None) -> None:
+    item = db.get(BatchJobItem, item_id)
+    if item:
+        item.status = BatchItemStatus.error
+        item.error = error
+        item.result = result
+        item.lease_expires_at = None
+        db.flush()
+
+
+def skip_pending_items(db: Session, batch_id: str, reason: str) -> int:
+    res = db.execute(
+        update(BatchJobItem)
+        .where(BatchJobItem.batch_id == batch_id, BatchJobItem.status == BatchItemStatus.pending)
+        .values(status=BatchItemStatus.skipped, error=reason)
+    )
+    db.flush()
+    return res.rowcount or 0
+
+
+def finish_job_if_done(db: Session, batch_id: str) -> bool:
+    """Mark the job completed once no item is pending or running; True only for the call that completes it."""
+    open_items = db.execute(
+        select(func.count())
+        .select_from(BatchJobItem)
+        .where(
+            BatchJobItem.batch_id == batch_id,
+            BatchJobItem.status.in_([BatchItemStatus.pending, BatchItemStatus.running]),
+        )
+    ).scalar_one()
+    if open_items:
+        return False
+    res = db.execute(
+        update(BatchJob)
+        .where(BatchJob.id == batch_id, BatchJob.status != BatchJobStatus.completed)
+        .values(status=BatchJobStatus.completed, completed_at=datetime.now(timezone.utc))
+    )
+    db.flush()
+    return (res.rowcount or 0) == 1
+
+
+def mark_credits_charged(db: Session, batch_id: str) -> bool:
+    """Flip credits_charged once; returns False if the job was already charged."""
+    res = db.execute(
+        update(BatchJob)
+        .where(BatchJob.id == batch_id, BatchJob.credits_charged.is_(False))
+        .values(credits_charged=True)
+    )
+    db.flush()
+    return (res.rowcount or 0) == 1
@@ -0,0 +1,131 @@
+# backend/benchmarks/bench_csv_prepare.py
+"""
+Benchmark: per-row vs vectorized CSV preparation
+
+Builds a synthetic supplier CSV, parses it in chunks with ``CSVFrameReader``
+and turns the rows into generation records two ways: the per-row path
+(``iterrows``, column mapping and feature compaction for every row) and
+``CSVColumnMapping.records`` (mapping resolved once, a chunk at a time).
+Checks both produce the same records and reports milliseconds per 1000 rows.
+
+    python benchmarks/bench_csv_prepare.py
+    python benchmarks/bench_csv_prepare.py --rows 100000 --sample 5000
+"""
+
+import io
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from src.csv_ingest import CSV_CHUNK_ROWS, CSVColumnMapping, CSVFrameReader
+from src.generation.features import FeatureCompactor
+
+MATERIALS = ["oak", "walnut", "stainless steel", "ceramic", "recycled plastic", "linen"]
+COLORS = ["black", "white", "natural", "sage green", "charcoal"]
+
+
+def make_csv(rows):
+    frame = pd.DataFrame({
+        "sku": [f"SKU-{i:07d}" for i in range(rows)],
+        "Product Name": [f"Storage Box {i}" for i in range(rows)],
+        "Category": ["homegoods"] * rows,
+        "Material": [MATERIALS[i % len(MATERIALS)] for i in range(rows)],
+        "Color": [COLORS[i % len(COLORS)] for i in range(rows)],
+        "Dimensions": [f"{20 + i % 30} x {15 + i % 10} x 10 cm" for i in range(rows)],
+        "Description HTML": [f"<p>Stackable box with lid.<br>Holds {5 + i % 20} kg &amp; wipes clean.</p>" for i in range(rows)],
+        "EAN": [str(4006381000000 + i) for i in range(rows)],
+        "Stock": [str(i % 97) for i in range(rows)],
+        "Notes": ["" if i % 3 else "Ships flat" for i in range(rows)],
+        "price": [f"{10 + i % 40}.99" for i in range(rows)],
+        "image_url": [f"https://cdn.example.com/{i}.jpg" for i in range(rows)]
+    })
+    return frame.to_csv(index=False).encode("utf-8")
+
+
+def read_frames(data, chunk_rows):
+    async def read():
+        reader = CSVFrameReader(io.BytesIO(data), chunk_rows)
+        frames = []
+        while (frame := await reader.next_frame()) is not None:
+            frames.append(frame)
+        reader.close()
+        return reader.parser, frames
+    return asyncio.run(read())
+
+
+def per_row_records(frames, audience, compactor):
+    """The per-row path: mapping resolved, features compacted and a dict built for every row"""
+    records = []
+    for frame in frames:
+        columns = frame.columns.tolist()
+        for _, row in frame.iterrows():
+            mapping = CSVColumnMapping(columns)
+            title = str(row.get(mapping.product_name_col, "")).strip()
+            cells = [(col, row.get(col)) for col in mapping.feature_columns]
+            records.append({
+                "id": str(row.get("id", "")).strip(),
+                "sku": str(row.get("sku", "")).strip(),
+                "title": title,
+                "category": str(row.get(mapping.category_col, "")).strip().lower() if mapping.category_col else "general",
+                "features": compactor.compact(cells, known_values=[title]),
+                "primary_keyword": str(row.get("primary_keyword", "")).strip(),
+                "tone": str(row.get("tone", "")).strip(),
+                "price": row.get("price", ""),
+                "images": str(row.get("images", "")).strip(),
+                "audience": audience,
+                "languageCode": "en",
+                "prompt_variant": None
+            })
+    return records
+
+
+def vectorized_records(frames, audience, compactor):
+    mapping = CSVColumnMapping(frames[0].columns)
+    records = []
+    for frame in frames:
+        records.extend(mapping.records(frame, audience, compactor=compactor))
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-row and vectorized CSV preparation")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--sample", type=int, default=5000, help="Rows prepared with the (slow) per-row path")
+    parser.add_argument("--chunk-rows", type=int, default=CSV_CHUNK_ROWS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    data = make_csv(args.rows)
+    start = time.perf_counter()
+    engine, frames = read_frames(data, args.chunk_rows)
+    parse = time.perf_counter() - start
+
+    start = time.perf_counter()
+    records = vectorized_records(frames, "home organizers", FeatureCompactor())
+    vectorized = time.perf_counter() - start
+
+    sample_frames = read_frames(make_csv(min(args.sample, args.rows)), args.chunk_rows)[1]
+    start = time.perf_counter()
+    per_row = per_row_records(sample_frames, "home organizers", FeatureCompactor())
+    per_row_time = time.perf_counter() - start
+    mismatches = sum(a != b for a, b in zip(per_row, records))
+
+    print(f"\n{len(records)} rows ({len(data) / (1 << 20):.1f} MB), {engine} parser, chunks of {args.chunk_rows}, "
+          f"{mismatches} mismatches in the first {len(per_row)}")
+    print(f"{'phase':>12} {'rows':>8} {'seconds':>9} {'ms/1000 rows':>13}")
+    for name, count, elapsed in (("parse", len(records), parse), ("per-row", len(per_row), per_row_time),
+                                 ("vectorized", len(records), vectorized)):
+        print(f"{name:>12} {count:>8} {elapsed:>9.3f} {elapsed / count * 1e6:>13.1f}")
+    print(f"speedup: {(per_row_time / len(per_row)) / (vectorized / len(records)):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
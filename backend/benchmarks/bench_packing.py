@@ -0,0 +1,105 @@
+# backend/benchmarks/bench_packing.py
+"""
+Benchmark: single-product prompts vs packed multi-product prompts
+
+Reports input tokens per product for each pack size. With ``--live`` (needs
+GEMINI_API_KEY) it also sends the requests and reports measured tokens and
+latency per product, plus how many products fell back to single calls.
+
+    python benchmarks/bench_packing.py --pack-sizes 1,3,5,10
+    python benchmarks/bench_packing.py --pack-sizes 1,5 --limit 10 --live
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from src.ai_pipeline import load_env, build_product_prompt, row_to_dict, call_gemini_generate, CostTracker
+from src.generation.packing import iter_packs, packed_request, generate_packed
+
+
+def estimate_tokens(text):
+    """Same word-count estimate the pipeline uses for cost tracking"""
+    return len(text.split())
+
+
+def count_tokens(model, text):
+    if model is None:
+        return estimate_tokens(text)
+    return model.count_tokens(text).total_tokens
+
+
+def load_rows(path, limit, tone):
+    df = pd.read_csv(path)
+    rows = [row_to_dict(r) for _, r in df.iterrows()]
+    for row in rows:
+        row["tone"] = tone  # Packs need matching prompt settings
+    while len(rows) < limit:
+        rows += [dict(r, id=f"{r['id']}-{len(rows)}") for r in rows[:limit - len(rows)]]
+    return rows[:limit]
+
+
+def bench_prompt_tokens(rows, pack_size, model):
+    if pack_size == 1:
+        prompts = [build_product_prompt(row) for row in rows]
+    else:
+        prompts = [packed_request([row for _, row in pack])[0] for pack in iter_packs(enumerate(rows), pack_size)]
+    total = sum(count_tokens(model, prompt) for prompt in prompts)
+    return len(prompts), total / len(rows)
+
+
+def bench_live(rows, pack_size, model, temperature):
+    tracker = CostTracker()
+    fallbacks = 0
+    start = time.time()
+    if pack_size == 1:
+        for row in rows:
+            call_gemini_generate(model, build_product_prompt(row), temperature, cost_tracker=tracker)
+    else:
+        for pack in iter_packs(enumerate(rows), pack_size):
+            pack_rows = [row for _, row in pack]
+            packed = generate_packed(model, pack_rows, temperature, cost_tracker=tracker)
+            for slot, row in enumerate(pack_rows):
+                if slot not in packed:
+                    fallbacks += 1
+                    call_gemini_generate(model, build_product_prompt(row), temperature, cost_tracker=tracker)
+    elapsed = time.time() - start
+    return tracker.total_tokens / len(rows), elapsed / len(rows), fallbacks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-product and packed prompts")
+    parser.add_argument("--input", default=str(BACKEND_DIR / "src/data/test_products.csv"))
+    parser.add_argument("--limit", type=int, default=20, help="Number of products to benchmark")
+    parser.add_argument("--pack-sizes", default="1,3,5,10")
+    parser.add_argument("--tone", default="professional")
+    parser.add_argument("--live", action="store_true", help="Call Gemini and measure latency (uses API credits)")
+    args = parser.parse_args()
+
+    conf = load_env(dry_run=not args.live)
+    model = conf["model"] if args.live else None
+    rows = load_rows(args.input, args.limit, args.tone)
+    pack_sizes = [int(size) for size in args.pack_sizes.split(",")]
+
+    print(f"\n{len(rows)} products, token counts {'from the API' if model else 'estimated from word counts'}")
+    header = f"{'pack':>5} {'requests':>9} {'input tok/product':>18}"
+    if args.live:
+        header += f" {'total tok/product':>18} {'latency/product':>16} {'fallbacks':>10}"
+    print(header)
+    for size in pack_sizes:
+        requests, input_per_product = bench_prompt_tokens(rows, size, model)
+        line = f"{size:>5} {requests:>9} {input_per_product:>18.1f}"
+        if args.live:
+            tokens_per_product, latency_per_product, fallbacks = bench_live(rows, size, model, conf["temperature"])
+            line += f" {tokens_per_product:>18.1f} {latency_per_product:>15.2f}s {fallbacks:>10}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
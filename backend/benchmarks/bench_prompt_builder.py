@@ -0,0 +1,73 @@
+# backend/benchmarks/bench_prompt_builder.py
+"""
+Benchmark: legacy prompt rendering vs precompiled prompt templates
+
+Builds the single-product prompt for every row with both builders, checks the
+outputs are identical and reports prompts per second.
+
+    python benchmarks/bench_prompt_builder.py
+    python benchmarks/bench_prompt_builder.py --rows 20000 --repeat 5
+"""
+
+import sys
+import time
+import argparse
+import itertools
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from src.ai_pipeline import LANGUAGE_NAMES, TONE_AUDIENCES, CompiledPromptBuilder, build_gemini_prompt_legacy
+
+
+def make_rows(count):
+    settings = itertools.cycle(itertools.product(["amazon", "etsy", "shopify", "ebay"], LANGUAGE_NAMES, TONE_AUDIENCES))
+    rows = []
+    for i in range(count):
+        style, language, tone = next(settings)
+        rows.append({
+            "id": str(i),
+            "title": f"Ceramic Mug {i}",
+            "features": "dishwasher safe; 350 ml; matte glaze; gift box",
+            "primary_keyword": "ceramic mug",
+            "style_variation": style,
+            "languageCode": language,
+            "tone": tone
+        })
+    return rows
+
+
+def best_time(build, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            build(row)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare legacy and precompiled single-product prompt builders")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per builder; the fastest is reported")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    builder = CompiledPromptBuilder()
+    builder.precompile()
+    mismatches = sum(builder.build(row) != build_gemini_prompt_legacy(row) for row in rows)
+
+    legacy = best_time(build_gemini_prompt_legacy, rows, args.repeat)
+    compiled = best_time(builder.build, rows, args.repeat)
+
+    print(f"\n{len(rows)} prompts, best of {args.repeat}, {mismatches} mismatches")
+    print(f"{'builder':>10} {'seconds':>9} {'prompts/s':>11} {'us/prompt':>10}")
+    for name, elapsed in (("legacy", legacy), ("compiled", compiled)):
+        print(f"{name:>10} {elapsed:>9.3f} {len(rows) / elapsed:>11.0f} {elapsed / len(rows) * 1e6:>10.2f}")
+    print(f"speedup: {legacy / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# backend/benchmarks/bench_prompt_variants.py
+"""
+Benchmark: full vs compact single-product prompts
+
+Sends every product with each prompt variant and reports prompt and output
+tokens, latency, JSON parse success and ``seo_evaluate`` pass rate per
+variant, over the same product set.
+
+Runs against whatever backend ``load_env`` configures. For offline numbers
+that reflect real model output, record a cassette once and replay it:
+
+    LLM_CASSETTE_MODE=record python benchmarks/bench_prompt_variants.py --limit 50
+    LLM_CASSETTE_MODE=replay python benchmarks/bench_prompt_variants.py --limit 50
+
+With ``LLM_BACKEND=stub`` only the token counts are meaningful: the stub's
+answers do not depend on the prompt wording.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from src.ai_pipeline import (
+    PROMPT_BUILDERS, load_env, as_backend, build_gemini_prompt, row_to_dict, gemini_generation_config,
+    response_token_usage
+)
+from src.generation.structured import GEMINI_STRUCTURED_OUTPUT, parse_product_response
+from src.seo_check import seo_evaluate
+
+
+def load_rows(path, limit, language):
+    df = pd.read_csv(path)
+    rows = [dict(row_to_dict(r), languageCode=language) for _, r in df.iterrows()]
+    rows = [row for row in rows if row["title"] and row["features"]]
+    while rows and len(rows) < limit:
+        rows += [dict(r, id=f"{r['id']}-{len(rows)}") for r in rows[:limit - len(rows)]]
+    return rows[:limit]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+def bench_variant(backend, rows, variant, temperature, structured):
+    config = gemini_generation_config(temperature, structured=structured)
+    totals = {"prompt_tokens": 0, "output_tokens": 0, "parsed": 0, "seo_passed": 0, "errors": 0}
+    latencies = []
+    for row in rows:
+        prompt = build_gemini_prompt(dict(row, prompt_variant=variant))
+        start = time.perf_counter()
+        try:
+            response = backend.generate(prompt, config)
+        except Exception as e:
+            totals["errors"] += 1
+            print(f"   {variant} {row['id']}: {e}")
+            continue
+        latencies.append(time.perf_counter() - start)
+        input_tokens, output_tokens = response_token_usage(response, prompt)
+        totals["prompt_tokens"] += input_tokens
+        totals["output_tokens"] += output_tokens
+        try:
+            product = parse_product_response(response.text, structured)
+        except ValueError:
+            continue
+        totals["parsed"] += 1
+        if seo_evaluate(product.get("description", ""), row.get("primary_keyword", ""))["passes"]:
+            totals["seo_passed"] += 1
+    answered = max(1, len(latencies))
+    return {
+        "prompt_tokens": totals["prompt_tokens"] / answered,
+        "output_tokens": totals["output_tokens"] / answered,
+        "latency": sum(latencies) / answered,
+        "latency_p95": percentile(latencies, 95),
+        "parse_rate": totals["parsed"] / len(rows),
+        "seo_rate": totals["seo_passed"] / len(rows),
+        "errors": totals["errors"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the full and compact single-product prompts")
+    parser.add_argument("--input", default=str(BACKEND_DIR / "src/data/test_products.csv"))
+    parser.add_argument("--limit", type=int, default=20, help="Number of products to benchmark")
+    parser.add_argument("--variants", default=",".join(PROMPT_BUILDERS))
+    parser.add_argument("--language", default="en", help="languageCode for every product")
+    args = parser.parse_args()
+
+    conf = load_env()
+    if conf["model"] is None:
+        sys.exit("No LLM backend: set GEMINI_API_KEY, LLM_BACKEND=stub or LLM_CASSETTE_MODE=replay")
+    backend = as_backend(conf["model"])
+    rows = load_rows(args.input, args.limit, args.language)
+    variants = [variant.strip() for variant in args.variants.split(",") if variant.strip()]
+
+    print(f"\n{len(rows)} products, {backend.name} backend, {'structured' if GEMINI_STRUCTURED_OUTPUT else 'free-form'} output")
+    print(f"{'variant':>8} {'prompt tok':>11} {'output tok':>11} {'latency':>9} {'p95':>8} {'parsed':>7} {'seo pass':>9} {'errors':>7}")
+    for variant in variants:
+        result = bench_variant(backend, rows, variant, conf["temperature"], GEMINI_STRUCTURED_OUTPUT)
+        print(f"{variant:>8} {result['prompt_tokens']:>11.1f} {result['output_tokens']:>11.1f} "
+              f"{result['latency']:>8.2f}s {result['latency_p95']:>7.2f}s {result['parse_rate']:>7.0%} "
+              f"{result['seo_rate']:>9.0%} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,54 +10,202 @@ from pathlib import Path
 import argparse
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from tenacity import retry, wait_exponential, stop_after_attempt
 from tqdm import tqdm
 import re
+import uuid
+import threading
+import contextvars
+from collections import OrderedDict, deque
 
 # Ensure backend/utils is importable
 THIS_DIR = Path(__file__).resolve().parent
 BACKEND_DIR = THIS_DIR.parent
 sys.path.insert(0, str(BACKEND_DIR))
 
-from utils.helpers import ensure_dir, timestamp, safe_extract_json, write_ndjson, write_json, read_text
+from utils.helpers import ensure_dir, timestamp, write_ndjson, write_json, read_text
 # Import prompt builder and seo check (same folder)
 sys.path.append(str(THIS_DIR))
-from prompt_templates import build_prompt_from_row
+from prompt_templates import build_prompt_from_row, get_template_registry
 from seo_check import seo_evaluate
 
 # Gemini import
 import google.generativeai as genai
 
+# LLM backends (Gemini or the offline stub)
+from src.llm import (
+    LLMBackend, GeminiBackend, CassetteBackend, ContextCachingBackend, DEFAULT_CASSETTE_PATH, GEMINI_CONTEXT_CACHE_ENABLED,
+    create_backend, context_cache_stats, close_context_caches, estimate_token_count as estimate_tokens
+)
+
+# Gemini list prices in USD per 1M tokens (input, output); override with
+# GEMINI_INPUT_PRICE_PER_1M / GEMINI_OUTPUT_PRICE_PER_1M
+GEMINI_MODEL_PRICING = {
+    "gemini-1.5-flash": (0.075, 0.30),
+    "gemini-1.5-flash-8b": (0.0375, 0.15),
+    "gemini-1.5-pro": (1.25, 5.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+DEFAULT_MODEL_PRICING = GEMINI_MODEL_PRICING["gemini-1.5-flash"]
+
+# Request/user the current Gemini calls are accounted to (set per API request or batch job)
+usage_context = contextvars.ContextVar("usage_context", default=None)
+
+def set_usage_context(request_id=None, user_id=None):
+    """Account Gemini usage in the current context to ``request_id`` / ``user_id``; returns the request id"""
+    request_id = request_id or f"req_{uuid.uuid4().hex[:12]}"
+    usage_context.set({"request_id": request_id, "user_id": user_id})
+    return request_id
+
+def model_pricing(model_name):
+    """Return ``(input, output)`` USD prices per 1M tokens for a model name"""
+    input_override = os.getenv("GEMINI_INPUT_PRICE_PER_1M")
+    output_override = os.getenv("GEMINI_OUTPUT_PRICE_PER_1M")
+    name = (model_name or "").split("/")[-1]
+    # Longest matching prefix, so versioned names ("gemini-1.5-flash-002") resolve
+    matches = [key for key in GEMINI_MODEL_PRICING if name.startswith(key)]
+    input_price, output_price = GEMINI_MODEL_PRICING[max(matches, key=len)] if matches else DEFAULT_MODEL_PRICING
+    return (
+        float(input_override) if input_override else input_price,
+        float(output_override) if output_override else output_price
+    )
+
 class CostTracker:
-    """Track API costs and usage"""
-    def __init__(self):
+    """
+    Track API token usage and costs.
+    
+    Thread-safe (Gemini calls finish on executor threads) and never awaits while
+    holding its lock, so it is also safe to share across concurrent requests.
+    Keeps process totals, per-model, per-request and per-user aggregates, and a
+    24 hour event log for rolling-window queries.
+    """
+    MAX_TRACKED_REQUESTS = 10000
+    WINDOW_RETENTION_SECONDS = 24 * 3600
+    
+    def __init__(self, clock=time.time):
+        self._lock = threading.RLock()
+        self._clock = clock
         self.total_tokens = 0
         self.total_requests = 0
-        self.cost_per_1k_tokens = 0.000075  # Gemini 1.5 Flash pricing
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.total_cost = 0.0
+        self.cost_per_1k_tokens = 0.000075  # Gemini 1.5 Flash input pricing (used for rough estimates)
         self.daily_limit = 1000  # $1.00 daily limit
         self.monthly_limit = 10000  # $10.00 monthly limit
+        self._by_model = {}
+        self._by_request = OrderedDict()
+        self._by_user = {}
+        self._events = deque()  # (timestamp, input_tokens, output_tokens, cost)
+    
+    @staticmethod
+    def _empty():
+        return {"requests": 0, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cost": 0.0}
+    
+    @staticmethod
+    def _accumulate(bucket, input_tokens, output_tokens, cost):
+        bucket["requests"] += 1
+        bucket["input_tokens"] += input_tokens
+        bucket["output_tokens"] += output_tokens
+        bucket["total_tokens"] += input_tokens + output_tokens
+        bucket["cost"] += cost
         
-    def add_usage(self, tokens):
-        """Add token usage and check limits"""
-        self.total_tokens += tokens
-        self.total_requests += 1
+    def add_usage(self, tokens=None, input_tokens=None, output_tokens=0, model=None, request_id=None, user_id=None):
+        """
+        Record one API call and return its cost.
+        
+        Pass ``input_tokens``/``output_tokens`` from the response usage metadata;
+        a bare ``tokens`` count is treated as input tokens. ``request_id`` and
+        ``user_id`` default to the current usage context.
+        """
+        if input_tokens is None:
+            input_tokens = tokens or 0
+        context = usage_context.get() or {}
+        request_id = request_id or context.get("request_id")
+        user_id = user_id or context.get("user_id")
+        input_price, output_price = model_pricing(model)
+        cost = (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+        
+        with self._lock:
+            now = self._clock()
+            self.total_tokens += input_tokens + output_tokens
+            self.total_requests += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.total_cost += cost
+            self._accumulate(self._by_model.setdefault(model or "unknown", self._empty()), input_tokens, output_tokens, cost)
+            if request_id:
+                bucket = self._by_request.get(request_id)
+                if bucket is None:
+                    bucket = self._by_request[request_id] = self._empty()
+                    while len(self._by_request) > self.MAX_TRACKED_REQUESTS:
+                        self._by_request.popitem(last=False)
+                self._accumulate(bucket, input_tokens, output_tokens, cost)
+            if user_id:
+                self._accumulate(self._by_user.setdefault(user_id, self._empty()), input_tokens, output_tokens, cost)
+            self._events.append((now, input_tokens, output_tokens, cost))
+            self._prune(now)
+        return cost
+    
+    def _prune(self, now):
+        while self._events and now - self._events[0][0] > self.WINDOW_RETENTION_SECONDS:
+            self._events.popleft()
         
     def get_current_cost(self):
-        """Calculate current cost"""
-        return (self.total_tokens / 1000) * self.cost_per_1k_tokens
+        """Calculate current (process lifetime) cost"""
+        with self._lock:
+            return self.total_cost
+    
+    def get_request_usage(self, request_id):
+        """Tokens and cost accounted to one request (or batch)"""
+        with self._lock:
+            return dict(self._by_request.get(request_id) or self._empty())
+    
+    def get_request_cost(self, request_id):
+        return self.get_request_usage(request_id)["cost"]
+    
+    def get_model_usage(self, model):
+        """Tokens and cost accounted to one model name"""
+        with self._lock:
+            return dict(self._by_model.get(model) or self._empty())
+    
+    def get_user_usage(self, user_id):
+        """Tokens and cost accounted to one user since process start"""
+        with self._lock:
+            return dict(self._by_user.get(user_id) or self._empty())
+    
+    def get_window_usage(self, seconds=3600):
+        """Aggregate usage over the last ``seconds`` (up to 24 hours)"""
+        with self._lock:
+            now = self._clock()
+            self._prune(now)
+            usage = self._empty()
+            for ts, input_tokens, output_tokens, cost in reversed(self._events):
+                if now - ts > seconds:
+                    break
+                self._accumulate(usage, input_tokens, output_tokens, cost)
+            return usage
         
     def check_daily_limit(self):
-        """Check if daily limit exceeded"""
-        return self.get_current_cost() >= self.daily_limit
+        """Check if the cost over the last 24 hours exceeds the daily limit"""
+        return self.get_window_usage(24 * 3600)["cost"] >= self.daily_limit
         
     def get_usage_stats(self):
         """Get usage statistics"""
-        return {
-            "total_tokens": self.total_tokens,
-            "total_requests": self.total_requests,
-            "current_cost": self.get_current_cost(),
-            "cost_per_1k_tokens": self.cost_per_1k_tokens
-        }
+        with self._lock:
+            return {
+                "total_tokens": self.total_tokens,
+                "total_requests": self.total_requests,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "current_cost": self.total_cost,
+                "cost_per_1k_tokens": self.cost_per_1k_tokens,
+                "by_model": {name: dict(bucket) for name, bucket in self._by_model.items()},
+                "last_hour": self.get_window_usage(3600),
+                "last_24h": self.get_window_usage(24 * 3600)
+            }
 
 class SafetyFilter:
     """Content safety and input validation"""
@@ -137,7 +285,7 @@ class StructuredLogger:
     def log_api_call(self, identifier, prompt_length, response_length, tokens_used, cost):
         """Log API call details"""
         self.logger.info(f"API_CALL - ID: {identifier}, Prompt: {prompt_length} chars, "
-                        f"Response: {response_length} chars, Tokens: {tokens_used}, Cost: ${cost:.4f}")
+                        f"Response: {response_length} chars, Tokens: {tokens_used}, Cost: ${cost:.6f}")
     
     def log_error(self, identifier, error_type, error_message):
         """Log errors with context"""
@@ -153,7 +301,7 @@ class StructuredLogger:
         self.logger.warning(f"COST_WARNING - Current cost: ${current_cost:.4f}, Limit: ${limit:.4f}")
 
 def load_env(dry_run=False):
-    """Load environment variables and initialize Gemini client"""
+    """Load environment variables and initialize the LLM backend (Gemini unless LLM_BACKEND=stub)"""
     env_path = BACKEND_DIR / ".env"
     
     # Load .env file if it exists
@@ -167,7 +315,10 @@ def load_env(dry_run=False):
     
     # Get environment variables
     api_key = os.getenv("GEMINI_API_KEY")
+    backend_name = os.getenv("LLM_BACKEND", "gemini").lower()
     model_name = os.getenv("GEMINI_MODEL", "gemini-1.5-pro")
+    # Optional cheap-to-expensive model cascade, e.g. "gemini-1.5-flash,gemini-1.5-pro"
+    cascade_model_names = [name.strip() for name in os.getenv("GEMINI_CASCADE_MODELS", "").split(",") if name.strip()]
     temp = float(os.getenv("DEFAULT_TEMPERATURE", 0.8))
     output_base = os.getenv("OUTPUT_BASE", "src/outputs")
     
@@ -175,194 +326,273 @@ def load_env(dry_run=False):
     daily_limit = float(os.getenv("DAILY_COST_LIMIT", "1.00"))
     monthly_limit = float(os.getenv("MONTHLY_COST_LIMIT", "10.00"))
     
-    # Validate API key (skip for dry run)
-    if not api_key and not dry_run:
+    # Record/replay of LLM traffic (LLM_CASSETTE_MODE=record|replay)
+    cassette_mode = os.getenv("LLM_CASSETTE_MODE", "").lower()
+    offline = backend_name != "gemini" or cassette_mode == "replay"
+    
+    def make_backend(name):
+        if cassette_mode == "replay":
+            return CassetteBackend.from_env("replay", model_name=name)
+        backend = create_backend(backend_name, name, GEMINI_SAFETY_SETTINGS)
+        if GEMINI_CONTEXT_CACHE_ENABLED:
+            backend = ContextCachingBackend(backend, split_gemini_prompt)
+        if cassette_mode == "record":
+            return CassetteBackend.from_env("record", inner=backend)
+        return backend
+    
+    # Validate API key (skip for dry run and offline backends)
+    if not api_key and not dry_run and not offline:
         raise RuntimeError("GEMINI_API_KEY not set in backend/.env file")
     
-    if api_key:
+    if offline:
+        source = f"cassette {os.getenv('LLM_CASSETTE_PATH', DEFAULT_CASSETTE_PATH)}" if cassette_mode == "replay" else f"'{backend_name}' LLM backend"
+        print(f"🧪 Using offline {source} - no Gemini calls will be made")
+        print(f"📊 Using model: {model_name}, temperature: {temp}")
+        model = make_backend(model_name)
+        cascade_models = [make_backend(name) for name in cascade_model_names]
+    elif api_key:
         print(f"✅ Gemini API key loaded successfully")
         print(f"📊 Using model: {model_name}, temperature: {temp}")
         print(f"💰 Daily cost limit: ${daily_limit}, Monthly: ${monthly_limit}")
         
         # Configure Gemini
         genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name)
+        model = make_backend(model_name)
+        cascade_models = [make_backend(name) for name in cascade_model_names]
+        if cascade_models:
+            print(f"🪜 Model cascade: {' -> '.join(cascade_model_names)}")
     else:
         print(f"⚠️  No API key found - running in dry-run mode only")
         model = None
+        cascade_models = []
+    if cassette_mode == "record" and model is not None:
+        print(f"📼 Recording LLM calls to {model.path}")
     
     return {
         "model": model,
+        "backend": backend_name,
         "model_name": model_name,
+        "cascade_models": cascade_models,
+        "cascade_model_names": cascade_model_names,
         "temperature": temp, 
         "output_base": output_base,
         "daily_limit": daily_limit,
         "monthly_limit": monthly_limit
     }
 
-def call_gemini_generate(model, prompt, temperature=0.2, logger=None, cost_tracker=None):
-    """Make Gemini API call with enhanced monitoring and improved error handling"""
-    from tenacity import RetryError
-    
-    def _make_api_call():
-        """Internal function to make the actual API call"""
-        # Configure generation parameters for enhanced creativity and quality
-        generation_config = genai.types.GenerationConfig(
-            temperature=temperature,
-            max_output_tokens=2000,  # Increased for more detailed descriptions
-            top_p=0.9,  # Increased for more creative responses
-            top_k=50,   # Increased for better vocabulary diversity
-            candidate_count=1
-        )
-        
-        # Add safety settings - relaxed for non-English content
-        safety_settings = [
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_ONLY_HIGH"  # Relaxed from BLOCK_MEDIUM_AND_ABOVE
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH", 
-                "threshold": "BLOCK_ONLY_HIGH"  # Relaxed from BLOCK_MEDIUM_AND_ABOVE
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_ONLY_HIGH"  # Relaxed from BLOCK_MEDIUM_AND_ABOVE
-            },
-            {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_ONLY_HIGH"  # Relaxed from BLOCK_MEDIUM_AND_ABOVE
-            }
-        ]
-        
-        start_time = time.time()
-        response = model.generate_content(
-            prompt,
-            generation_config=generation_config,
-            safety_settings=safety_settings
-        )
-        end_time = time.time()
+GEMINI_SAFETY_SETTINGS = [
+    {
+        "category": "HARM_CATEGORY_HARASSMENT",
+        "threshold": "BLOCK_ONLY_HIGH"  # Relaxed from BLOCK_MEDIUM_AND_ABOVE
+    },
+    {
+        "category": "HARM_CATEGORY_HATE_SPEECH", 
+        "threshold": "BLOCK_ONLY_HIGH"  # Relaxed from BLOCK_MEDIUM_AND_ABOVE
+    },
+    {
+        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "threshold": "BLOCK_ONLY_HIGH"  # Relaxed from BLOCK_MEDIUM_AND_ABOVE
+    },
+    {
+        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+        "threshold": "BLOCK_ONLY_HIGH"  # Relaxed from BLOCK_MEDIUM_AND_ABOVE
+    }
+]
+
+# Schema of a single-product answer in structured-output mode
+PRODUCT_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "bullets": {"type": "array", "items": {"type": "string"}, "min_items": 3, "max_items": 3},
+        "meta": {"type": "string"}
+    },
+    "required": ["title", "description", "bullets", "meta"]
+}
+
+def gemini_generation_config(temperature=0.2, max_output_tokens=None, structured=False):
+    """
+    Generation parameters sent with every Gemini call (also part of the cache key).
+    ``structured=True`` asks for a JSON answer matching ``PRODUCT_RESPONSE_SCHEMA``.
+    """
+    # Configure generation parameters for enhanced creativity and quality
+    config = {
+        "temperature": temperature,
+        "max_output_tokens": max_output_tokens or 2000,  # Increased for more detailed descriptions
+        "top_p": 0.9,  # Increased for more creative responses
+        "top_k": 50,   # Increased for better vocabulary diversity
+        "candidate_count": 1
+    }
+    if structured:
+        config["response_mime_type"] = "application/json"
+        config["response_schema"] = PRODUCT_RESPONSE_SCHEMA
+    return config
+
+def gemini_model_name(model):
+    """Name of a Gemini model object, used to key cached generations"""
+    return getattr(model, "model_name", "") or ""
+
+def response_token_usage(response, prompt):
+    """Return ``(input_tokens, output_tokens)`` from the response usage metadata, estimating when it is missing"""
+    usage = getattr(response, "usage_metadata", None)
+    input_tokens = getattr(usage, "prompt_token_count", None) or 0
+    output_tokens = getattr(usage, "candidates_token_count", None) or 0
+    total_tokens = getattr(usage, "total_token_count", None) or 0
+    if not input_tokens and not output_tokens:
+        if total_tokens:
+            return total_tokens, 0
+        return estimate_tokens(prompt), estimate_tokens(getattr(response, "text", ""))
+    # total_token_count also covers thinking tokens, which are billed at the output rate
+    return input_tokens, max(output_tokens, total_tokens - input_tokens)
+
+def as_backend(model):
+    """Return ``model`` as an ``LLMBackend`` (plain Gemini model objects are wrapped)"""
+    if isinstance(model, LLMBackend):
+        return model
+    return GeminiBackend(model, safety_settings=GEMINI_SAFETY_SETTINGS)
+
+def gemini_generate_once(model, prompt, temperature=0.2, logger=None, cost_tracker=None, max_output_tokens=None,
+                         timeout=None, structured=False):
+    """Make a single LLM call (no retries, at most ``timeout`` seconds) and track its usage"""
+    start_time = time.time()
+    config = gemini_generation_config(temperature, max_output_tokens, structured)
+    response = as_backend(model).generate(prompt, config, timeout=timeout)
+    end_time = time.time()
+    
+    if response.text:
+        input_tokens, output_tokens = response_token_usage(response, prompt)
+        total_tokens = input_tokens + output_tokens
         
-        if response.text:
-            # Estimate token usage (rough approximation)
-            estimated_tokens = len(prompt.split()) + len(response.text.split())
+        # Track costs
+        if cost_tracker:
+            call_cost = cost_tracker.add_usage(
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                model=gemini_model_name(model)
+            )
+            current_cost = cost_tracker.get_current_cost()
             
-            # Track costs
-            if cost_tracker:
-                cost_tracker.add_usage(estimated_tokens)
-                current_cost = cost_tracker.get_current_cost()
-                
-                # Log API call
-                if logger:
-                    logger.log_api_call(
-                        "api_call", 
-                        len(prompt), 
-                        len(response.text), 
-                        estimated_tokens, 
-                        current_cost
-                    )
-                
-                # Check cost limits
-                if cost_tracker.check_daily_limit():
-                    if logger:
-                        logger.log_cost_warning(current_cost, cost_tracker.daily_limit)
-                    raise Exception(f"Daily cost limit exceeded: ${current_cost:.4f}")
+            # Log API call
+            if logger:
+                logger.log_api_call(
+                    "api_call", 
+                    len(prompt), 
+                    len(response.text), 
+                    total_tokens, 
+                    call_cost
+                )
             
-            return response.text, estimated_tokens, end_time - start_time
-        else:
-            raise Exception("Empty response from Gemini")
+            # Check cost limits
+            if cost_tracker.check_daily_limit():
+                if logger:
+                    logger.log_cost_warning(current_cost, cost_tracker.daily_limit)
+                raise Exception(f"Daily cost limit exceeded: ${current_cost:.4f}")
+        
+        return response.text, total_tokens, end_time - start_time
+    else:
+        raise Exception("Empty response from Gemini")
+
+def gemini_api_error(error, logger=None, after_retries=False):
+    """Categorize a failed Gemini call and wrap it in an exception carrying the error type"""
+    error_msg = str(error)
+    suffix = " after retries" if after_retries else ""
     
-    # Use retry decorator with better error handling
-    @retry(wait=wait_exponential(min=1, max=10), stop=stop_after_attempt(3))
-    def _retry_api_call():
-        return _make_api_call()
+    # Enhanced error categorization and logging
+    if "generation deadline exceeded" in error_msg.lower():
+        error_type = "DEADLINE_EXCEEDED"
+        detailed_msg = f"Generation time budget used up: {error_msg}"
+    elif "circuit breaker open" in error_msg.lower():
+        error_type = "CIRCUIT_OPEN"
+        detailed_msg = f"Gemini temporarily unavailable: {error_msg}"
+    elif "quota" in error_msg.lower() or "limit" in error_msg.lower() or "429" in error_msg or "exhausted" in error_msg.lower():
+        error_type = "QUOTA_EXCEEDED"
+        detailed_msg = f"API quota exceeded{suffix}: {error_msg}"
+    elif "safety" in error_msg.lower() or "blocked" in error_msg.lower():
+        error_type = "SAFETY_FILTER"
+        detailed_msg = f"Content blocked by safety filters{suffix}: {error_msg}"
+    elif "timeout" in error_msg.lower() or "connection" in error_msg.lower():
+        error_type = "NETWORK_ERROR"
+        detailed_msg = f"Network/connection issue{suffix}: {error_msg}"
+    elif "invalid" in error_msg.lower() or "malformed" in error_msg.lower():
+        error_type = "INVALID_REQUEST"
+        detailed_msg = f"Invalid request format{suffix}: {error_msg}"
+    elif after_retries:
+        error_type = "RETRY_EXHAUSTED"
+        detailed_msg = f"All retry attempts exhausted: {error_msg}"
+    else:
+        error_type = "UNKNOWN_ERROR"
+        detailed_msg = f"Unexpected error: {error_msg}"
+    
+    # Log detailed error information
+    if logger:
+        logger.log_error("api_call", error_type, detailed_msg)
+    
+    # Re-raise with more context
+    return Exception(f"Gemini API Error ({error_type}): {detailed_msg}")
+
+def call_gemini_generate(model, prompt, temperature=0.2, logger=None, cost_tracker=None, max_output_tokens=None,
+                         structured=False):
+    """Make Gemini API call with enhanced monitoring and improved error handling"""
+    from src.generation.governor import run_governed_blocking
+    from src.generation.circuit_breaker import get_circuit_breaker
+    from src.generation.retry_policy import RetriesExhausted, attempt_timeout, retry_blocking
+    breaker = get_circuit_breaker()
+    
+    # Only transient errors are retried: throttling is paced by the rate governor, an open
+    # circuit breaker fails fast, and every attempt is bounded by the generation deadline
+    def _api_call():
+        timeout = attempt_timeout()
+        breaker.before_call()
+        try:
+            result = run_governed_blocking(
+                lambda: gemini_generate_once(model, prompt, temperature, logger, cost_tracker, max_output_tokens, timeout, structured)
+            )
+        except Exception as e:
+            breaker.record(e)
+            raise
+        breaker.record_success()
+        return result
     
     try:
-        return _retry_api_call()
-    except RetryError as retry_error:
-        # Handle RetryError specifically
-        error_msg = str(retry_error)
-        
-        # Enhanced error categorization and logging
-        if "quota" in error_msg.lower() or "limit" in error_msg.lower():
-            error_type = "QUOTA_EXCEEDED"
-            detailed_msg = f"API quota exceeded after retries: {error_msg}"
-        elif "safety" in error_msg.lower() or "blocked" in error_msg.lower():
-            error_type = "SAFETY_FILTER"
-            detailed_msg = f"Content blocked by safety filters after retries: {error_msg}"
-        elif "timeout" in error_msg.lower() or "connection" in error_msg.lower():
-            error_type = "NETWORK_ERROR"
-            detailed_msg = f"Network/connection issue after retries: {error_msg}"
-        elif "invalid" in error_msg.lower() or "malformed" in error_msg.lower():
-            error_type = "INVALID_REQUEST"
-            detailed_msg = f"Invalid request format after retries: {error_msg}"
-        else:
-            error_type = "RETRY_EXHAUSTED"
-            detailed_msg = f"All retry attempts exhausted: {error_msg}"
-        
-        # Log detailed error information
-        if logger:
-            logger.log_error("api_call", error_type, detailed_msg)
-        
-        # Re-raise with more context
-        raise Exception(f"Gemini API Error ({error_type}): {detailed_msg}")
+        return retry_blocking(_api_call)
+    except RetriesExhausted as retry_error:
+        raise gemini_api_error(retry_error, logger, after_retries=True)
     except Exception as e:
-        error_msg = str(e)
-        
-        # Enhanced error categorization and logging
-        if "quota" in error_msg.lower() or "limit" in error_msg.lower():
-            error_type = "QUOTA_EXCEEDED"
-            detailed_msg = f"API quota exceeded: {error_msg}"
-        elif "safety" in error_msg.lower() or "blocked" in error_msg.lower():
-            error_type = "SAFETY_FILTER"
-            detailed_msg = f"Content blocked by safety filters: {error_msg}"
-        elif "timeout" in error_msg.lower() or "connection" in error_msg.lower():
-            error_type = "NETWORK_ERROR"
-            detailed_msg = f"Network/connection issue: {error_msg}"
-        elif "invalid" in error_msg.lower() or "malformed" in error_msg.lower():
-            error_type = "INVALID_REQUEST"
-            detailed_msg = f"Invalid request format: {error_msg}"
-        else:
-            error_type = "UNKNOWN_ERROR"
-            detailed_msg = f"Unexpected error: {error_msg}"
-        
-        # Log detailed error information
-        if logger:
-            logger.log_error("api_call", error_type, detailed_msg)
-        
-        # Re-raise with more context
-        raise Exception(f"Gemini API Error ({error_type}): {detailed_msg}")
+        raise gemini_api_error(e, logger)
+
+# Platform-specific writing rules, keyed by style variation
+STYLE_GUIDES = {
+    "amazon": {
+        "objective": "Maximize conversions and visibility via A9 algorithm",
+        "format": "Keyword-heavy, bullet-point list for key features and specifications",
+        "tone": "Professional, direct, and benefit-oriented",
+        "structure": "Start with a short, engaging paragraph (approx. 2-3 lines) incorporating primary keywords. Follow with a detailed bulleted list (5-7 points) focusing on specs, features, and user benefits. Conclude with any necessary warranty/guarantee information."
+    },
+    "etsy": {
+        "objective": "Connect emotionally and highlight craftsmanship",
+        "format": "Narrative, storytelling prose",
+        "tone": "Warm, personal, authentic, and inspired",
+        "structure": "Begin with a story behind the product, the maker's inspiration, or the process of creation. Weave in keywords naturally. Describe the sensory details (e.g., 'feel,' 'look,' 'scent'). Mention the care and love put into making it. Include details about materials and their origin if possible."
+    },
+    "shopify": {
+        "objective": "Build brand identity and engage customers",
+        "format": "Flexible, blending storytelling with modern SEO and branding",
+        "tone": "Confident, aspirational, and clean",
+        "structure": "A cohesive brand story. Can use a short headline. Combine persuasive, benefit-driven copy with natural keyword integration. Structure can be a few medium-length paragraphs or a mix of short paragraphs and bullet points. Focus on the problem the product solves and the lifestyle it enables."
+    },
+    "ebay": {
+        "objective": "Provide clear, concise information for a comparison-shopping audience",
+        "format": "Strict, dense, and specification-focused",
+        "tone": "Factual, straightforward, and unbiased",
+        "structure": "Prioritize completeness and clarity. Use a very short introductory sentence. The body must be a dense, detailed list of specifications, condition (if used), dimensions, included components, and compatibility. Keywords are critical. Avoid fluff and marketing hyperbole."
+    }
+}
+
 
 def get_style_instructions(style_variation):
     """Get platform-specific writing instructions"""
-    style_map = {
-        "amazon": {
-            "objective": "Maximize conversions and visibility via A9 algorithm",
-            "format": "Keyword-heavy, bullet-point list for key features and specifications",
-            "tone": "Professional, direct, and benefit-oriented",
-            "structure": "Start with a short, engaging paragraph (approx. 2-3 lines) incorporating primary keywords. Follow with a detailed bulleted list (5-7 points) focusing on specs, features, and user benefits. Conclude with any necessary warranty/guarantee information."
-        },
-        "etsy": {
-            "objective": "Connect emotionally and highlight craftsmanship",
-            "format": "Narrative, storytelling prose",
-            "tone": "Warm, personal, authentic, and inspired",
-            "structure": "Begin with a story behind the product, the maker's inspiration, or the process of creation. Weave in keywords naturally. Describe the sensory details (e.g., 'feel,' 'look,' 'scent'). Mention the care and love put into making it. Include details about materials and their origin if possible."
-        },
-        "shopify": {
-            "objective": "Build brand identity and engage customers",
-            "format": "Flexible, blending storytelling with modern SEO and branding",
-            "tone": "Confident, aspirational, and clean",
-            "structure": "A cohesive brand story. Can use a short headline. Combine persuasive, benefit-driven copy with natural keyword integration. Structure can be a few medium-length paragraphs or a mix of short paragraphs and bullet points. Focus on the problem the product solves and the lifestyle it enables."
-        },
-        "ebay": {
-            "objective": "Provide clear, concise information for a comparison-shopping audience",
-            "format": "Strict, dense, and specification-focused",
-            "tone": "Factual, straightforward, and unbiased",
-            "structure": "Prioritize completeness and clarity. Use a very short introductory sentence. The body must be a dense, detailed list of specifications, condition (if used), dimensions, included components, and compatibility. Keywords are critical. Avoid fluff and marketing hyperbole."
-        }
-    }
-    
-    style = style_map.get(style_variation, style_map["amazon"])
+    style = STYLE_GUIDES.get(style_variation, STYLE_GUIDES["amazon"])
     return f"""
 **{style_variation.upper()} STYLE REQUIREMENTS:**
 - **Objective:** {style['objective']}
@@ -372,34 +602,41 @@ def get_style_instructions(style_variation):
 
 **CRITICAL:** Write the product description in the {style_variation.upper()} style, strictly adhering to the defined rules for that format."""
 
-def build_gemini_prompt(row):
-    """Build a professional copywriter-optimized prompt with enhanced structure and emotional appeal"""
+LANGUAGE_NAMES = {
+    "en": "English",
+    "es": "Spanish", 
+    "fr": "French",
+    "de": "German",
+    "ja": "Japanese",
+    "zh": "Chinese"
+}
+
+TONE_AUDIENCES = {
+    "casual": "everyday consumers looking for comfort and style",
+    "professional": "business professionals and working adults",
+    "luxury": "discerning customers who value premium quality",
+    "sporty": "active individuals and fitness enthusiasts",
+    "modern": "tech-savvy consumers who appreciate contemporary design",
+    "playful": "fun-loving consumers who enjoy vibrant and engaging products"
+}
+
+def build_gemini_prompt_legacy(row):
+    """
+    Build a professional copywriter-optimized prompt with enhanced structure and emotional appeal.
+
+    Reference implementation rendered from scratch on every call;
+    ``build_gemini_prompt`` produces the same bytes from precompiled templates.
+    """
     features_list = row.get("features", "")
     features_formatted = "\n".join([f"- {x.strip()}" for x in features_list.split(";") if x.strip()])
     
     # Get language code and create localization directive
     language_code = row.get("languageCode", "en")
-    language_names = {
-        "en": "English",
-        "es": "Spanish", 
-        "fr": "French",
-        "de": "German",
-        "ja": "Japanese",
-        "zh": "Chinese"
-    }
-    target_language = language_names.get(language_code, "English")
+    target_language = LANGUAGE_NAMES.get(language_code, "English")
     
     # Extract target audience from tone or create a default
     tone = row.get("tone", "professional").lower()
-    audience_map = {
-        "casual": "everyday consumers looking for comfort and style",
-        "professional": "business professionals and working adults",
-        "luxury": "discerning customers who value premium quality",
-        "sporty": "active individuals and fitness enthusiasts",
-        "modern": "tech-savvy consumers who appreciate contemporary design",
-        "playful": "fun-loving consumers who enjoy vibrant and engaging products"
-    }
-    audience = audience_map.get(tone, "general consumers")
+    audience = TONE_AUDIENCES.get(tone, "general consumers")
     
     # Get style variation and define style-specific instructions
     style_variation = row.get("style_variation", "amazon").lower()
@@ -521,6 +758,234 @@ def build_gemini_prompt(row):
     
     return prompt
 
+_PROMPT_FIELD = re.compile("\x00(title|features|primary_keyword)\x00")
+_PROMPT_FIELD_ORDER = ("title", "features", "primary_keyword")
+_PROMPT_SENTINELS = {field: f"\x00{field}\x00" for field in _PROMPT_FIELD_ORDER}
+
+
+class CompiledPromptBuilder:
+    """
+    Single-product prompts from templates compiled once per (style, language, audience).
+
+    Everything in the prompt except the product title, features and primary
+    keyword depends only on that key, so each template is rendered once with
+    sentinel values and split into the literal segments around those fields.
+    Building a prompt then skips re-rendering the ~3 KB of instructions.
+    ``render`` is the reference renderer the templates are compiled from.
+    """
+
+    def __init__(self, render=None):
+        self.render = render or build_gemini_prompt_legacy
+        self._lock = threading.Lock()
+        self._templates = {}
+
+    @staticmethod
+    def template_key(row):
+        """Resolve the template key exactly as the reference renderers do"""
+        target_language = LANGUAGE_NAMES.get(row.get("languageCode", "en"), "English")
+        audience = TONE_AUDIENCES.get(row.get("tone", "professional").lower(), "general consumers")
+        is_etsy = row.get("style_variation", "amazon").lower() == "etsy"
+        return is_etsy, target_language, audience
+
+    def _compile(self, key):
+        is_etsy, target_language, audience = key
+        language_codes = {name: code for code, name in LANGUAGE_NAMES.items()}
+        tones = {text: tone for tone, text in TONE_AUDIENCES.items()}
+        sample = {
+            "title": _PROMPT_SENTINELS["title"],
+            "features": _PROMPT_SENTINELS["features"],
+            "primary_keyword": _PROMPT_SENTINELS["primary_keyword"],
+            "languageCode": language_codes[target_language],
+            "tone": tones.get(audience, "general"),
+            "style_variation": "etsy" if is_etsy else "amazon"
+        }
+        rendered = self.render(sample)
+        # The reference renderer bullets each feature; the slot takes the whole formatted list
+        rendered = rendered.replace("- " + _PROMPT_SENTINELS["features"], _PROMPT_SENTINELS["features"])
+        # re.split with a capture group alternates literal text and field names
+        parts = _PROMPT_FIELD.split(rendered)
+        if tuple(parts[1::2]) != _PROMPT_FIELD_ORDER:
+            raise ValueError(f"Unexpected prompt fields {parts[1::2]} for template {key}")
+        return tuple(parts[0::2])
+
+    def template(self, key):
+        """Literal segments around the title, features and primary keyword slots for ``key``"""
+        template = self._templates.get(key)
+        if template is None:
+            template = self._compile(key)
+            with self._lock:
+                self._templates[key] = template
+        return template
+
+    def precompile(self):
+        """Compile every known (style, language, audience) combination up front"""
+        audiences = list(TONE_AUDIENCES.values()) + ["general consumers"]
+        for is_etsy in (True, False):
+            for target_language in LANGUAGE_NAMES.values():
+                for audience in audiences:
+                    self.template((is_etsy, target_language, audience))
+        return len(self._templates)
+
+    def build(self, row):
+        head, after_title, after_features, tail = self.template(self.template_key(row))
+        features = "\n".join([f"- {x.strip()}" for x in row.get("features", "").split(";") if x.strip()])
+        return f"{head}{row.get('title', '')}{after_title}{features}{after_features}{row.get('primary_keyword', '')}{tail}"
+
+
+def render_compact_gemini_prompt(row):
+    """
+    Reference renderer of the compact prompt variant: the same requirements as
+    ``build_gemini_prompt_legacy`` stated once each, in about a third of the tokens
+    """
+    features_list = row.get("features", "")
+    features_formatted = "\n".join([f"- {x.strip()}" for x in features_list.split(";") if x.strip()])
+    target_language = LANGUAGE_NAMES.get(row.get("languageCode", "en"), "English")
+    audience = TONE_AUDIENCES.get(row.get("tone", "professional").lower(), "general consumers")
+    if row.get("style_variation", "amazon").lower() == "etsy":
+        role = "You are an expert e-commerce copywriter. Sell the experience: emotional benefits, sensory detail and the customer's improved life, in confident, customer-centric language (\"you\", \"your\"). Avoid generic phrases like \"high quality\"."
+        bullet = "benefit-focused bullet on a customer outcome"
+    else:
+        role = "You are an expert e-commerce copywriter. Describe what the product is and does: materials, specifications, functionality and practical benefits, in clear, confident language. Avoid hype and vague emotional claims."
+        bullet = "specific feature and its practical benefit"
+    return f"""{role}
+
+**PRODUCT INFORMATION:**
+- **Product Name:** {row.get("title", "")}
+- **Key Features:** {features_formatted}
+- **Target Audience:** {audience}
+- **Primary Keyword:** {row.get("primary_keyword", "")}
+- **Language:** {target_language}
+
+Write everything in {target_language} and use the primary keyword naturally 1-2 times. Reply with only this JSON object, with exactly 3 bullets:
+{{"title": "5-8 words, includes the primary keyword", "description": "2-3 sentences", "bullets": ["{bullet}", "{bullet}", "{bullet}"], "meta": "SEO meta description, max 140 characters"}}"""
+
+
+# Single-product prompt variants, selectable per run (PROMPT_VARIANT) or per row ("prompt_variant")
+PROMPT_BUILDERS = {
+    "full": CompiledPromptBuilder(build_gemini_prompt_legacy),
+    "compact": CompiledPromptBuilder(render_compact_gemini_prompt)
+}
+PROMPT_VARIANT = os.getenv("PROMPT_VARIANT", "full").lower()
+
+def prompt_variant(name=None):
+    """Resolve a prompt variant name (empty means ``PROMPT_VARIANT``); raises ``ValueError`` for unknown names"""
+    variant = (name or PROMPT_VARIANT).strip().lower()
+    if variant not in PROMPT_BUILDERS:
+        raise ValueError(f"Unknown prompt variant '{variant}' (expected one of {', '.join(PROMPT_BUILDERS)})")
+    return variant
+
+def build_gemini_prompt(row):
+    """Build the single-product prompt from the precompiled template for its variant, style, language and audience"""
+    return PROMPT_BUILDERS[prompt_variant(row.get("prompt_variant"))].build(row)
+
+PRODUCT_BLOCK_START = "**PRODUCT INFORMATION:**"
+PRODUCT_BLOCK_LAST_LINE = "\n- **Language:** "
+
+def split_gemini_prompt(prompt):
+    """
+    Split a single-product prompt into ``(instruction, product block)``.
+
+    The instruction is the prompt without its PRODUCT INFORMATION block (which
+    ends with the Language line), so it only depends on the style, language
+    and category template and can be sent as a cached context. Returns
+    ``None`` for prompts without that block, such as packed prompts.
+    """
+    start = prompt.find(PRODUCT_BLOCK_START)
+    last_line = prompt.find(PRODUCT_BLOCK_LAST_LINE, start) if start >= 0 else -1
+    if last_line < 0:
+        return None
+    end = prompt.find("\n", last_line + 1)
+    if end < 0:
+        end = len(prompt)
+    return prompt[:start] + prompt[end + 1:].lstrip("\n"), prompt[start:end]
+
+# Route products whose category has a template in models/prompt_templates to it
+CATEGORY_PROMPTS_ENABLED = os.getenv("CATEGORY_PROMPTS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+def build_product_prompt(row):
+    """
+    Build the single-product prompt, using the category template
+    (``models/prompt_templates/<category>.md``) when one exists.
+
+    Products without a category template, or all products when
+    ``CATEGORY_PROMPTS_ENABLED`` is off, get ``build_gemini_prompt``.
+    """
+    template = get_template_registry().get(row.get("category")) if CATEGORY_PROMPTS_ENABLED else None
+    if template is None:
+        return build_gemini_prompt(row)
+    style_variation = row.get("style_variation", "amazon").lower()
+    return build_prompt_from_row(
+        row,
+        template=template,
+        language=LANGUAGE_NAMES.get(row.get("languageCode", "en"), "English"),
+        audience=TONE_AUDIENCES.get(row.get("tone", "professional").lower(), "general consumers"),
+        style_instructions=get_style_instructions(style_variation)
+    )
+
+def build_packed_gemini_prompt(rows, slot_ids):
+    """
+    Build one prompt that asks for descriptions of several products at once.
+    
+    The instructions are stated once; each product is tagged with its entry in
+    ``slot_ids`` and the model must answer with a JSON array keyed by those ids.
+    All rows must share tone, style variation and language.
+    """
+    first = rows[0]
+    target_language = LANGUAGE_NAMES.get(first.get("languageCode", "en"), "English")
+    audience = TONE_AUDIENCES.get(first.get("tone", "professional").lower(), "general consumers")
+    style_variation = first.get("style_variation", "amazon").lower()
+    
+    if style_variation == "etsy":
+        focus = """- Focus on emotional benefits, sensory details and the customer's improved life
+- Use power words that create desire: "transform," "enhance," "discover," "experience," "unlock\""""
+    else:
+        focus = """- Focus on PRODUCT FEATURES and SPECIFICATIONS, not abstract transformation
+- Describe what the product IS and what it DOES using concrete language about materials, performance, and functionality"""
+    
+    product_blocks = []
+    for slot_id, row in zip(slot_ids, rows):
+        features_formatted = "\n".join([f"  - {x.strip()}" for x in row.get("features", "").split(";") if x.strip()])
+        product_blocks.append(f"""**PRODUCT {slot_id}:**
+- **Product Name:** {row.get("title", "")}
+- **Key Features:**
+{features_formatted}
+- **Primary Keyword:** {row.get("primary_keyword", "")}""")
+    products_text = "\n\n".join(product_blocks)
+    
+    return f"""You are a professional e-commerce copywriter. Write a separate product description for EACH of the {len(rows)} products listed below.
+{get_style_instructions(style_variation)}
+
+**SHARED SETTINGS:**
+- **Target Audience:** {audience}
+- **Language:** {target_language}
+
+**STRUCTURE REQUIREMENTS (FOR EVERY PRODUCT):**
+- **Title:** 5-8 words that include that product's primary keyword
+- **Description:** 2-3 sentences about that product only
+- **Bullets:** EXACTLY 3 strings, each a specific feature with its practical benefit
+- **SEO Meta Description:** 140 characters optimized for search engines
+
+**CRITICAL REQUIREMENTS:**
+- Write entirely in {target_language} (no English text)
+- Include each product's primary keyword naturally 1-2 times
+{focus}
+- Never mix details between products
+- Return exactly one object per product and copy its "id" exactly as given
+- **YOUR RESPONSE MUST BE A VALID JSON ARRAY ONLY - NO ADDITIONAL TEXT BEFORE OR AFTER IT.**
+
+{products_text}
+
+**OUTPUT FORMAT (JSON ARRAY ONLY):**
+[
+  {{
+    "id": "{slot_ids[0]}",
+    "title": "5-8 word product title in {target_language}",
+    "description": "2-3 sentence paragraph in {target_language}",
+    "bullets": ["Feature and benefit 1", "Feature and benefit 2", "Feature and benefit 3"],
+    "meta": "140-character SEO meta description in {target_language}"
+  }}
+]"""
+
 def row_to_dict(row):
     """Convert pandas row to plain dict with expected keys"""
     return {
@@ -541,6 +1006,8 @@ def main(args):
     print(f"📁 Input file: {args.input}")
     print(f"🔢 Limit: {args.limit if args.limit > 0 else 'No limit'}")
     print(f"🧪 Dry run: {args.dry_run}")
+    variant = prompt_variant(getattr(args, "prompt_variant", None))
+    print(f"✍️  Prompt variant: {variant}")
     print("-" * 50)
     
     # Load environment and initialize components
@@ -554,6 +1021,13 @@ def main(args):
     cost_tracker = CostTracker()
     safety_filter = SafetyFilter()
     
+    # Generation cache (set GENERATION_CACHE_PATH to reuse results across runs)
+    from src.generation.cache import get_generation_cache, generation_cache_key
+    from src.generation.retry_policy import generation_deadline
+    from src.generation.structured import GEMINI_STRUCTURED_OUTPUT, parse_product_response, get_parse_stats
+    structured = GEMINI_STRUCTURED_OUTPUT
+    generation_cache = get_generation_cache()
+    
     # Create output directories
     run_ts = timestamp()
     run_raw_dir = out_base / "raw" / run_ts
@@ -600,11 +1074,40 @@ def main(args):
     results_enriched = []
     raw_records = []
     
+    # Packed mode: generate compatible rows several at a time with shared prompts
+    packed_results = {}
+    pack_size = getattr(args, "pack_size", 1) or 1
+    if pack_size > 1 and not args.dry_run:
+        from src.generation.packing import iter_packs, generate_packed
+        candidates = []
+        for idx, prow in df.iterrows():
+            row = dict(row_to_dict(prow), prompt_variant=variant)
+            if not row["title"] or not row["features"]:
+                continue
+            if not safety_filter.validate_input(row["title"] + " " + row["features"])[0]:
+                continue
+            cache_key = generation_cache_key(build_product_prompt(row), model_name, gemini_generation_config(temp, structured=structured))
+            if generation_cache.get(cache_key) is None:
+                candidates.append((idx, row))
+        packs = [pack for pack in iter_packs(candidates, pack_size) if len(pack) > 1]
+        if packs:
+            print(f"📦 Packing {sum(len(pack) for pack in packs)} rows into {len(packs)} requests (pack size {pack_size})")
+        for pack in tqdm(packs, desc="Packed requests"):
+            with generation_deadline():
+                packed = generate_packed(
+                    model, [row for _, row in pack], temperature=temp,
+                    logger=logger, cost_tracker=cost_tracker, sanitize=safety_filter.sanitize_output
+                )
+            for slot, (idx, _) in enumerate(pack):
+                if slot in packed:
+                    packed_results[idx] = packed[slot]
+        print(f"📦 Packed requests covered {len(packed_results)} rows; the rest use single calls")
+    
     print(f"🔄 Processing {len(df)} rows...")
     print("-" * 50)
     
     for idx, prow in tqdm(df.iterrows(), total=len(df), desc="Processing rows"):
-        row = row_to_dict(prow)
+        row = dict(row_to_dict(prow), prompt_variant=variant)
         identifier = row["id"] or row["sku"] or row["title"][:30]
         
         print(f"📝 Processing row {idx + 1}/{len(df)}: {identifier}")
@@ -633,7 +1136,7 @@ def main(args):
         
         # Build Gemini-optimized prompt
         try:
-            prompt = build_gemini_prompt(row)
+            prompt = build_product_prompt(row)
             print(f"✅ Gemini prompt built for {identifier}")
             logger.log_safety_check(identifier, "PROMPT_BUILD", "SUCCESS")
         except Exception as e:
@@ -658,51 +1161,87 @@ def main(args):
             })
             continue
         
-        # Call Gemini API with enhanced monitoring
-        try:
-            print(f"🤖 Calling Gemini API for {identifier}...")
-            ai_text, tokens_used, response_time = call_gemini_generate(
-                model=model, 
-                prompt=prompt, 
-                temperature=temp,
-                logger=logger,
-                cost_tracker=cost_tracker
-            )
-            
-            # Sanitize output
-            ai_text = safety_filter.sanitize_output(ai_text)
-            
-            print(f"✅ Gemini response received for {identifier}")
-            print(f"📝 Response length: {len(ai_text)} characters")
-            print(f"⏱️  Response time: {response_time:.2f}s")
-            print(f"💰 Current cost: ${cost_tracker.get_current_cost():.4f}")
-            
-            # Write raw response
+        # Reuse a packed or cached generation for an identical prompt when available
+        cache_key = generation_cache_key(prompt, model_name, gemini_generation_config(temp, structured=structured))
+        packed = packed_results.pop(idx, None)
+        parsed = packed[0] if packed else generation_cache.get(cache_key)
+        if packed:
+            _, tokens_used, response_time = packed
+            generation_cache.set(cache_key, parsed)
+            print(f"📦 Packed result used for {identifier}")
+            ai_text = json.dumps(parsed, ensure_ascii=False)
             raw_records.append({
                 "id": identifier,
                 "prompt": prompt,
-                "ai_raw_text": ai_text,
-                "status": "completed",
+                "status": "packed",
                 "model": model_name,
                 "tokens_used": tokens_used,
                 "response_time": response_time,
                 "cost": cost_tracker.get_current_cost()
             })
-            
-        except Exception as e:
-            print(f"❌ Gemini API error for {identifier}: {str(e)}")
-            logger.log_error(identifier, "API_ERROR", str(e))
+        elif parsed is not None:
+            print(f"♻️  Cache hit for {identifier} - skipping Gemini call")
+            ai_text = json.dumps(parsed, ensure_ascii=False)
+            tokens_used, response_time = 0, 0.0
             raw_records.append({
-                "id": identifier, 
-                "status": "api_error", 
-                "error": str(e)
+                "id": identifier,
+                "prompt": prompt,
+                "status": "cache_hit",
+                "model": model_name,
+                "tokens_used": 0,
+                "response_time": 0.0,
+                "cost": cost_tracker.get_current_cost()
             })
-            continue
+        else:
+            # Call Gemini API with enhanced monitoring
+            try:
+                print(f"🤖 Calling Gemini API for {identifier}...")
+                with generation_deadline():
+                    ai_text, tokens_used, response_time = call_gemini_generate(
+                        model=model, 
+                        prompt=prompt, 
+                        temperature=temp,
+                        logger=logger,
+                        cost_tracker=cost_tracker,
+                        structured=structured
+                    )
+            
+                # Sanitize output
+                ai_text = safety_filter.sanitize_output(ai_text)
+            
+                print(f"✅ Gemini response received for {identifier}")
+                print(f"📝 Response length: {len(ai_text)} characters")
+                print(f"⏱️  Response time: {response_time:.2f}s")
+                print(f"💰 Current cost: ${cost_tracker.get_current_cost():.4f}")
+            
+                # Write raw response
+                raw_records.append({
+                    "id": identifier,
+                    "prompt": prompt,
+                    "ai_raw_text": ai_text,
+                    "status": "completed",
+                    "model": model_name,
+                    "tokens_used": tokens_used,
+                    "response_time": response_time,
+                    "cost": cost_tracker.get_current_cost()
+                })
+            
+            except Exception as e:
+                print(f"❌ Gemini API error for {identifier}: {str(e)}")
+                logger.log_error(identifier, "API_ERROR", str(e))
+                raw_records.append({
+                    "id": identifier, 
+                    "status": "api_error", 
+                    "error": str(e)
+                })
+                continue
         
         # Parse AI response
         try:
-            print(f"🔍 Parsing JSON response for {identifier}...")
-            parsed = safe_extract_json(ai_text)
+            if parsed is None:
+                print(f"🔍 Parsing JSON response for {identifier}...")
+                parsed = parse_product_response(ai_text, structured)
+                generation_cache.set(cache_key, parsed)
             
             # Extract fields with fallbacks
             title = parsed.get("title", row.get("title", ""))
@@ -805,11 +1344,18 @@ def main(args):
     print(f"📊 Processed: {len(df)} rows")
     print(f"✅ Successful: {len([r for r in raw_records if r['status'] == 'completed'])}")
     print(f"❌ Errors: {len([r for r in raw_records if r['status'] == 'api_error'])}")
+    print(f"♻️  Cache hits: {len([r for r in raw_records if r['status'] == 'cache_hit'])}")
+    print(f"📦 Packed: {len([r for r in raw_records if r['status'] == 'packed'])}")
     print(f"⚠️  Skipped: {len([r for r in raw_records if r['status'] == 'skipped_missing_fields'])}")
     print(f"🛡️  Safety filtered: {len([r for r in raw_records if r['status'] == 'skipped_safety_check'])}")
     print(f"🧪 Dry run: {len([r for r in raw_records if r['status'] == 'dry_run_prompt_saved'])}")
     print(f"💰 Total cost: ${cost_tracker.get_current_cost():.4f}")
     print(f"🔢 Total tokens: {cost_tracker.total_tokens:,}")
+    parse_stats = get_parse_stats().stats()
+    print(f"🧩 Parsed: {parse_stats['structured']} structured, {parse_stats['legacy_fallback']} via legacy fallback, {parse_stats['failed']} failed")
+    for cache_stats in context_cache_stats([model]).values():
+        print(f"🗄️  Context cache: {cache_stats['cached_calls']} calls used a cached instruction ({cache_stats['cached_tokens']:,} tokens), {cache_stats['uncached_calls']} sent in full")
+    close_context_caches([model])
     print("=" * 50)
     print(f"📂 Output locations:")
     print(f"   Raw: {run_raw_dir}")
@@ -825,5 +1371,9 @@ if __name__ == "__main__":
                        help="Limit number of rows to process (0 = no limit)")
     parser.add_argument("--dry-run", action="store_true",
                        help="Dry run mode - only save prompts, don't call API")
+    parser.add_argument("--pack-size", type=int, default=int(os.getenv("GENERATION_PACK_SIZE", "1")),
+                       help="Products per packed Gemini request (1 = one request per product)")
+    parser.add_argument("--prompt-variant", choices=list(PROMPT_BUILDERS), default=PROMPT_VARIANT,
+                       help="Single-product prompt variant (category templates and packed prompts are not affected)")
     args = parser.parse_args()
     main(args)
\ No newline at end of file
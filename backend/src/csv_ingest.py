@@ -0,0 +1,209 @@
+# backend/src/csv_ingest.py
+"""
+Streaming CSV ingestion
+
+``spool_upload`` copies an upload to a spooled temporary file (in memory up to
+``CSV_SPOOL_MEMORY_BYTES``, on disk beyond) and rejects it once it exceeds
+``CSV_UPLOAD_MAX_MB``. ``CSVFrameReader`` then parses the file in chunks off the
+event loop, with pyarrow's streaming reader when pyarrow is installed and
+pandas' C parser otherwise, so memory is bounded by the chunk size and rows
+can be generated while the rest of the file is still being parsed.
+
+Every cell is read as a string; empty cells are empty strings.
+
+``CSVColumnMapping`` decides once per file which columns hold the title,
+category and features, and turns each parsed chunk into generation records
+with vectorized pandas operations.
+"""
+
+import os
+import asyncio
+import logging
+import tempfile
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from src.generation.features import FeatureCompactor, get_feature_compactor
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:  # Optional: pandas parses the upload instead
+    pa = pa_csv = None
+
+CSV_UPLOAD_MAX_MB = float(os.getenv("CSV_UPLOAD_MAX_MB", "256"))
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "2000"))
+CSV_PARSER = os.getenv("CSV_PARSER", "auto").lower()  # auto, pyarrow or pandas
+
+CSV_SPOOL_MEMORY_BYTES = 1 << 20
+PYARROW_BLOCK_BYTES = 1 << 20
+UPLOAD_READ_BYTES = 1 << 20
+
+# Synonyms for automatic column mapping
+PRODUCT_NAME_SYNONYMS = ['title', 'name', 'product', 'productname', 'item', 'model']
+CATEGORY_SYNONYMS = ['category', 'type', 'department', 'group', 'collection']
+
+# Columns that shouldn't be used as features
+FEATURE_BLOCKLIST = ['id', 'sku', 'price', 'cost', 'url', 'image', 'images']
+
+
+class CSVTooLarge(ValueError):
+    """The upload exceeds the configured maximum size"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"CSV file exceeds the {max_bytes / (1 << 20):.3g} MB upload limit")
+        self.max_bytes = max_bytes
+
+
+async def spool_upload(upload, max_bytes: Optional[int] = None) -> IO[bytes]:
+    """Copy ``upload`` (a FastAPI ``UploadFile``) to a temporary file, raising ``CSVTooLarge`` past ``max_bytes``"""
+    max_bytes = int(CSV_UPLOAD_MAX_MB * (1 << 20)) if max_bytes is None else max_bytes
+    if getattr(upload, "size", None) is not None and upload.size > max_bytes:
+        raise CSVTooLarge(max_bytes)
+    spool = tempfile.SpooledTemporaryFile(max_size=CSV_SPOOL_MEMORY_BYTES)
+    size = 0
+    try:
+        while True:
+            block = await upload.read(UPLOAD_READ_BYTES)
+            if not block:
+                break
+            size += len(block)
+            if size > max_bytes:
+                raise CSVTooLarge(max_bytes)
+            spool.write(block)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def csv_parser(parser: Optional[str] = None) -> str:
+    """The parser that will be used: ``pyarrow`` if requested (or ``auto``) and installed, else ``pandas``"""
+    parser = (parser or CSV_PARSER).lower()
+    if parser == "pyarrow" and pa_csv is None:
+        logging.warning("CSV_PARSER=pyarrow but pyarrow is not installed; using pandas")
+    return "pyarrow" if parser in ("auto", "pyarrow") and pa_csv is not None else "pandas"
+
+
+def _iter_pyarrow_frames(fileobj: IO[bytes]) -> Iterator[pd.DataFrame]:
+    start = fileobj.tell()
+    # Header as pandas reads it (duplicate names made unique); every column is read as a string,
+    # not as inferred from the first block
+    names = pd.read_csv(fileobj, nrows=0).columns.tolist()
+    fileobj.seek(start)
+    reader = pa_csv.open_csv(
+        fileobj,
+        read_options=pa_csv.ReadOptions(block_size=PYARROW_BLOCK_BYTES, column_names=names, skip_rows=1),
+        # Quoted cells may span lines (HTML or long descriptions); without this, blocks are split mid-cell
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in names})
+    )
+    for batch in reader:
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def _iter_pandas_frames(fileobj: IO[bytes], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    with pd.read_csv(fileobj, chunksize=chunk_rows, dtype=str, na_filter=False) as reader:
+        yield from reader
+
+
+def iter_csv_frames(fileobj: IO[bytes], chunk_rows: int = CSV_CHUNK_ROWS, parser: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of string cells from a seekable CSV file, a chunk at a time"""
+    if csv_parser(parser) == "pyarrow":
+        return _iter_pyarrow_frames(fileobj)
+    return _iter_pandas_frames(fileobj, max(1, chunk_rows))
+
+
+class CSVFrameReader:
+    """Parses a spooled CSV chunk by chunk in a worker thread"""
+
+    def __init__(self, fileobj: IO[bytes], chunk_rows: int = CSV_CHUNK_ROWS, parser: Optional[str] = None):
+        self._file = fileobj
+        self.parser = csv_parser(parser)
+        self._frames = iter_csv_frames(fileobj, chunk_rows, self.parser)
+        self.rows = 0
+        self.chunks = 0
+
+    async def next_frame(self) -> Optional[pd.DataFrame]:
+        """The next chunk, or ``None`` at the end of the file"""
+        frame = await asyncio.to_thread(next, self._frames, None)
+        if frame is not None:
+            self.rows += len(frame)
+            self.chunks += 1
+        return frame
+
+    def close(self) -> None:
+        try:
+            self._frames.close()
+        except ValueError:
+            pass  # Still parsing in the worker thread (e.g. the client went away); the file is closed anyway
+        self._file.close()
+
+
+def _normalize_column(name) -> str:
+    # Normalize: lowercase, remove spaces, hyphens, underscores
+    return str(name).lower().replace(' ', '').replace('-', '').replace('_', '')
+
+
+def find_column(columns: Sequence[str], synonyms: Sequence[str]) -> Optional[str]:
+    """
+    Find the best matching column for given synonyms.
+    Normalizes column names and returns the first match.
+    """
+    normalized_columns = {}
+    for col in columns:
+        normalized_columns[_normalize_column(col)] = col
+
+    for synonym in synonyms:
+        normalized_synonym = _normalize_column(synonym)
+        if normalized_synonym in normalized_columns:
+            return normalized_columns[normalized_synonym]
+
+    return None
+
+
+class CSVColumnMapping:
+    """Title, category and feature columns of one upload, resolved from its header"""
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        # Fallback: the first column is the title; without a category column every product is "general"
+        self.product_name_col = find_column(self.columns, PRODUCT_NAME_SYNONYMS) or (self.columns[0] if self.columns else None)
+        self.category_col = find_column(self.columns, CATEGORY_SYNONYMS)
+        self.feature_columns = [
+            col for col in self.columns
+            if col not in (self.product_name_col, self.category_col) and str(col).lower() not in FEATURE_BLOCKLIST
+        ]
+        logging.info(
+            f"Mapped '{self.product_name_col}' to 'product_name', '{self.category_col or 'General'}' to 'category', "
+            f"{len(self.feature_columns)} feature columns"
+        )
+
+    def records(self, frame: pd.DataFrame, audience: str, language_code: str = "en", prompt_variant: Optional[str] = None,
+                compactor: Optional[FeatureCompactor] = None) -> List[Dict[str, Any]]:
+        """Generation records for every row of ``frame``, built column by column"""
+        def text(col):
+            if col is None or col not in frame:
+                return pd.Series("", index=frame.index, dtype=object)
+            return frame[col].fillna("").astype(str).str.strip()
+
+        titles = text(self.product_name_col)
+        compactor = compactor or get_feature_compactor()
+        columns = {
+            "id": text("id"),
+            "sku": text("sku"),
+            "title": titles,
+            "category": text(self.category_col).str.lower() if self.category_col else pd.Series("general", index=frame.index),
+            "features": compactor.compact_frame(frame, self.feature_columns, known_values=titles),
+            "primary_keyword": text("primary_keyword"),
+            "tone": text("tone"),
+            "price": frame["price"] if "price" in frame else pd.Series("", index=frame.index),
+            "images": text("images")
+        }
+        shared = {"audience": audience, "languageCode": language_code, "prompt_variant": prompt_variant}
+        names = list(columns)
+        values = [column.to_numpy(dtype=object) for column in columns.values()]
+        return [dict(zip(names, row), **shared) for row in zip(*values)]
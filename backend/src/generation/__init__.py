@@ -0,0 +1,14 @@
+# backend/src/generation/__init__.py
+"""
+Generation runtime for the AI Product Descriptions application
+
+Async, non-blocking wrappers around the Gemini calls in ``src.ai_pipeline``.
+"""
+
+from .async_client import call_gemini_generate_async, get_generation_executor, shutdown_generation_executor
+
+__all__ = [
+    "call_gemini_generate_async",
+    "get_generation_executor",
+    "shutdown_generation_executor"
+]
@@ -0,0 +1,116 @@
+# backend/src/generation/async_client.py
+"""
+Async Gemini client
+
+The ``google.generativeai`` SDK is synchronous, so every attempt is offloaded
+to a bounded thread pool while retries and backoff are awaited on the event
+loop. A slow Gemini call therefore never blocks other requests.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from src.ai_pipeline import gemini_generate_once, gemini_api_error
+
+from .governor import PermitTimeout, run_governed
+from .circuit_breaker import get_circuit_breaker
+from .retry_policy import (
+    TRANSIENT, GEMINI_REQUEST_TIMEOUT, GenerationDeadlineExceeded, RetriesExhausted,
+    attempt_timeout, classify_error, remaining_time, retry_async
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_generation_executor() -> ThreadPoolExecutor:
+    """Return the process-wide executor used for blocking Gemini calls"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            max_workers = int(os.getenv("GEMINI_MAX_WORKERS", "16"))
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+            logging.info(f"Gemini executor started with {max_workers} workers")
+        return _executor
+
+
+def shutdown_generation_executor(wait: bool = False) -> None:
+    """Stop the executor (called on application shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait, cancel_futures=True)
+            _executor = None
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Errors worth another attempt: only transient backend failures (see ``retry_policy.classify_error``)"""
+    return classify_error(error) == TRANSIENT
+
+
+async def call_gemini_generate_async(model, prompt, temperature=0.2, logger=None, cost_tracker=None, max_output_tokens=None,
+                                     structured=False):
+    """
+    Non-blocking equivalent of ``call_gemini_generate``.
+
+    Same retry policy (transient errors only, up to ``GEMINI_MAX_ATTEMPTS``
+    with backoff or the server's retry-after), error categorization and return
+    value ``(text, tokens_used, response_time)``. Every attempt passes the
+    circuit breaker, is paced by the process-wide rate governor and is bounded
+    by the current generation deadline. The per-attempt timeout starts once
+    the governor has granted a permit, so time spent queueing is not counted
+    against the backend.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_generation_executor()
+    breaker = get_circuit_breaker()
+    
+    async def timed_call():
+        timeout = attempt_timeout()  # Measured from the permit, shortened to the remaining budget
+        call = partial(gemini_generate_once, model, prompt, temperature, logger, cost_tracker, max_output_tokens, timeout, structured)
+        # Executor threads do not inherit context variables; carry the usage context over
+        # so token usage is accounted to the calling request (one copy per call, since a
+        # timed-out call may still be running in its thread)
+        context = contextvars.copy_context()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(executor, context.run, call), timeout)
+        except asyncio.TimeoutError:
+            if timeout < GEMINI_REQUEST_TIMEOUT:
+                raise GenerationDeadlineExceeded(f"Generation deadline exceeded during a Gemini call (cut off after {timeout:.1f}s)")
+            raise TimeoutError(f"Gemini call timed out after {timeout:.0f}s")
+    
+    async def guarded_attempt():
+        breaker.before_call()  # Fails fast while the circuit is open
+        try:
+            result = await run_governed(timed_call, permit_timeout=remaining_time())
+        except PermitTimeout as e:
+            # The request ran out of budget while queueing; that says nothing about backend health
+            breaker.record_ignored()
+            raise GenerationDeadlineExceeded(f"Generation deadline exceeded waiting for a Gemini permit: {e}") from e
+        except GenerationDeadlineExceeded:
+            breaker.record_ignored()
+            raise
+        except asyncio.CancelledError:
+            breaker.record_ignored()
+            raise
+        except Exception as e:
+            breaker.record(e)
+            raise
+        breaker.record_success()
+        return result
+    
+    try:
+        # Throttling is handled by the governor (it queues and re-sends) and an open
+        # circuit should fail fast, so only transient errors are retried here
+        return await retry_async(guarded_attempt)
+    except RetriesExhausted as retry_error:
+        raise gemini_api_error(retry_error, logger, after_retries=True)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        raise gemini_api_error(e, logger)
@@ -0,0 +1,164 @@
+# backend/src/generation/batch.py
+"""
+Bounded-concurrency batch executor
+
+Runs one coroutine per batch item with two limits: a per-batch limit so one
+large batch cannot monopolize the process, and a process-wide limit shared by
+every batch running on the event loop. ``iter_batch`` yields outcomes as they
+complete; ``run_batch`` collects them in input order. ``iter_grouped_batch``
+schedules groups of items (e.g. packed prompts) as single units of work.
+"""
+
+import os
+import asyncio
+import weakref
+import itertools
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("GENERATION_BATCH_CONCURRENCY", "5"))
+DEFAULT_PROCESS_CONCURRENCY = int(os.getenv("GENERATION_MAX_CONCURRENCY", "16"))
+
+# One process-wide semaphore per event loop (semaphores are bound to a loop)
+_process_semaphores = weakref.WeakKeyDictionary()
+
+_DONE = object()
+
+
+class BatchStopped(Exception):
+    """Raised by an item worker to stop the batch; ``outcome`` is still recorded for that item"""
+
+    def __init__(self, outcome: Any = None):
+        super().__init__("Batch stopped")
+        self.outcome = outcome
+
+
+def get_process_semaphore() -> asyncio.Semaphore:
+    """Return the process-wide generation semaphore for the running loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _process_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(DEFAULT_PROCESS_CONCURRENCY)
+        _process_semaphores[loop] = semaphore
+    return semaphore
+
+
+def _item_source(items: Union[Iterable[Any], AsyncIterable[Any]]) -> Callable[[], Awaitable[Any]]:
+    """An awaitable ``next`` returning ``(idx, item)`` or ``_DONE``, safe to call from several pumps"""
+    if not hasattr(items, "__aiter__"):
+        source = enumerate(items)
+        
+        async def pull():
+            return next(source, _DONE)
+        return pull
+    
+    iterator = items.__aiter__()
+    counter = itertools.count()
+    lock = asyncio.Lock()  # An async iterator must not be advanced concurrently
+    
+    async def pull():
+        async with lock:
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                return _DONE
+            return next(counter), item
+    return pull
+
+
+async def iter_batch(
+    items: Union[Iterable[Any], AsyncIterable[Any]],
+    worker: Callable[[int, Any], Awaitable[Any]],
+    concurrency: Optional[int] = None
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Run ``worker(idx, item)`` for every item and yield ``(idx, outcome)`` as each completes.
+
+    Items are pulled lazily by a fixed pool of ``concurrency`` tasks, so memory
+    does not grow with the batch size; ``items`` may be an async iterable (e.g.
+    rows parsed from an upload). When a worker raises ``BatchStopped``,
+    its outcome is yielded and items that have not started are never attempted;
+    items already in flight are allowed to finish.
+    """
+    limit = max(1, concurrency or DEFAULT_BATCH_CONCURRENCY)
+    process_semaphore = get_process_semaphore()
+    pull = _item_source(items)
+    completed: asyncio.Queue = asyncio.Queue()
+    stopped = False
+    
+    async def pump():
+        nonlocal stopped
+        while not stopped:
+            entry = await pull()
+            if entry is _DONE:
+                return
+            idx, item = entry
+            async with process_semaphore:
+                if stopped:
+                    return
+                try:
+                    outcome = await worker(idx, item)
+                except BatchStopped as stop:
+                    outcome = stop.outcome
+                    stopped = True
+            await completed.put((idx, outcome))
+    
+    async def run_pumps():
+        pumps = [asyncio.create_task(pump()) for _ in range(limit)]
+        try:
+            await asyncio.gather(*pumps)
+        except BaseException:
+            for task in pumps:
+                task.cancel()
+            await asyncio.gather(*pumps, return_exceptions=True)
+            raise
+        finally:
+            if hasattr(items, "aclose"):
+                await items.aclose()  # Stop an async generator that was not exhausted
+            completed.put_nowait(_DONE)
+    
+    runner = asyncio.create_task(run_pumps())
+    try:
+        while True:
+            entry = await completed.get()
+            if entry is _DONE:
+                break
+            yield entry
+        await runner  # Re-raise worker exceptions
+    finally:
+        if not runner.done():
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+
+async def iter_grouped_batch(
+    groups: Iterable[Sequence[Tuple[int, Any]]],
+    worker: Callable[[Sequence[Tuple[int, Any]]], Awaitable[Sequence[Tuple[int, Any]]]],
+    concurrency: Optional[int] = None
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Like ``iter_batch`` for workers that handle a group of ``(idx, item)`` pairs per call.
+
+    Each worker returns ``(idx, outcome)`` pairs, which are yielded as their
+    group completes. A worker stopping the batch raises ``BatchStopped`` whose
+    outcome is the list of pairs it did produce.
+    """
+    async for _, pairs in iter_batch(groups, lambda _, group: worker(group), concurrency):
+        for idx, outcome in pairs or ():
+            yield idx, outcome
+
+
+async def run_batch(
+    items: Sequence[Any],
+    worker: Callable[[int, Any], Awaitable[Any]],
+    concurrency: Optional[int] = None
+) -> List[Any]:
+    """
+    Run ``worker(idx, item)`` for every item with bounded concurrency.
+
+    Returns the worker outcomes in input order; items skipped because the
+    batch was stopped have outcome ``None``.
+    """
+    outcomes: List[Any] = [None] * len(items)
+    async for idx, outcome in iter_batch(items, worker, concurrency):
+        outcomes[idx] = outcome
+    return outcomes
@@ -0,0 +1,178 @@
+# backend/src/generation/cache.py
+"""
+Content-addressed generation cache
+
+Parsed generation results are keyed on a hash of the final prompt, the model
+name and the generation config, so identical products are only sent to Gemini
+once. Entries live in a bounded in-memory LRU with a TTL and, when
+``GENERATION_CACHE_PATH`` is set, in a SQLite file that survives restarts and
+is shared between the API and CLI runs.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", "1024"))
+GENERATION_CACHE_TTL = float(os.getenv("GENERATION_CACHE_TTL", "86400"))  # 24 hours; 0 disables expiry
+GENERATION_CACHE_PATH = os.getenv("GENERATION_CACHE_PATH", "")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def generation_cache_key(prompt: str, model_name: str, generation_config: Dict[str, Any]) -> str:
+    """Hash the inputs that determine a generation into a cache key"""
+    material = json.dumps(
+        {"prompt": prompt, "model": model_name or "", "config": generation_config or {}},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """Two-tier (memory LRU + optional SQLite) cache of parsed generation results"""
+
+    def __init__(self, max_entries: int = GENERATION_CACHE_SIZE, ttl_seconds: float = GENERATION_CACHE_TTL,
+                 path: Optional[str] = None, clock=time.time):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.path = path or None
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> (stored_at, serialized value)
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+        if self.path:
+            try:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS generation_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"Generation cache disabled persistent tier at {self.path}: {e}")
+                self._db = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self._db is not None
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and self._clock() - stored_at > self.ttl_seconds
+
+    def _remember(self, key: str, stored_at: float, serialized: str) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (stored_at, serialized)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a fresh copy of the cached value, or ``None`` on a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, serialized = entry
+                if not self._expired(stored_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return json.loads(serialized)
+                del self._entries[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, stored_at FROM generation_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        serialized, stored_at = row
+                        if not self._expired(stored_at):
+                            self._remember(key, stored_at, serialized)
+                            self.hits += 1
+                            self.disk_hits += 1
+                            return json.loads(serialized)
+                        self._db.execute("DELETE FROM generation_cache WHERE key = ?", (key,))
+                        self._db.commit()
+                except sqlite3.Error as e:
+                    logging.warning(f"Generation cache read failed: {e}")
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under ``key``"""
+        if not self.enabled:
+            return
+        serialized = json.dumps(value, ensure_ascii=False)
+        stored_at = self._clock()
+        with self._lock:
+            self._remember(key, stored_at, serialized)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO generation_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                        (key, serialized, stored_at)
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logging.warning(f"Generation cache write failed: {e}")
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM generation_cache")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and sizing, for the metrics endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None
+            }
+
+
+def get_generation_cache() -> GenerationCache:
+    """Return the process-wide generation cache configured from the environment"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GenerationCache(path=GENERATION_CACHE_PATH or None)
+            logging.info(f"Generation cache ready: {_cache.stats()}")
+        return _cache
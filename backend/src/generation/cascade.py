@@ -0,0 +1,119 @@
+# backend/src/generation/cascade.py
+"""
+Model cascade: cheap model first, escalate on quality failures
+
+With ``GEMINI_CASCADE_MODELS=gemini-1.5-flash,gemini-1.5-pro`` a generation is
+first attempted on the fast tier; only when its answer fails JSON parsing,
+compliance validation or the SEO check is the next (larger) tier asked.
+Errors from the API itself are not escalated, they go through the usual retry
+and circuit breaker handling. Per-tier pass rates, latency and spend are kept
+for ``/api/generation/metrics``.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from .hedging import LatencyTracker
+
+
+class QualityCheckFailed(ValueError):
+    """A generated answer that was paid for but is not usable; carries its token usage"""
+
+    def __init__(self, message: str, tokens_used: int = 0, response_time: float = 0.0):
+        super().__init__(message)
+        self.tokens_used = tokens_used
+        self.response_time = response_time
+
+
+class _TierStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.attempts = 0
+        self.passed = 0
+        self.rejected = 0
+        self.errors = 0
+        self.latency = LatencyTracker()
+
+
+class ModelCascade:
+    """Try each model tier in order until one produces an answer that passes the quality checks"""
+
+    def __init__(self, models: Sequence[Any], names: Optional[Sequence[str]] = None, cost_tracker=None,
+                 clock=time.monotonic):
+        if not models:
+            raise ValueError("A model cascade needs at least one model")
+        self.models = list(models)
+        names = list(names) if names else [getattr(model, "model_name", "") or f"tier{n}" for n, model in enumerate(self.models)]
+        self.cost_tracker = cost_tracker
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tiers = [_TierStats(name) for name in names]
+
+    @property
+    def names(self) -> List[str]:
+        return [tier.name for tier in self._tiers]
+
+    @property
+    def key(self) -> str:
+        """Identifies the cascade in generation cache keys"""
+        return ">".join(self.names)
+
+    async def run(self, attempt: Callable[[Any, bool], Awaitable[Any]]) -> Any:
+        """
+        Await ``attempt(model, is_last_tier)`` for each tier until one succeeds.
+
+        ``attempt`` returns ``(result, tokens_used, response_time)`` and raises
+        ``QualityCheckFailed`` for an unusable answer; tokens and time of
+        escalated attempts are added to the returned totals. The last tier's
+        ``QualityCheckFailed`` and any other exception are raised.
+        """
+        spent_tokens = 0
+        spent_time = 0.0
+        last = len(self.models) - 1
+        for index, (model, tier) in enumerate(zip(self.models, self._tiers)):
+            started = self._clock()
+            with self._lock:
+                tier.attempts += 1
+            try:
+                result, tokens_used, response_time = await attempt(model, index == last)
+            except QualityCheckFailed as e:
+                tier.latency.observe(self._clock() - started)
+                with self._lock:
+                    tier.rejected += 1
+                spent_tokens += e.tokens_used
+                spent_time += e.response_time
+                if index == last:
+                    raise
+                logging.info(f"Escalating generation from {tier.name} to {self._tiers[index + 1].name}: {e}")
+                continue
+            except Exception:
+                with self._lock:
+                    tier.errors += 1
+                raise
+            tier.latency.observe(self._clock() - started)
+            with self._lock:
+                tier.passed += 1
+            return result, spent_tokens + tokens_used, spent_time + response_time
+
+    def stats(self) -> Dict[str, Any]:
+        tiers = []
+        for tier in self._tiers:
+            with self._lock:
+                attempts, passed, rejected, errors = tier.attempts, tier.passed, tier.rejected, tier.errors
+            latency = tier.latency.stats()
+            latency.pop("histogram")
+            usage = self.cost_tracker.get_model_usage(tier.name) if self.cost_tracker is not None else {}
+            tiers.append({
+                "model": tier.name,
+                "attempts": attempts,
+                "passed": passed,
+                "rejected": rejected,  # failed the quality checks (escalated unless last tier)
+                "errors": errors,
+                "pass_rate": round(passed / attempts, 4) if attempts else 0.0,
+                "latency": latency,
+                "tokens": usage.get("total_tokens", 0),
+                "cost": usage.get("cost", 0.0)
+            })
+        return {"enabled": len(self._tiers) > 1, "tiers": tiers}
@@ -0,0 +1,176 @@
+# backend/src/generation/circuit_breaker.py
+"""
+Circuit breaker around the Gemini backend
+
+Tracks the outcome of recent Gemini attempts in a sliding time window. When
+the error rate crosses the threshold the circuit opens and calls fail fast
+instead of spending retries and backoff on a degraded backend. After a cool
+down a single probe call is let through (half-open); its outcome decides
+whether the circuit closes again or stays open for another cool down.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+from src.llm.cassette import CassetteMiss
+
+GEMINI_BREAKER_WINDOW_SECONDS = float(os.getenv("GEMINI_BREAKER_WINDOW_SECONDS", "60"))
+GEMINI_BREAKER_MIN_CALLS = int(os.getenv("GEMINI_BREAKER_MIN_CALLS", "10"))
+GEMINI_BREAKER_ERROR_RATE = float(os.getenv("GEMINI_BREAKER_ERROR_RATE", "0.5"))
+GEMINI_BREAKER_OPEN_SECONDS = float(os.getenv("GEMINI_BREAKER_OPEN_SECONDS", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Errors caused by the request or by local limits say nothing about backend health
+_IGNORED_MARKERS = ("safety", "blocked", "invalid", "malformed", "cost limit", "429", "quota", "exhausted", "too many requests")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Gemini while the circuit is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit breaker open - Gemini backend unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_breaker_failure(error: BaseException) -> bool:
+    """True for errors that indicate the backend itself is unhealthy (5xx, timeouts, connection errors)"""
+    if isinstance(error, (CircuitOpenError, CassetteMiss)):
+        return False
+    message = str(error).lower()
+    return not any(marker in message for marker in _IGNORED_MARKERS)
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker with closed, open and half-open states"""
+
+    def __init__(self, window_seconds: float = GEMINI_BREAKER_WINDOW_SECONDS, min_calls: int = GEMINI_BREAKER_MIN_CALLS,
+                 error_rate_threshold: float = GEMINI_BREAKER_ERROR_RATE, open_seconds: float = GEMINI_BREAKER_OPEN_SECONDS,
+                 name: str = "gemini", clock=time.monotonic):
+        self.window_seconds = float(window_seconds)
+        self.min_calls = max(1, int(min_calls))
+        self.error_rate_threshold = float(error_rate_threshold)
+        self.open_seconds = float(open_seconds)
+        self.name = name
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, failed)
+        self._state = CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, failed in self._outcomes if failed) / len(self._outcomes)
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self.times_opened += 1
+        logging.error(f"Circuit breaker '{self.name}' opened (error rate {self._error_rate():.0%} over {len(self._outcomes)} calls)")
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """Admit a call or raise ``CircuitOpenError``; in half-open state only one probe is admitted"""
+        with self._lock:
+            now = self._clock()
+            if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logging.info(f"Circuit breaker '{self.name}' half-open: sending probe request")
+                return
+            self.rejected += 1
+            retry_after = max(0.0, self.open_seconds - (now - self._opened_at))
+            raise CircuitOpenError(retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            now = self._clock()
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._probe_in_flight = False
+                self._outcomes.clear()
+                logging.info(f"Circuit breaker '{self.name}' closed after successful probe")
+            self._outcomes.append((now, False))
+            self._prune(now)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = self._clock()
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+            if self._state == OPEN:
+                return
+            self._outcomes.append((now, True))
+            self._prune(now)
+            if len(self._outcomes) >= self.min_calls and self._error_rate() >= self.error_rate_threshold:
+                self._open(now)
+
+    def record_ignored(self) -> None:
+        """Release a half-open probe whose error says nothing about backend health"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record(self, error: Optional[BaseException] = None) -> None:
+        """Record the outcome of an admitted call (``error`` is None on success)"""
+        if error is None:
+            self.record_success()
+        elif is_breaker_failure(error):
+            self.record_failure()
+        else:
+            self.record_ignored()
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            self._prune(self._clock())
+            return {
+                "state": state,
+                "error_rate": round(self._error_rate(), 3),
+                "recent_calls": len(self._outcomes),
+                "error_rate_threshold": self.error_rate_threshold,
+                "min_calls": self.min_calls,
+                "window_seconds": self.window_seconds,
+                "open_seconds": self.open_seconds,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected
+            }
+
+
+_breaker: Optional[CircuitBreaker] = None
+_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    """Return the process-wide Gemini circuit breaker"""
+    global _breaker
+    with _breaker_lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker()
+        return _breaker
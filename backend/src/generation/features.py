@@ -0,0 +1,307 @@
+# backend/src/generation/features.py
+"""
+Feature compaction for wide CSV rows
+
+Supplier exports can have hundreds of columns of specs, HTML and long text.
+``FeatureCompactor`` turns a row's ``(column, value)`` pairs into a bounded
+feature string: empty, duplicate and link/image cells are dropped, HTML is
+stripped, long cells are truncated, and the remaining cells are added by
+column usefulness until ``FEATURE_TOKEN_BUDGET`` is spent. ``compact_frame``
+does the same for a whole DataFrame with vectorized string operations.
+"""
+
+import os
+import re
+import html
+import math
+import threading
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.llm import estimate_token_count
+from src.llm.base import CJK_CHARACTERS
+
+FEATURE_TOKEN_BUDGET = int(os.getenv("FEATURE_TOKEN_BUDGET", "400"))
+FEATURE_MAX_CELL_CHARS = int(os.getenv("FEATURE_MAX_CELL_CHARS", "300"))
+
+# Column-name fragments (normalized: lowercase, no spaces, hyphens or underscores)
+USEFUL_COLUMNS = (
+    "feature", "bullet", "highlight", "description", "desc", "spec", "material", "fabric", "dimension", "size",
+    "color", "colour", "capacity", "weight", "compatib", "warranty", "benefit", "detail", "ingredient", "finish",
+    "power", "battery", "style", "fit", "care"
+)
+LOW_VALUE_COLUMNS = (
+    "barcode", "ean", "upc", "gtin", "isbn", "asin", "mpn", "code", "date", "created", "updated", "modified",
+    "stock", "inventory", "qty", "quantity", "status", "supplier", "vendor", "handle", "seo", "tag", "published",
+    "tone", "keyword"
+)
+SKIPPED_COLUMNS = ("url", "link", "href", "image", "img", "photo", "thumbnail", "video")
+
+EMPTY_VALUES = {"", "nan", "none", "null", "n/a", "na", "-", "--"}
+_TAG = re.compile(r"<[^>]+>")
+_BREAK_TAG = re.compile(r"<\s*(br|/p|/li|/div|/h\d)\s*/?>", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+_ODD_SPACE = re.compile(r"\s\s|[^\S ]")  # Whitespace that _SPACE would change
+_LINK = re.compile(r"^(https?://|www\.)\S+$", re.IGNORECASE)
+_LONG_NUMBER = re.compile(r"^ *(?:\d *){8,}$")  # 8+ digits, ignoring spaces
+
+
+def _normalize_name(name: str) -> str:
+    return str(name).lower().replace(" ", "").replace("-", "").replace("_", "")
+
+
+def clean_cell(value: Any, max_chars: int = FEATURE_MAX_CELL_CHARS) -> Tuple[str, bool]:
+    """``(text, truncated)``: ``value`` without HTML, entities and runs of whitespace, cut to ``max_chars``"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "", False
+    text = str(value)
+    if "<" in text:
+        text = _TAG.sub(" ", _BREAK_TAG.sub("; ", text))
+    if "&" in text:
+        text = html.unescape(text)
+    text = _SPACE.sub(" ", text).strip(" ;")
+    if text.lower() in EMPTY_VALUES:
+        return "", False
+    if max_chars and len(text) > max_chars:
+        cut = text[:max_chars].rsplit(" ", 1)[0] or text[:max_chars]
+        return cut.rstrip(" ,.;:") + "…", True
+    return text, False
+
+
+def _name_priority(name) -> int:
+    normalized = _normalize_name(name)
+    if any(part in normalized for part in SKIPPED_COLUMNS):
+        return -1
+    if any(part in normalized for part in USEFUL_COLUMNS):
+        return 2
+    if any(part in normalized for part in LOW_VALUE_COLUMNS):
+        return 0
+    return 1
+
+
+def column_priority(name: str, value: str) -> int:
+    """2 for descriptive columns, 1 for ordinary ones, 0 for identifiers and bookkeeping, -1 to skip"""
+    priority = _name_priority(name)
+    if priority < 0 or _LINK.match(value):
+        return -1
+    if priority == 1 and _LONG_NUMBER.match(value):
+        return 0
+    return priority
+
+
+def estimate_token_counts(texts: pd.Series) -> pd.Series:
+    """``estimate_token_count`` of every (non-empty) string in ``texts``"""
+    texts = texts.astype(object)  # Python regex semantics, whatever the string storage
+    cjk = texts.str.count(CJK_CHARACTERS)
+    return cjk + np.maximum(1, (texts.str.len() - cjk + 3) // 4)
+
+
+class FeatureCompactor:
+    """Builds bounded feature strings and counts what was dropped"""
+
+    def __init__(self, token_budget: int = FEATURE_TOKEN_BUDGET, max_cell_chars: int = FEATURE_MAX_CELL_CHARS,
+                 separator: str = ". "):
+        self.token_budget = token_budget
+        self.max_cell_chars = max_cell_chars
+        self.separator = separator
+        self._lock = threading.Lock()
+        self._counts = {"rows": 0, "cells": 0, "kept": 0, "empty": 0, "duplicate": 0, "skipped": 0,
+                        "over_budget": 0, "truncated": 0, "tokens": 0}
+
+    def compact(self, cells: Iterable[Tuple[str, Any]], known_values: Iterable[str] = ()) -> str:
+        """
+        Feature string for ``(column, value)`` cells, at most ``token_budget`` tokens.
+
+        Cells are kept in column order within each priority; values equal to
+        one of ``known_values`` (e.g. the title) count as duplicates.
+        """
+        counts = dict.fromkeys(self._counts, 0)
+        counts["rows"] = 1
+        seen = {_SPACE.sub(" ", str(value)).strip().lower() for value in known_values if value}
+        candidates = []
+        for position, (column, value) in enumerate(cells):
+            counts["cells"] += 1
+            text, truncated = clean_cell(value, self.max_cell_chars)
+            if not text:
+                counts["empty"] += 1
+                continue
+            key = text.lower()
+            if key in seen:
+                counts["duplicate"] += 1
+                continue
+            seen.add(key)
+            priority = column_priority(column, text)
+            if priority < 0:
+                counts["skipped"] += 1
+                continue
+            counts["truncated"] += truncated
+            candidates.append((-priority, position, f"{column}: {text}"))
+
+        kept = []
+        separator_tokens = estimate_token_count(self.separator.strip()) if self.separator.strip() else 0
+        for _, position, part in sorted(candidates):
+            tokens = estimate_token_count(part) + (separator_tokens if kept else 0)
+            if counts["tokens"] + tokens > self.token_budget:
+                counts["over_budget"] += 1
+                continue
+            counts["tokens"] += tokens
+            kept.append(part)
+        counts["kept"] = len(kept)
+        self._record(counts)
+        return self.separator.join(kept)
+
+    def compact_frame(self, frame: pd.DataFrame, columns: Sequence[Any], known_values: Optional[pd.Series] = None) -> pd.Series:
+        """
+        ``compact`` for every row of ``frame`` at once, indexed like ``frame``.
+
+        ``known_values`` holds one value per row (e.g. the titles). Each
+        distinct cell value is cleaned once with vectorized string operations;
+        deduplication, ranking and the token budget work on integer arrays, and
+        only the kept cells are joined into strings.
+        """
+        rows, width = len(frame), len(columns)
+        counts = dict.fromkeys(self._counts, 0)
+        counts.update(rows=rows, cells=rows * width)
+        features = np.full(rows, "", dtype=object)
+        if not rows or not width:
+            self._record(counts)
+            return pd.Series(features, index=frame.index, dtype=object)
+
+        # Cells in row then column order, as codes into their distinct values
+        codes, uniques = pd.factorize(frame[list(columns)].to_numpy(dtype=object).ravel())
+        # Object dtype keeps the string operations on Python's re, as in clean_cell: with pyarrow
+        # installed, str dtype runs them on Arrow's regex engine, which rejects or reads the patterns differently
+        text = pd.Series(uniques, dtype=object).astype(str).astype(object)
+        tagged = text.str.contains("<", regex=False)
+        if tagged.any():
+            text[tagged] = text[tagged].str.replace(_BREAK_TAG, "; ", regex=True).str.replace(_TAG, " ", regex=True)
+        escaped = text.str.contains("&", regex=False)
+        if escaped.any():
+            text[escaped] = text[escaped].map(html.unescape)
+        spaced = text.str.contains(_ODD_SPACE)
+        if spaced.any():
+            text[spaced] = text[spaced].str.replace(_SPACE, " ", regex=True)
+        text = text.str.strip(" ;")
+        lower = text.str.lower()
+        filled = ~lower.isin(EMPTY_VALUES).to_numpy()
+        truncated = np.zeros(len(text), dtype=bool)
+        if self.max_cell_chars:
+            truncated = (text.str.len() > self.max_cell_chars).to_numpy()
+            if truncated.any():
+                head = text[truncated].str.slice(0, self.max_cell_chars)
+                cut = head.str.rsplit(" ", n=1).str[0]
+                text[truncated] = cut.where(cut != "", head).str.rstrip(" ,.;:") + "…"
+                lower = text.str.lower()
+        link = text.str.match(_LINK).to_numpy()
+        long_number = text.str.match(_LONG_NUMBER).to_numpy()
+        length = text.str.len().to_numpy()
+        cjk = text.str.count(CJK_CHARACTERS).to_numpy()
+
+        row = np.repeat(np.arange(rows), width)
+        position = np.tile(np.arange(width), rows)
+        present = codes >= 0
+        present[present] = filled[codes[present]]
+        counts["empty"] = int(rows * width - present.sum())
+        row, position, codes = row[present], position[present], codes[present]
+
+        # Duplicates of a known value or of an earlier cell in the same row
+        known_rows = np.zeros(0, dtype=np.int64)
+        known_keys = np.zeros(0, dtype=object)
+        if known_values is not None:
+            known = known_values.fillna("").astype(str).astype(object)
+            spaced = known.str.contains(_ODD_SPACE)
+            if spaced.any():
+                known[spaced] = known[spaced].str.replace(_SPACE, " ", regex=True)
+            known = known.str.strip().str.lower().to_numpy(dtype=object)
+            known_rows = np.flatnonzero(known != "")
+            known_keys = known[known_rows]
+        key_ids, _ = pd.factorize(np.concatenate([lower.to_numpy(dtype=object), known_keys]))
+        keys = pd.DataFrame({
+            "row": np.concatenate([known_rows, row]),
+            "key": np.concatenate([key_ids[len(text):], key_ids[codes]])
+        })
+        unique = ~keys.duplicated().to_numpy()[len(known_rows):]
+        counts["duplicate"] = int((~unique).sum())
+        row, position, codes = row[unique], position[unique], codes[unique]
+
+        name_priority = np.array([_name_priority(column) for column in columns])[position]
+        priority = np.where(link[codes], -1, np.where((name_priority == 1) & long_number[codes], 0, name_priority))
+        ranked = priority >= 0
+        counts["skipped"] = int((~ranked).sum())
+        counts["truncated"] = int(truncated[codes[ranked]].sum())
+        row, position, codes, priority = row[ranked], position[ranked], codes[ranked], priority[ranked]
+
+        # estimate_token_count("<column>: <text>") from the parts' lengths
+        names = [str(column) for column in columns]
+        name_length = np.array([len(name) for name in names])
+        name_cjk = np.array([len(CJK_CHARACTERS.findall(name)) for name in names])
+        part_length = name_length[position] + 2 + length[codes]
+        part_cjk = name_cjk[position] + cjk[codes]
+        tokens = part_cjk + np.maximum(1, (part_length - part_cjk + 3) // 4)
+
+        # Most useful first, then column order; rank = place within the row
+        order = np.lexsort((position, -priority, row))
+        row, position, codes, tokens = row[order], position[order], codes[order], tokens[order]
+        rank = np.arange(len(row)) - np.searchsorted(row, row, side="left")
+
+        # Greedy budget, one rank at a time across all rows
+        separator_tokens = estimate_token_count(self.separator.strip()) if self.separator.strip() else 0
+        depth = int(rank.max()) + 1 if len(rank) else 0
+        costs = np.zeros((rows, depth), dtype=np.int64)
+        occupied = np.zeros((rows, depth), dtype=bool)
+        costs[row, rank] = tokens
+        occupied[row, rank] = True
+        used = np.zeros(rows, dtype=np.int64)
+        kept_any = np.zeros(rows, dtype=bool)
+        kept = np.zeros((rows, depth), dtype=bool)
+        for k in range(depth):
+            cost = costs[:, k] + np.where(kept_any, separator_tokens, 0)
+            fits = occupied[:, k] & (used + cost <= self.token_budget)
+            used += np.where(fits, cost, 0)
+            kept_any |= fits
+            kept[:, k] = fits
+        kept = kept[row, rank]
+        counts["kept"] = int(kept.sum())
+        counts["over_budget"] = int((~kept).sum())
+        counts["tokens"] = int(used.sum())
+
+        row, position, codes = row[kept], position[kept], codes[kept]
+        if len(row):
+            texts = text.to_numpy(dtype=object)
+            parts = [f"{names[p]}: {texts[c]}" for p, c in zip(position.tolist(), codes.tolist())]
+            starts = np.flatnonzero(np.diff(row, prepend=-1)).tolist()
+            for start, end in zip(starts, starts[1:] + [len(parts)]):
+                features[row[start]] = self.separator.join(parts[start:end])
+        self._record(counts)
+        return pd.Series(features, index=frame.index, dtype=object)
+
+    def _record(self, counts: Dict[str, int]) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                self._counts[name] += value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        rows = counts["rows"]
+        return {
+            "token_budget": self.token_budget,
+            "max_cell_chars": self.max_cell_chars,
+            **counts,
+            "avg_tokens": round(counts["tokens"] / rows, 1) if rows else 0.0
+        }
+
+
+_feature_compactor: Optional[FeatureCompactor] = None
+_feature_compactor_lock = threading.Lock()
+
+
+def get_feature_compactor() -> FeatureCompactor:
+    """Return the process-wide feature compactor"""
+    global _feature_compactor
+    with _feature_compactor_lock:
+        if _feature_compactor is None:
+            _feature_compactor = FeatureCompactor()
+        return _feature_compactor
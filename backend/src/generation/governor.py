@@ -0,0 +1,223 @@
+# backend/src/generation/governor.py
+"""
+Adaptive client-side rate governor for Gemini
+
+Every Gemini request first takes a permit from a process-wide governor that
+combines a token bucket (requests per second) with an AIMD concurrency window.
+Successful calls grow both additively; a 429/quota response halves them, so
+the limits settle just under the provider's ceiling. Callers that cannot get a
+permit wait in line instead of failing, for at most the ``permit_timeout``
+they pass (their remaining generation budget).
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+GEMINI_RATE_LIMIT_RPS = float(os.getenv("GEMINI_RATE_LIMIT_RPS", "5"))
+GEMINI_RATE_LIMIT_BURST = float(os.getenv("GEMINI_RATE_LIMIT_BURST", "10"))
+GEMINI_GOVERNOR_MAX_RPS = float(os.getenv("GEMINI_GOVERNOR_MAX_RPS", "50"))
+GEMINI_GOVERNOR_MIN_RPS = float(os.getenv("GEMINI_GOVERNOR_MIN_RPS", "0.2"))
+GEMINI_GOVERNOR_INITIAL_WINDOW = float(os.getenv("GEMINI_GOVERNOR_INITIAL_WINDOW", "8"))
+GEMINI_GOVERNOR_MAX_WINDOW = float(os.getenv("GEMINI_GOVERNOR_MAX_WINDOW", os.getenv("GEMINI_MAX_WORKERS", "16")))
+GEMINI_THROTTLE_MAX_WAIT = float(os.getenv("GEMINI_THROTTLE_MAX_WAIT", "120"))  # seconds a throttled call keeps queueing
+
+_THROTTLE_MARKERS = ("429", "quota", "rate limit", "resource has been exhausted", "resource_exhausted", "too many requests")
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """True for provider responses that mean "slow down" (429 / quota / resource exhausted)"""
+    message = str(error).lower()
+    return any(marker in message for marker in _THROTTLE_MARKERS)
+
+
+class PermitTimeout(Exception):
+    """No permit became free within the caller's ``permit_timeout``"""
+
+
+class RateGovernor:
+    """Token bucket plus additive-increase/multiplicative-decrease concurrency window"""
+
+    def __init__(self, rate: float = GEMINI_RATE_LIMIT_RPS, burst: float = GEMINI_RATE_LIMIT_BURST,
+                 min_rate: float = GEMINI_GOVERNOR_MIN_RPS, max_rate: float = GEMINI_GOVERNOR_MAX_RPS,
+                 window: float = GEMINI_GOVERNOR_INITIAL_WINDOW, max_window: float = GEMINI_GOVERNOR_MAX_WINDOW,
+                 min_window: float = 1.0, rate_increase: float = 0.05, decrease_factor: float = 0.5,
+                 decrease_cooldown: float = 1.0, poll_interval: float = 0.05, clock=time.monotonic):
+        self.enabled = rate > 0
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.min_rate = float(min_rate)
+        self.max_rate = max(float(max_rate), self.rate)
+        self.window = float(window)
+        self.min_window = float(min_window)
+        self.max_window = max(float(max_window), self.window)
+        self.rate_increase = float(rate_increase)
+        self.decrease_factor = float(decrease_factor)
+        self.decrease_cooldown = float(decrease_cooldown)
+        self.poll_interval = float(poll_interval)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._refilled_at = clock()
+        self._last_decrease = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.successes = 0
+        self.throttles = 0
+        self.wait_seconds = 0.0
+        self.last_throttle_rate = None
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def try_acquire(self) -> Tuple[bool, float]:
+        """Take a permit if one is free; otherwise return how long to wait before retrying"""
+        if not self.enabled:
+            with self._lock:
+                self.in_flight += 1
+            return True, 0.0
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if self.in_flight >= max(1, int(self.window)):
+                return False, self.poll_interval
+            if self._tokens < 1:
+                return False, max(self.poll_interval, (1 - self._tokens) / self.rate)
+            self._tokens -= 1
+            self.in_flight += 1
+            return True, 0.0
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """Wait (without blocking the event loop) until a permit is available; ``PermitTimeout`` after ``timeout`` seconds"""
+        granted, delay = self.try_acquire()
+        if granted:
+            return
+        started = self._clock()
+        with self._lock:
+            self.waiting += 1
+        try:
+            while not granted:
+                if timeout is not None:
+                    left = started + timeout - self._clock()
+                    if left <= 0:
+                        raise PermitTimeout(f"No Gemini rate governor permit within {timeout:.1f}s")
+                    delay = min(delay, left)
+                await asyncio.sleep(delay)
+                granted, delay = self.try_acquire()
+        finally:
+            with self._lock:
+                self.waiting -= 1
+                self.wait_seconds += self._clock() - started
+
+    def acquire_blocking(self) -> None:
+        """Blocking ``acquire`` for synchronous callers (the CLI pipeline)"""
+        granted, delay = self.try_acquire()
+        started = self._clock()
+        while not granted:
+            time.sleep(delay)
+            granted, delay = self.try_acquire()
+        with self._lock:
+            self.wait_seconds += self._clock() - started
+
+    def release(self, success: bool = False, throttled: bool = False) -> None:
+        """Return a permit and feed the outcome of the call back into the limits"""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if not self.enabled:
+                return
+            if throttled:
+                self.throttles += 1
+                now = self._clock()
+                # One burst of 429s is a single congestion signal
+                if self._last_decrease is None or now - self._last_decrease >= self.decrease_cooldown:
+                    self._last_decrease = now
+                    self.last_throttle_rate = self.rate
+                    self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                    self.window = max(self.min_window, self.window * self.decrease_factor)
+                    self._tokens = min(self._tokens, 0.0)
+                    logging.warning(f"Gemini throttled: rate -> {self.rate:.2f}/s, window -> {self.window:.1f}")
+            elif success:
+                self.successes += 1
+                self.rate = min(self.max_rate, self.rate + self.rate_increase)
+                self.window = min(self.max_window, self.window + 1.0 / self.window)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "rate_per_second": round(self.rate, 3),
+                "window": round(self.window, 2),
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "successes": self.successes,
+                "throttles": self.throttles,
+                "last_throttle_rate": round(self.last_throttle_rate, 3) if self.last_throttle_rate is not None else None,
+                "total_wait_seconds": round(self.wait_seconds, 3)
+            }
+
+
+async def run_governed(call: Callable[[], Awaitable[Any]], governor: Optional[RateGovernor] = None,
+                       max_wait: Optional[float] = None, permit_timeout: Optional[float] = None) -> Any:
+    """
+    Await ``call()`` under a governor permit.
+
+    Throttled attempts are fed back to the governor and queued again until
+    ``max_wait`` seconds have passed; any other outcome is returned or raised.
+    Waiting longer than ``permit_timeout`` for a permit raises ``PermitTimeout``.
+    """
+    governor = governor or get_rate_governor()
+    deadline = time.monotonic() + (GEMINI_THROTTLE_MAX_WAIT if max_wait is None else max_wait)
+    while True:
+        await governor.acquire(permit_timeout)
+        try:
+            result = await call()
+        except Exception as e:
+            throttled = is_throttle_error(e)
+            governor.release(throttled=throttled)
+            if throttled and time.monotonic() < deadline:
+                continue
+            raise
+        except BaseException:
+            governor.release()
+            raise
+        governor.release(success=True)
+        return result
+
+
+def run_governed_blocking(call: Callable[[], Any], governor: Optional[RateGovernor] = None,
+                          max_wait: Optional[float] = None) -> Any:
+    """Blocking ``run_governed`` for synchronous callers"""
+    governor = governor or get_rate_governor()
+    deadline = time.monotonic() + (GEMINI_THROTTLE_MAX_WAIT if max_wait is None else max_wait)
+    while True:
+        governor.acquire_blocking()
+        try:
+            result = call()
+        except Exception as e:
+            throttled = is_throttle_error(e)
+            governor.release(throttled=throttled)
+            if throttled and time.monotonic() < deadline:
+                continue
+            raise
+        except BaseException:
+            governor.release()
+            raise
+        governor.release(success=True)
+        return result
+
+
+_governor: Optional[RateGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_rate_governor() -> RateGovernor:
+    """Return the process-wide Gemini rate governor"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = RateGovernor()
+        return _governor
@@ -0,0 +1,201 @@
+# backend/src/generation/hedging.py
+"""
+Hedged requests for interactive generations
+
+Gemini latency has a long tail. When a call has not answered by the configured
+percentile of recently observed latency, a second identical attempt is started;
+whichever returns a valid result first wins and the other is cancelled. A hedge
+budget (hedges as a fraction of hedged requests) caps the extra spend.
+"""
+
+import os
+import time
+import asyncio
+import bisect
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+GEMINI_HEDGE_ENABLED = os.getenv("GEMINI_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+GEMINI_HEDGE_BUDGET = float(os.getenv("GEMINI_HEDGE_BUDGET", "0.05"))  # max extra calls per request
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "20"))
+GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", "0.5"))  # seconds
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+
+
+class LatencyTracker:
+    """Sliding sample of recent latencies with percentiles and a cumulative histogram"""
+
+    def __init__(self, max_samples: int = 1000, buckets=LATENCY_BUCKETS):
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._counts[bisect.bisect_left(self.buckets, seconds)] += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Nearest-rank percentile of the recent samples (None without samples)"""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, int(round(p / 100.0 * len(ordered))) - 1))
+        return ordered[rank]
+
+    def histogram(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            counts = list(self._counts)
+        bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        return [{"le": bound, "count": count} for bound, count in zip(bounds, counts)]
+
+    def stats(self) -> Dict[str, Any]:
+        def rounded(value):
+            return round(value, 3) if value is not None else None
+        return {
+            "samples": len(self),
+            "p50": rounded(self.percentile(50)),
+            "p95": rounded(self.percentile(95)),
+            "p99": rounded(self.percentile(99)),
+            "histogram": self.histogram()
+        }
+
+
+class Hedger:
+    """Issue a backup attempt once the first one is slower than the latency percentile"""
+
+    def __init__(self, enabled: bool = GEMINI_HEDGE_ENABLED, percentile: float = GEMINI_HEDGE_PERCENTILE,
+                 budget: float = GEMINI_HEDGE_BUDGET, min_samples: int = GEMINI_HEDGE_MIN_SAMPLES,
+                 min_delay: float = GEMINI_HEDGE_MIN_DELAY, clock=time.monotonic):
+        self.enabled = enabled
+        self.percentile = float(percentile)
+        self.budget = float(budget)
+        self.min_samples = int(min_samples)
+        self.min_delay = float(min_delay)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.attempt_latency = LatencyTracker()  # single attempts; drives the hedge delay
+        self.request_latency = LatencyTracker()  # what callers observed
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while too few samples have been observed"""
+        if len(self.attempt_latency) < self.min_samples:
+            return None
+        return max(self.min_delay, self.attempt_latency.percentile(self.percentile))
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                self.budget_denied += 1
+                return False
+            self.hedges += 1
+            return True
+
+    async def _timed(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        started = self._clock()
+        try:
+            return await attempt()
+        finally:
+            # Cancelled attempts are recorded too (as a lower bound), otherwise
+            # hedging would hide the tail it is measured against
+            self.attempt_latency.observe(self._clock() - started)
+
+    async def run(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await ``attempt()``, hedging it with a second ``attempt()`` when it is slow.
+
+        The first attempt to return wins; an attempt that raises (including a
+        result that failed validation) leaves the other one running. If both
+        fail, the first attempt's error is raised.
+        """
+        if not self.enabled:
+            return await attempt()
+        started = self._clock()
+        with self._lock:
+            self.requests += 1
+        try:
+            return await self._run(attempt)
+        finally:
+            self.request_latency.observe(self._clock() - started)
+
+    async def _run(self, attempt: Callable[[], Awaitable[Any]]) -> Any:
+        primary = asyncio.ensure_future(self._timed(attempt))
+        delay = self.hedge_delay()
+        if delay is None:
+            return await primary
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done or not self._take_hedge():
+            return await primary
+
+        logging.info(f"Hedging Gemini call still pending after {delay:.2f}s")
+        hedge = asyncio.ensure_future(self._timed(attempt))
+        pending = {primary, hedge}
+        first_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (primary, hedge):
+                    if task not in done:
+                        continue
+                    if task.exception() is None:
+                        if task is hedge:
+                            with self._lock:
+                                self.hedge_wins += 1
+                        return task.result()
+                    if task is primary or first_error is None:
+                        first_error = task.exception()
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests, hedges, hedge_wins, budget_denied = self.requests, self.hedges, self.hedge_wins, self.budget_denied
+        delay = self.hedge_delay()
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "budget": self.budget,
+            "hedge_delay_seconds": round(delay, 3) if delay is not None else None,
+            "requests": requests,
+            "hedges": hedges,
+            "hedge_rate": round(hedges / requests, 4) if requests else 0.0,
+            "hedge_wins": hedge_wins,
+            "hedge_win_rate": round(hedge_wins / hedges, 4) if hedges else 0.0,
+            "budget_denied": budget_denied,
+            "attempt_latency": self.attempt_latency.stats(),
+            "request_latency": self.request_latency.stats()
+        }
+
+
+_hedger: Optional[Hedger] = None
+_hedger_lock = threading.Lock()
+
+
+def get_hedger() -> Hedger:
+    """Return the process-wide hedger for interactive generations"""
+    global _hedger
+    with _hedger_lock:
+        if _hedger is None:
+            _hedger = Hedger()
+        return _hedger
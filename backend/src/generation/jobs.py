@@ -0,0 +1,217 @@
+# backend/src/generation/jobs.py
+"""
+Durable background batch jobs
+
+A submitted batch is stored as one ``batch_jobs`` row plus one
+``batch_job_items`` row per product. Workers lease items from the database,
+generate them and persist each outcome, so progress survives a restart:
+items leased by a worker that died are picked up again once the lease expires.
+"""
+
+import os
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.db.session import get_db_session
+from app.models.batch_job import BatchItemStatus
+from app.repos import batch_repo
+
+from .batch import BatchStopped
+
+# item dict -> ("item", result) | ("error", error)
+ProcessItem = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def create_batch_job(batch_id, user_id, kind, operation_type, options, payloads, session_factory=None):
+    """Persist a new job and its items (blocking; run in a thread from async code)"""
+    with (session_factory or get_db_session)() as db:
+        batch_repo.create_job(
+            db,
+            batch_id=batch_id,
+            user_id=user_id,
+            kind=kind,
+            operation_type=operation_type,
+            options=options,
+            payloads=payloads,
+        )
+
+
+def get_batch_job_snapshot(batch_id, session_factory=None) -> Optional[Dict[str, Any]]:
+    """Return a job with its per-item state as plain data, or None if it does not exist"""
+    with (session_factory or get_db_session)() as db:
+        job = batch_repo.get_job(db, batch_id)
+        if job is None:
+            return None
+        items = batch_repo.get_items(db, batch_id)
+        return {
+            "batch_id": job.id,
+            "user_id": job.user_id,
+            "kind": job.kind,
+            "status": job.status.value,
+            "options": job.options or {},
+            "operation_type": job.operation_type,
+            "total_items": job.total_items,
+            "credits_charged": job.credits_charged,
+            "items": [
+                {
+                    "idx": item.idx,
+                    "status": item.status.value,
+                    "payload": item.payload,
+                    "result": item.result,
+                    "error": item.error,
+                    "attempts": item.attempts,
+                }
+                for item in items
+            ],
+        }
+
+
+def mark_batch_job_charged(batch_id, session_factory=None) -> bool:
+    """Record that credits were deducted for a job; False if that already happened"""
+    with (session_factory or get_db_session)() as db:
+        return batch_repo.mark_credits_charged(db, batch_id)
+
+
+def summarize_progress(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-status counts and completion percentage for a job snapshot"""
+    counts = {status.value: 0 for status in BatchItemStatus}
+    for item in snapshot["items"]:
+        counts[item["status"]] += 1
+    total = snapshot["total_items"]
+    done = counts["completed"] + counts["error"] + counts["skipped"]
+    return {
+        "total": total,
+        "done": done,
+        "percent": round(100.0 * done / total, 1) if total else 100.0,
+        **counts,
+    }
+
+
+class BatchJobWorker:
+    """Pool of asyncio workers that drain persisted batch job items"""
+    
+    def __init__(
+        self,
+        process_item: ProcessItem,
+        on_job_finished: Optional[Callable[[str], Awaitable[None]]] = None,
+        session_factory=None,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        lease_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None
+    ):
+        self.process_item = process_item
+        self.on_job_finished = on_job_finished
+        self.session_factory = session_factory or get_db_session
+        self.concurrency = concurrency or int(os.getenv("BATCH_WORKERS", "4"))
+        self.poll_interval = poll_interval or float(os.getenv("BATCH_POLL_INTERVAL", "1.0"))
+        self.lease_seconds = lease_seconds or int(os.getenv("BATCH_LEASE_SECONDS", "300"))
+        self.max_attempts = max_attempts or int(os.getenv("BATCH_MAX_ATTEMPTS", "3"))
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+    
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        self._stopping = False
+        self._tasks = [
+            asyncio.create_task(self._run(worker_no), name=f"batch-worker-{worker_no}")
+            for worker_no in range(self.concurrency)
+        ]
+        logging.info(f"Batch job worker started with {self.concurrency} workers")
+    
+    async def stop(self):
+        """Stop the workers; leased items are re-claimed after their lease expires"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def run_until_idle(self):
+        """Process items until none are left to claim (used by tests and scripts)"""
+        while await self._run_once():
+            pass
+    
+    async def _run(self, worker_no):
+        backoff = self.poll_interval
+        while not self._stopping:
+            try:
+                worked = await self._run_once()
+                backoff = self.poll_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Typically the database is unavailable - back off instead of spinning
+                logging.warning(f"Batch worker {worker_no} error: {str(e)}")
+                worked = False
+                backoff = min(backoff * 2, 30.0)
+            if not worked:
+                await asyncio.sleep(backoff)
+    
+    async def _run_once(self) -> bool:
+        claimed, abandoned, finished = await asyncio.to_thread(self._claim)
+        # Giving up on an item may have closed its job
+        for batch_id in finished:
+            await self._job_finished(batch_id)
+        if not claimed:
+            return bool(abandoned)
+        for item in claimed:
+            await self._process(item)
+        return True
+    
+    def _claim(self) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
+        """Lease items; also returns the batches of items given up on and those of them now finished"""
+        with self.session_factory() as db:
+            items, abandoned = batch_repo.claim_items(
+                db, limit=1, lease_seconds=self.lease_seconds, max_attempts=self.max_attempts
+            )
+            finished = [batch_id for batch_id in abandoned if batch_repo.finish_job_if_done(db, batch_id)]
+            claimed = []
+            for item in items:
+                job = batch_repo.get_job(db, item.batch_id)
+                claimed.append({
+                    "item_id": item.id,
+                    "batch_id": item.batch_id,
+                    "idx": item.idx,
+                    "attempt": item.attempts,
+                    "payload": item.payload,
+                    "kind": job.kind,
+                    "options": job.options or {},
+                    "user_id": job.user_id,
+                })
+            return claimed, abandoned, finished
+    
+    async def _process(self, item: Dict[str, Any]):
+        stop_batch = False
+        try:
+            outcome = await self.process_item(item)
+        except BatchStopped as stop:
+            outcome = stop.outcome
+            stop_batch = True
+        except Exception as e:
+            outcome = ("error", {"row": item["idx"], "id": item["payload"].get("id", ""), "error": str(e)})
+        
+        finished = await asyncio.to_thread(self._record, item, outcome, stop_batch)
+        if finished:
+            await self._job_finished(item["batch_id"])
+    
+    async def _job_finished(self, batch_id: str):
+        if self.on_job_finished is None:
+            return
+        try:
+            await self.on_job_finished(batch_id)
+        except Exception as e:
+            logging.error(f"Batch job {batch_id} finish hook failed: {str(e)}")
+    
+    def _record(self, item, outcome, stop_batch) -> bool:
+        with self.session_factory() as db:
+            kind, payload = outcome if outcome else ("error", {"error": "No outcome"})
+            if kind == "item":
+                batch_repo.complete_item(db, item["item_id"], payload)
+            else:
+                batch_repo.fail_item(db, item["item_id"], payload.get("error", ""), payload)
+            if stop_batch:
+                skipped = batch_repo.skip_pending_items(db, item["batch_id"], "Batch stopped: API quota exceeded")
+                logging.warning(f"Batch job {item['batch_id']} stopped, {skipped} items skipped")
+            return batch_repo.finish_job_if_done(db, item["batch_id"])
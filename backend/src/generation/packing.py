@@ -0,0 +1,132 @@
+# backend/src/generation/packing.py
+"""
+Multi-product prompt packing
+
+Sends up to ``GENERATION_PACK_SIZE`` products in one Gemini request with the
+instructions stated once, then splits the JSON array answer back into
+per-product records. Products the model skipped or answered invalidly are
+simply absent from the result; callers regenerate those one at a time.
+"""
+
+import os
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.ai_pipeline import build_packed_gemini_prompt, call_gemini_generate
+from utils.helpers import extract_packed_products
+
+from .async_client import call_gemini_generate_async
+
+GENERATION_PACK_SIZE = int(os.getenv("GENERATION_PACK_SIZE", "1"))  # 1 disables packing
+PACKED_TOKENS_PER_PRODUCT = int(os.getenv("GENERATION_PACKED_TOKENS_PER_PRODUCT", "700"))
+PACKED_MAX_OUTPUT_TOKENS = 8192
+
+
+def pack_group_key(row: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Rows can share a packed prompt only when these prompt settings match"""
+    return (
+        str(row.get("style_variation", "amazon")).lower(),
+        str(row.get("languageCode", "en")),
+        str(row.get("tone", "professional")).lower()
+    )
+
+
+def iter_packs(rows: Iterable[Tuple[Any, Dict[str, Any]]], pack_size: Optional[int] = None) -> Iterable[List[Tuple[Any, Dict[str, Any]]]]:
+    """
+    Group ``(key, row)`` pairs into packs of at most ``pack_size`` compatible rows.
+
+    Rows keep their relative order within a group; a pack is emitted as soon
+    as it is full, and partial packs are flushed at the end.
+    """
+    size = max(1, pack_size or GENERATION_PACK_SIZE)
+    open_packs: Dict[Tuple[str, str, str], List] = {}
+    for key, row in rows:
+        group = pack_group_key(row)
+        pack = open_packs.setdefault(group, [])
+        pack.append((key, row))
+        if len(pack) >= size:
+            yield open_packs.pop(group)
+    for pack in open_packs.values():
+        yield pack
+
+
+async def aiter_packs(rows: AsyncIterable[Tuple[Any, Dict[str, Any]]], pack_size: Optional[int] = None) -> AsyncIterator[List[Tuple[Any, Dict[str, Any]]]]:
+    """``iter_packs`` for rows that arrive asynchronously (e.g. parsed from an upload)"""
+    size = max(1, pack_size or GENERATION_PACK_SIZE)
+    open_packs: Dict[Tuple[str, str, str], List] = {}
+    async for key, row in rows:
+        group = pack_group_key(row)
+        pack = open_packs.setdefault(group, [])
+        pack.append((key, row))
+        if len(pack) >= size:
+            yield open_packs.pop(group)
+    for pack in open_packs.values():
+        yield pack
+
+
+def packed_request(rows: Sequence[Dict[str, Any]]) -> Tuple[str, List[str], int]:
+    """Return ``(prompt, slot_ids, max_output_tokens)`` for a pack of rows"""
+    slot_ids = [f"P{n}" for n in range(1, len(rows) + 1)]
+    prompt = build_packed_gemini_prompt(list(rows), slot_ids)
+    max_output_tokens = min(PACKED_MAX_OUTPUT_TOKENS, PACKED_TOKENS_PER_PRODUCT * len(rows))
+    return prompt, slot_ids, max_output_tokens
+
+
+def split_packed_response(ai_text: str, slot_ids: Sequence[str], tokens_used: int, response_time: float) -> Dict[int, Tuple[Dict[str, Any], int, float]]:
+    """
+    Map a packed answer back to ``{position: (validated, tokens, response_time)}``.
+
+    Tokens are split evenly across the products that came back; positions
+    missing from the answer are left out.
+    """
+    try:
+        products = extract_packed_products(ai_text)
+    except ValueError as e:
+        logging.warning(f"Packed response could not be parsed: {e}")
+        return {}
+
+    found = {pos: products[slot_id] for pos, slot_id in enumerate(slot_ids) if slot_id in products}
+    if len(found) < len(slot_ids):
+        logging.info(f"Packed response covered {len(found)}/{len(slot_ids)} products; the rest fall back to single calls")
+    share = tokens_used // len(found) if found else 0
+    return {pos: (validated, share, response_time) for pos, validated in found.items()}
+
+
+async def generate_packed_async(model, rows, temperature=0.2, logger=None, cost_tracker=None, sanitize=None):
+    """Generate a pack of rows in one call; returns the mapping from ``split_packed_response``"""
+    prompt, slot_ids, max_output_tokens = packed_request(rows)
+    try:
+        ai_text, tokens_used, response_time = await call_gemini_generate_async(
+            model=model,
+            prompt=prompt,
+            temperature=temperature,
+            logger=logger,
+            cost_tracker=cost_tracker,
+            max_output_tokens=max_output_tokens
+        )
+    except Exception as e:
+        logging.warning(f"Packed generation of {len(rows)} products failed, falling back to single calls: {e}")
+        return {}
+    if sanitize is not None:
+        ai_text = sanitize(ai_text)
+    return split_packed_response(ai_text, slot_ids, tokens_used, response_time)
+
+
+def generate_packed(model, rows, temperature=0.2, logger=None, cost_tracker=None, sanitize=None):
+    """Blocking variant of ``generate_packed_async`` for the CLI pipeline"""
+    prompt, slot_ids, max_output_tokens = packed_request(rows)
+    try:
+        ai_text, tokens_used, response_time = call_gemini_generate(
+            model=model,
+            prompt=prompt,
+            temperature=temperature,
+            logger=logger,
+            cost_tracker=cost_tracker,
+            max_output_tokens=max_output_tokens
+        )
+    except Exception as e:
+        logging.warning(f"Packed generation of {len(rows)} products failed, falling back to single calls: {e}")
+        return {}
+    if sanitize is not None:
+        ai_text = sanitize(ai_text)
+    return split_packed_response(ai_text, slot_ids, tokens_used, response_time)
@@ -0,0 +1,184 @@
+# backend/src/generation/repair.py
+"""
+Targeted repair of nearly valid generations
+
+When a response only misses part of the contract (fewer than 3 usable
+bullets, or a description without the primary keyword or below the SEO
+length), a short follow-up prompt asks for just the missing piece with a
+small ``max_output_tokens`` and the answer is merged into the existing
+result. This costs a fraction of a full regeneration.
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.ai_pipeline import LANGUAGE_NAMES
+from src.seo_check import seo_evaluate
+from utils.helpers import validate_product_json
+
+GENERATION_REPAIR_ENABLED = os.getenv("GENERATION_REPAIR_ENABLED", "true").lower() in ("1", "true", "yes")
+REPAIR_BULLETS_MAX_TOKENS = int(os.getenv("GENERATION_REPAIR_BULLETS_MAX_TOKENS", "256"))
+REPAIR_DESCRIPTION_MAX_TOKENS = int(os.getenv("GENERATION_REPAIR_DESCRIPTION_MAX_TOKENS", "512"))
+
+REQUIRED_BULLETS = 3
+MIN_BULLET_CHARS = 10
+SEO_MIN_WORDS = 60
+SEO_MAX_WORDS = 140
+
+# ``call(prompt, max_output_tokens)`` -> ``(text, tokens_used, response_time)``
+RepairCall = Callable[[str, int], Awaitable[Tuple[str, int, float]]]
+
+
+def usable_bullets(bullets: List[str]) -> List[str]:
+    """The bullets ``validate_product_json`` would keep: the first 3, if at least 10 characters long"""
+    return [bullet for bullet in bullets[:REQUIRED_BULLETS] if len(bullet) >= MIN_BULLET_CHARS]
+
+
+def _language(row: Dict[str, Any]) -> str:
+    return LANGUAGE_NAMES.get(row.get("languageCode", "en"), "English")
+
+
+def bullets_repair_prompt(product: Dict[str, Any], row: Dict[str, Any], count: int) -> str:
+    existing = "\n".join(f"- {bullet}" for bullet in usable_bullets(product.get("bullets", []))) or "- (none)"
+    return f"""Write {count} product bullet point(s) in {_language(row)} for this product.
+
+Product: {product.get('title') or row.get('title', '')}
+Key features: {row.get('features', '')}
+Description: {product.get('description', '')[:600]}
+Existing bullets (do not repeat them):
+{existing}
+
+Each bullet is one concrete feature or benefit of at least {MIN_BULLET_CHARS} characters, without numbering or markdown.
+Return only a JSON array of {count} strings."""
+
+
+def description_repair_prompt(product: Dict[str, Any], row: Dict[str, Any], seo: Dict[str, Any]) -> str:
+    keyword = (row.get("primary_keyword") or "").strip()
+    fixes = []
+    if keyword and seo["keyword_count"] < 1:
+        fixes.append(f'use the exact phrase "{keyword}" naturally at least once')
+    if seo["length_words"] < SEO_MIN_WORDS:
+        fixes.append(f"expand it to {SEO_MIN_WORDS}-{SEO_MAX_WORDS} words using only these features: {row.get('features', '')}")
+    return f"""Rewrite this product description in {_language(row)}. Keep its facts, tone and style, and {' and '.join(fixes)}.
+
+Product: {product.get('title') or row.get('title', '')}
+Description:
+{product.get('description', '')}
+
+Return only the rewritten description as plain text, no JSON or markdown."""
+
+
+def parse_bullets(text: str) -> List[str]:
+    """Bullets from a repair answer: a JSON array, or one bullet per line"""
+    first = text.find("[")
+    last = text.rfind("]")
+    if first != -1 and last > first:
+        try:
+            items = json.loads(text[first:last + 1])
+            if isinstance(items, list):
+                return [str(item).strip() for item in items if str(item).strip()]
+        except json.JSONDecodeError:
+            pass
+    lines = [re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip().strip('",') for line in text.splitlines()]
+    return [line for line in lines if line and not line.startswith(("```", "[", "]"))]
+
+
+def parse_description(text: str) -> str:
+    text = re.sub(r"^```\w*\s*|\s*```$", "", text.strip())
+    return text.strip().strip('"').strip()
+
+
+class Repairer:
+    """Sends targeted repair prompts and keeps per-kind counters"""
+
+    def __init__(self, enabled: bool = GENERATION_REPAIR_ENABLED, bullets_max_tokens: int = REPAIR_BULLETS_MAX_TOKENS,
+                 description_max_tokens: int = REPAIR_DESCRIPTION_MAX_TOKENS):
+        self.enabled = enabled
+        self.bullets_max_tokens = bullets_max_tokens
+        self.description_max_tokens = description_max_tokens
+        self._lock = threading.Lock()
+        self._stats = {kind: {"attempts": 0, "repaired": 0, "failed": 0, "tokens": 0} for kind in ("bullets", "description")}
+
+    def _record(self, kind: str, repaired: bool, tokens: int) -> None:
+        with self._lock:
+            stats = self._stats[kind]
+            stats["attempts"] += 1
+            stats["repaired" if repaired else "failed"] += 1
+            stats["tokens"] += tokens
+
+    async def repair_bullets(self, product: Dict[str, Any], row: Dict[str, Any],
+                             call: RepairCall) -> Tuple[Optional[Dict[str, Any]], int, float]:
+        """
+        Ask only for the bullets ``product`` is missing.
+
+        Returns ``(validated, tokens_used, response_time)``; ``validated`` is
+        None when repair is disabled or the answer still fails validation.
+        """
+        if not self.enabled:
+            return None, 0, 0.0
+        kept = usable_bullets(product.get("bullets", []))
+        missing = REQUIRED_BULLETS - len(kept)
+        try:
+            text, tokens_used, response_time = await call(bullets_repair_prompt(product, row, missing), self.bullets_max_tokens)
+        except Exception as e:
+            logging.warning(f"Bullet repair call failed for product {row.get('id', 'Unknown')}: {e}")
+            self._record("bullets", False, 0)
+            return None, 0, 0.0
+        try:
+            new_bullets = [bullet for bullet in parse_bullets(text) if bullet not in kept]
+            validated = validate_product_json({**product, "bullets": kept + usable_bullets(new_bullets)[:missing]})
+        except ValueError as e:
+            logging.warning(f"Bullet repair for product {row.get('id', 'Unknown')} still invalid: {e}")
+            self._record("bullets", False, tokens_used)
+            return None, tokens_used, response_time
+        logging.info(f"Repaired {missing} bullet(s) for product {row.get('id', 'Unknown')} ({tokens_used} tokens)")
+        self._record("bullets", True, tokens_used)
+        return validated, tokens_used, response_time
+
+    async def repair_description(self, product: Dict[str, Any], row: Dict[str, Any], seo: Dict[str, Any],
+                                 call: RepairCall) -> Tuple[Optional[Dict[str, Any]], int, float]:
+        """
+        Rewrite only the description of ``product`` so it passes the SEO check.
+
+        Same return value as ``repair_bullets``; the other fields are kept as they are.
+        """
+        if not self.enabled:
+            return None, 0, 0.0
+        try:
+            text, tokens_used, response_time = await call(description_repair_prompt(product, row, seo), self.description_max_tokens)
+        except Exception as e:
+            logging.warning(f"Description repair call failed for product {row.get('id', 'Unknown')}: {e}")
+            self._record("description", False, 0)
+            return None, 0, 0.0
+        description = parse_description(text)
+        if not seo_evaluate(description, row.get("primary_keyword", ""))["passes"]:
+            logging.warning(f"Description repair for product {row.get('id', 'Unknown')} still fails the SEO check")
+            self._record("description", False, tokens_used)
+            return None, tokens_used, response_time
+        logging.info(f"Repaired description for product {row.get('id', 'Unknown')} ({tokens_used} tokens)")
+        self._record("description", True, tokens_used)
+        return {**product, "description": description}, tokens_used, response_time
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = {kind: dict(stats) for kind, stats in self._stats.items()}
+        for stats in kinds.values():
+            stats["success_rate"] = round(stats["repaired"] / stats["attempts"], 4) if stats["attempts"] else 0.0
+        return {"enabled": self.enabled, **kinds}
+
+
+_repairer: Optional[Repairer] = None
+_repairer_lock = threading.Lock()
+
+
+def get_repairer() -> Repairer:
+    """Return the process-wide repairer"""
+    global _repairer
+    with _repairer_lock:
+        if _repairer is None:
+            _repairer = Repairer()
+        return _repairer
@@ -0,0 +1,217 @@
+# backend/src/generation/retry_policy.py
+"""
+Error-class-aware retries under a per-request deadline
+
+Errors are classified before anything is retried: only transient backend
+failures (5xx, timeouts, dropped connections) get another attempt, waiting for
+the server's retry-after hint when one is given. Cost-limit, safety and
+invalid-request errors fail immediately; throttling is left to the rate
+governor and an open circuit to the breaker.
+
+A generation deadline is kept in a context variable, so one budget covers every
+retry, fallback prompt, cascade tier and hedge made for a request or product.
+"""
+
+import os
+import re
+import time
+import random
+import asyncio
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+from src.llm.cassette import CassetteMiss
+
+from .circuit_breaker import CircuitOpenError
+
+GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "3"))
+GEMINI_RETRY_MIN_WAIT = float(os.getenv("GEMINI_RETRY_MIN_WAIT", "1"))
+GEMINI_RETRY_MAX_WAIT = float(os.getenv("GEMINI_RETRY_MAX_WAIT", "10"))
+GEMINI_MAX_RETRY_AFTER = float(os.getenv("GEMINI_MAX_RETRY_AFTER", "30"))  # cap on server-provided hints
+GEMINI_REQUEST_TIMEOUT = float(os.getenv("GEMINI_REQUEST_TIMEOUT", "60"))  # seconds per attempt
+GENERATION_DEADLINE_SECONDS = float(os.getenv("GENERATION_DEADLINE_SECONDS", "90"))  # per request / product
+
+TRANSIENT = "transient"
+THROTTLED = "throttled"
+CIRCUIT_OPEN = "circuit_open"
+DEADLINE = "deadline"
+COST_LIMIT = "cost_limit"
+SAFETY = "safety"
+INVALID = "invalid"
+CASSETTE_MISS = "cassette_miss"
+UNKNOWN = "unknown"
+
+_TRANSIENT_TYPES = ("ServiceUnavailable", "InternalServerError", "GatewayTimeout", "BadGateway", "DeadlineExceeded",
+                    "Aborted", "Unknown", "ConnectionError", "ConnectTimeout", "ReadTimeout", "RemoteDisconnected")
+_INVALID_TYPES = ("InvalidArgument", "BadRequest", "PermissionDenied", "Unauthenticated", "Unauthorized",
+                  "Forbidden", "NotFound", "FailedPrecondition", "MethodNotImplemented")
+_TRANSIENT_CODES = (408, 500, 502, 503, 504)
+_TRANSIENT_MARKERS = ("500", "502", "503", "504", "unavailable", "internal error", "overloaded", "timeout",
+                      "timed out", "deadline exceeded", "connection", "reset by peer", "temporarily",
+                      "empty response")
+_SAFETY_MARKERS = ("safety", "blocked", "finish_reason", "recitation")
+_INVALID_MARKERS = ("invalid", "malformed", "400", "401", "403", "404", "api key", "permission", "not found")
+_THROTTLE_MARKERS = ("429", "quota", "rate limit", "resource has been exhausted", "resource_exhausted", "too many requests")
+_RETRY_AFTER_PATTERN = re.compile(r"retry (?:in|after)\D{0,3}(\d+(?:\.\d+)?)\s*(ms|s|sec|seconds)?", re.I)
+
+_deadline = contextvars.ContextVar("generation_deadline", default=None)
+
+
+class GenerationDeadlineExceeded(Exception):
+    """The request's generation budget ran out (before or during a call)"""
+
+    def __init__(self, message: str = "Generation deadline exceeded"):
+        super().__init__(message)
+
+
+class RetriesExhausted(Exception):
+    """Every allowed attempt failed with a transient error; ``last_error`` is the final one"""
+
+    def __init__(self, last_error: BaseException, attempts: int):
+        super().__init__(f"{attempts} attempts failed, last error: {last_error}")
+        self.last_error = last_error
+        self.attempts = attempts
+
+
+def classify_error(error: BaseException) -> str:
+    """Sort an error into one of the retry classes (``TRANSIENT`` is the only one retried)"""
+    if isinstance(error, CircuitOpenError):
+        return CIRCUIT_OPEN
+    if isinstance(error, CassetteMiss):
+        return CASSETTE_MISS
+    if isinstance(error, GenerationDeadlineExceeded):
+        return DEADLINE
+    message = str(error).lower()
+    if "cost limit" in message:
+        return COST_LIMIT
+    name = type(error).__name__
+    if name in ("ResourceExhausted", "TooManyRequests") or any(marker in message for marker in _THROTTLE_MARKERS):
+        return THROTTLED
+    if any(marker in message for marker in _SAFETY_MARKERS):
+        return SAFETY
+    if name in _INVALID_TYPES:
+        return INVALID
+    code = getattr(error, "code", None)
+    if name in _TRANSIENT_TYPES or isinstance(error, (ConnectionError, TimeoutError)) or code in _TRANSIENT_CODES:
+        return TRANSIENT
+    if any(marker in message for marker in _INVALID_MARKERS):
+        return INVALID
+    if any(marker in message for marker in _TRANSIENT_MARKERS):
+        return TRANSIENT
+    return UNKNOWN
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Server-provided delay before retrying (RetryInfo, Retry-After header or message hint), if any"""
+    explicit = getattr(error, "retry_after", None)
+    if isinstance(explicit, (int, float)):
+        return float(explicit)
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return getattr(delay, "seconds", 0) + getattr(delay, "nanos", 0) / 1e9
+    response = getattr(error, "response", None)
+    header = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except (TypeError, ValueError):
+            pass
+    match = _RETRY_AFTER_PATTERN.search(str(error))
+    if match:
+        value = float(match.group(1))
+        return value / 1000.0 if (match.group(2) or "").lower() == "ms" else value
+    return None
+
+
+def backoff_seconds(attempt: int, error: BaseException) -> float:
+    """Delay before attempt ``attempt + 1``: exponential with jitter, or the server's hint when larger"""
+    delay = min(GEMINI_RETRY_MAX_WAIT, GEMINI_RETRY_MIN_WAIT * (2 ** (attempt - 1)))
+    delay = random.uniform(delay / 2, delay)
+    hint = retry_after_seconds(error)
+    if hint is not None:
+        delay = max(delay, min(hint, GEMINI_MAX_RETRY_AFTER))
+    return delay
+
+
+@contextmanager
+def generation_deadline(seconds: Optional[float] = None):
+    """
+    Bound everything generated inside the block to ``seconds`` from now.
+
+    Nested blocks never extend an outer deadline. Tasks started inside the
+    block inherit it; executor threads get it through ``contextvars``.
+    """
+    seconds = GENERATION_DEADLINE_SECONDS if seconds is None else seconds
+    deadline = time.monotonic() + seconds if seconds and seconds > 0 else None
+    outer = _deadline.get()
+    if outer is not None and (deadline is None or outer < deadline):
+        deadline = outer
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the current deadline (None when there is none)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise GenerationDeadlineExceeded()
+
+
+def attempt_timeout() -> float:
+    """Timeout for the next call: the per-attempt timeout, shortened to the remaining budget"""
+    check_deadline()
+    remaining = remaining_time()
+    return GEMINI_REQUEST_TIMEOUT if remaining is None else min(GEMINI_REQUEST_TIMEOUT, remaining)
+
+
+def _next_delay(attempt: int, error: BaseException, max_attempts: int) -> Optional[float]:
+    """Delay before retrying ``error``, or None when it must be raised instead"""
+    if classify_error(error) != TRANSIENT:
+        return None
+    if attempt >= max_attempts:
+        raise RetriesExhausted(error, attempt) from error
+    delay = backoff_seconds(attempt, error)
+    remaining = remaining_time()
+    if remaining is not None and delay >= remaining:
+        logging.warning(f"Not retrying after {attempt} attempt(s): backoff {delay:.1f}s exceeds the remaining budget")
+        raise GenerationDeadlineExceeded(f"Generation deadline exceeded after {attempt} attempt(s): {error}") from error
+    return delay
+
+
+async def retry_async(attempt: Callable[[], Awaitable[Any]], max_attempts: int = GEMINI_MAX_ATTEMPTS) -> Any:
+    """Await ``attempt()``, retrying transient errors with backoff inside the current deadline"""
+    for number in range(1, max_attempts + 1):
+        check_deadline()
+        try:
+            return await attempt()
+        except Exception as e:
+            delay = _next_delay(number, e, max_attempts)
+            if delay is None:
+                raise
+            logging.warning(f"Transient Gemini error (attempt {number}/{max_attempts}), retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+
+
+def retry_blocking(attempt: Callable[[], Any], max_attempts: int = GEMINI_MAX_ATTEMPTS, sleep=time.sleep) -> Any:
+    """Blocking ``retry_async`` for synchronous callers (the CLI pipeline)"""
+    for number in range(1, max_attempts + 1):
+        check_deadline()
+        try:
+            return attempt()
+        except Exception as e:
+            delay = _next_delay(number, e, max_attempts)
+            if delay is None:
+                raise
+            logging.warning(f"Transient Gemini error (attempt {number}/{max_attempts}), retrying in {delay:.1f}s: {e}")
+            sleep(delay)
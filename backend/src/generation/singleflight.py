@@ -0,0 +1,83 @@
+# backend/src/generation/singleflight.py
+"""
+Single-flight coalescing of identical in-flight generations
+
+Concurrent callers that ask for the same key (a double-click, a frontend retry
+racing the original request) wait on one shared call instead of each paying
+for a Gemini request. The shared call runs as its own task, so a caller that
+disconnects does not cancel it for the others.
+"""
+
+import asyncio
+import copy
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls per key on the running event loop"""
+
+    def __init__(self):
+        # Tasks are bound to a loop, so in-flight calls are tracked per loop
+        self._calls = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.coalesced = 0
+
+    def _loop_calls(self) -> Dict[str, asyncio.Task]:
+        loop = asyncio.get_running_loop()
+        calls = self._calls.get(loop)
+        if calls is None:
+            calls = {}
+            self._calls[loop] = calls
+        return calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run ``fn()`` once for all concurrent callers of ``key``.
+
+        Returns ``(result, shared)``; ``shared`` is True for callers that joined
+        a call started by someone else, who receive a deep copy of the result.
+        Exceptions are raised to every caller.
+        """
+        calls = self._loop_calls()
+        task = calls.get(key)
+        if task is not None:
+            with self._lock:
+                self.coalesced += 1
+            result = await asyncio.shield(task)
+            return copy.deepcopy(result), True
+
+        task = asyncio.ensure_future(fn())
+        calls[key] = task
+        with self._lock:
+            self.executed += 1
+
+        def _forget(finished, calls=calls):
+            if calls.get(key) is finished:
+                del calls[key]
+            if not finished.cancelled():
+                finished.exception()  # Mark retrieved when every caller has gone away
+        task.add_done_callback(_forget)
+
+        return await asyncio.shield(task), False
+
+    def in_flight(self) -> int:
+        return sum(len(calls) for calls in list(self._calls.values()))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": self.in_flight()
+            }
+
+
+_generation_flight = SingleFlight()
+
+
+def get_generation_singleflight() -> SingleFlight:
+    """Return the process-wide single-flight group for Gemini generations"""
+    return _generation_flight
@@ -0,0 +1,219 @@
+# backend/src/generation/streaming.py
+"""
+Streaming Gemini generation
+
+``GenerationStream`` runs the backend's blocking ``stream()`` iterator in the
+generation executor and hands chunks to the event loop as they arrive, so an
+interactive client sees output after the time to first token instead of the
+full generation time. ``partial_json_fields`` reads the string fields of a
+JSON answer that is still arriving.
+
+A stream is a single attempt: it passes the circuit breaker and the rate
+governor and is bounded by the generation deadline, but it is not retried.
+Callers fall back to ``call_gemini_generate_async`` when it fails.
+"""
+
+import re
+import time
+import types
+import asyncio
+import threading
+import contextvars
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from src.ai_pipeline import as_backend, gemini_generation_config, gemini_model_name, response_token_usage
+from src.llm.base import StreamUsage
+
+from .async_client import get_generation_executor
+from .circuit_breaker import get_circuit_breaker
+from .governor import get_rate_governor, is_throttle_error
+from .hedging import LatencyTracker
+from .retry_policy import attempt_timeout
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+_DONE = object()
+
+
+def _read_json_string(text: str, start: int) -> Tuple[str, bool]:
+    """Decode the JSON string starting at ``start``; returns ``(value so far, complete)``"""
+    chars = []
+    i = start
+    while i < len(text):
+        char = text[i]
+        if char == '"':
+            return "".join(chars), True
+        if char == "\\":
+            if i + 1 >= len(text):
+                break
+            escape = text[i + 1]
+            if escape == "u":
+                if i + 6 > len(text):
+                    break
+                try:
+                    chars.append(chr(int(text[i + 2:i + 6], 16)))
+                except ValueError:
+                    pass
+                i += 6
+                continue
+            chars.append(_ESCAPES.get(escape, escape))
+            i += 2
+            continue
+        chars.append(char)
+        i += 1
+    return "".join(chars), False
+
+
+def partial_json_fields(text: str, fields: Iterable[str] = ("title", "description")) -> Dict[str, str]:
+    """String ``fields`` found so far in a (possibly incomplete) JSON answer"""
+    found = {}
+    for field in fields:
+        match = re.search(rf'"{re.escape(field)}"\s*:\s*"', text)
+        if match:
+            found[field] = _read_json_string(text, match.end())[0]
+    return found
+
+
+class StreamStats:
+    """Counts of streamed generations with time-to-first-token and total latency"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.completed = 0
+        self.failed = 0
+        self.first_token_latency = LatencyTracker()
+        self.total_latency = LatencyTracker()
+
+    def record(self, completed: bool) -> None:
+        with self._lock:
+            self.streams += 1
+            if completed:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            streams, completed, failed = self.streams, self.completed, self.failed
+        return {
+            "streams": streams,
+            "completed": completed,
+            "failed": failed,
+            "time_to_first_token": self.first_token_latency.stats(),
+            "total_latency": self.total_latency.stats()
+        }
+
+
+class GenerationStream:
+    """
+    Async iterator over the chunks of one streamed generation.
+
+    After iteration, ``text``, ``tokens_used``, ``response_time`` and
+    ``time_to_first_token`` describe the call. Token counts come from the
+    usage metadata the backend reports at the end of the stream (Gemini sends
+    it with the last chunk) and are estimated when it reports none.
+    """
+
+    def __init__(self, model, prompt, temperature=0.2, cost_tracker=None, max_output_tokens=None, structured=False):
+        self.model = model
+        self.prompt = prompt
+        self.temperature = temperature
+        self.cost_tracker = cost_tracker
+        self.max_output_tokens = max_output_tokens
+        self.structured = structured
+        self.text = ""
+        self.tokens_used = 0
+        self.response_time = 0.0
+        self.time_to_first_token = None
+        self.usage_metadata = None
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stop = threading.Event()
+        backend = as_backend(self.model)
+        config = gemini_generation_config(self.temperature, self.max_output_tokens, self.structured)
+        timeout = attempt_timeout()
+        breaker = get_circuit_breaker()
+        governor = get_rate_governor()
+        stats = get_stream_stats()
+
+        def produce():
+            try:
+                for chunk in backend.stream(self.prompt, config, timeout=timeout):
+                    if stop.is_set():
+                        return  # The consumer went away
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+                loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+
+        breaker.before_call()
+        await governor.acquire()
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        try:
+            loop.run_in_executor(get_generation_executor(), contextvars.copy_context().run, produce)
+            while True:
+                remaining = started + timeout - time.monotonic()
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(0.0, remaining))
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"Gemini stream timed out after {timeout:.0f}s")
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if isinstance(item, StreamUsage):
+                    self.usage_metadata = item.usage_metadata
+                    continue
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.monotonic() - started
+                    stats.first_token_latency.observe(self.time_to_first_token)
+                self.text += item
+                yield item
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            stop.set()
+            if error is not None:
+                governor.release(throttled=is_throttle_error(error))
+                breaker.record(error)
+                stats.record(False)
+            elif self.text:
+                governor.release(success=True)
+                breaker.record_success()
+            else:
+                # Closed before any output (client disconnected): no signal either way
+                governor.release()
+                breaker.record_ignored()
+        self.response_time = time.monotonic() - started
+        stats.total_latency.observe(self.response_time)
+        stats.record(True)
+        self._account()
+
+    def _account(self) -> None:
+        if not self.text:
+            raise Exception("Empty response from Gemini")
+        input_tokens, output_tokens = response_token_usage(
+            types.SimpleNamespace(text=self.text, usage_metadata=self.usage_metadata), self.prompt
+        )
+        self.tokens_used = input_tokens + output_tokens
+        if self.cost_tracker:
+            self.cost_tracker.add_usage(input_tokens=input_tokens, output_tokens=output_tokens, model=gemini_model_name(self.model))
+            if self.cost_tracker.check_daily_limit():
+                raise Exception(f"Daily cost limit exceeded: ${self.cost_tracker.get_current_cost():.4f}")
+
+
+_stream_stats: Optional[StreamStats] = None
+_stream_stats_lock = threading.Lock()
+
+
+def get_stream_stats() -> StreamStats:
+    """Return the process-wide streaming counters"""
+    global _stream_stats
+    with _stream_stats_lock:
+        if _stream_stats is None:
+            _stream_stats = StreamStats()
+        return _stream_stats
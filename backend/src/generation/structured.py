@@ -0,0 +1,86 @@
+# backend/src/generation/structured.py
+"""
+Structured-output parsing
+
+With ``GEMINI_STRUCTURED_OUTPUT`` enabled, single-product calls ask Gemini for
+``application/json`` matching ``ai_pipeline.PRODUCT_RESPONSE_SCHEMA``, so the
+answer is loaded with one ``json.loads`` and validated directly. The legacy
+extraction cascade in ``safe_extract_json`` only runs when that fails;
+counters show how often it is still needed.
+"""
+
+import os
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from utils.helpers import safe_extract_json, validate_product_json
+
+GEMINI_STRUCTURED_OUTPUT = os.getenv("GEMINI_STRUCTURED_OUTPUT", "true").lower() in ("1", "true", "yes")
+
+STRUCTURED = "structured"            # answer was the JSON object itself
+LEGACY_FALLBACK = "legacy_fallback"  # structured call, but only the legacy cascade could parse it
+LEGACY = "legacy"                    # unstructured call parsed by the legacy cascade
+FAILED = "failed"                    # no valid product could be extracted
+
+
+class ParseStats:
+    """Thread-safe counts of how responses were parsed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {STRUCTURED: 0, LEGACY_FALLBACK: 0, LEGACY: 0, FAILED: 0}
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        structured_calls = counts[STRUCTURED] + counts[LEGACY_FALLBACK]
+        return {
+            "enabled": GEMINI_STRUCTURED_OUTPUT,
+            **counts,
+            "fallback_rate": round(counts[LEGACY_FALLBACK] / structured_calls, 4) if structured_calls else 0.0
+        }
+
+
+def parse_product_response(text: str, structured: bool = GEMINI_STRUCTURED_OUTPUT) -> Dict[str, Any]:
+    """
+    Parse and validate a single-product answer.
+
+    Structured answers go straight to ``validate_product_json``; anything else
+    goes through ``safe_extract_json``. Raises ``ValueError`` like both of them.
+    """
+    stats = get_parse_stats()
+    outcome = LEGACY
+    if structured:
+        try:
+            data = json.loads(text)
+        except (TypeError, json.JSONDecodeError):
+            data = None
+        if isinstance(data, dict):
+            stats.record(STRUCTURED)
+            return validate_product_json(data)
+        outcome = LEGACY_FALLBACK
+    try:
+        parsed = safe_extract_json(text)
+    except ValueError:
+        stats.record(FAILED)
+        raise
+    stats.record(outcome)
+    return parsed
+
+
+_parse_stats: Optional[ParseStats] = None
+_parse_stats_lock = threading.Lock()
+
+
+def get_parse_stats() -> ParseStats:
+    """Return the process-wide parse counters"""
+    global _parse_stats
+    with _parse_stats_lock:
+        if _parse_stats is None:
+            _parse_stats = ParseStats()
+        return _parse_stats
@@ -0,0 +1,50 @@
+# backend/src/llm/__init__.py
+"""
+LLM backends for the AI Product Descriptions application
+
+``LLM_BACKEND=gemini`` (default) talks to Google Gemini; ``LLM_BACKEND=stub``
+uses a deterministic offline backend for load tests and benchmarks.
+``LLM_CASSETTE_MODE=record|replay`` records calls to, or serves them from, a
+cassette file. ``GEMINI_CONTEXT_CACHE_ENABLED`` sends static prompt
+instructions as cached contexts (``ContextCachingBackend``).
+"""
+
+from .base import CachedContext, LLMBackend, LLMResponse, estimate_token_count
+from .gemini import GeminiBackend
+from .stub import StubBackend
+from .cassette import CassetteBackend, CassetteMiss, DEFAULT_CASSETTE_PATH
+from .context_cache import (
+    ContextCachingBackend, GEMINI_CONTEXT_CACHE_ENABLED, close_context_caches, context_cache_stats
+)
+
+LLM_BACKENDS = ("gemini", "stub")
+
+
+def create_backend(backend_name, model_name, safety_settings=None):
+    """Create the backend called ``backend_name`` serving ``model_name``"""
+    backend_name = (backend_name or "gemini").lower()
+    if backend_name == "gemini":
+        return GeminiBackend(model_name, safety_settings=safety_settings)
+    if backend_name == "stub":
+        # Separate namespace so stub output never shares cache keys with real generations
+        return StubBackend.from_env(f"stub/{model_name}")
+    raise ValueError(f"Unknown LLM_BACKEND '{backend_name}' (expected one of {', '.join(LLM_BACKENDS)})")
+
+
+__all__ = [
+    "CachedContext",
+    "LLMBackend",
+    "LLMResponse",
+    "GeminiBackend",
+    "StubBackend",
+    "CassetteBackend",
+    "CassetteMiss",
+    "ContextCachingBackend",
+    "GEMINI_CONTEXT_CACHE_ENABLED",
+    "DEFAULT_CASSETTE_PATH",
+    "LLM_BACKENDS",
+    "create_backend",
+    "context_cache_stats",
+    "close_context_caches",
+    "estimate_token_count"
+]
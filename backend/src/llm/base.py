@@ -0,0 +1,104 @@
+# backend/src/llm/base.py
+"""
+Interface every LLM backend implements
+
+Backends take the generation parameters produced by
+``ai_pipeline.gemini_generation_config`` and return an ``LLMResponse`` whose
+``usage_metadata`` mirrors the Gemini shape (``prompt_token_count``,
+``candidates_token_count``, ``total_token_count``), so the rest of the pipeline
+does not care which backend produced it.
+
+Streams yield text chunks; a backend that knows the usage of a stream yields
+it last as a ``StreamUsage``.
+
+Backends that set ``supports_context_cache`` can also hold a static
+instruction server-side (``create_cached_context``) and generate against it,
+so only the rest of the prompt is sent with each call.
+"""
+
+import re
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, Optional, Union
+
+
+CJK_CHARACTERS = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def estimate_token_count(text: str) -> int:
+    """Rough token count: ~4 characters per token, one per CJK character"""
+    if not text:
+        return 0
+    cjk = len(CJK_CHARACTERS.findall(text))
+    return cjk + max(1, (len(text) - cjk + 3) // 4)
+
+
+def usage_metadata(prompt_tokens: int, output_tokens: int, cached_tokens: int = 0) -> SimpleNamespace:
+    """Gemini-style usage metadata for backends that count tokens themselves"""
+    return SimpleNamespace(
+        prompt_token_count=prompt_tokens,
+        candidates_token_count=output_tokens,
+        cached_content_token_count=cached_tokens,
+        total_token_count=prompt_tokens + output_tokens
+    )
+
+
+@dataclass
+class LLMResponse:
+    """Text of one completion and the tokens it used"""
+    text: str
+    usage_metadata: Optional[Any] = None
+    raw: Any = field(default=None, repr=False)
+
+
+@dataclass
+class StreamUsage:
+    """Usage metadata of a finished stream, yielded after its last text chunk"""
+    usage_metadata: Any
+
+
+@dataclass
+class CachedContext:
+    """Server-side cached instruction that calls can generate against"""
+    name: str
+    token_count: int = 0
+    handle: Any = field(default=None, repr=False)
+
+
+class LLMBackend:
+    """Base class for text generation backends"""
+
+    name = "base"
+    model_name = ""
+    supports_context_cache = False
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None, context: Optional[CachedContext] = None) -> LLMResponse:
+        """
+        Generate one completion for ``prompt`` (blocking, giving up after
+        ``timeout`` seconds), after the cached instruction ``context`` if given
+        """
+        raise NotImplementedError
+
+    def stream(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+               timeout: Optional[float] = None, context: Optional[CachedContext] = None) -> Iterator[Union[str, StreamUsage]]:
+        """Yield the completion in chunks as they are produced (blocking iterator), then its ``StreamUsage``"""
+        response = self.generate(prompt, generation_config, timeout, context=context)
+        yield response.text
+        if response.usage_metadata is not None:
+            yield StreamUsage(response.usage_metadata)
+
+    def create_cached_context(self, instruction: str, ttl_seconds: float) -> CachedContext:
+        """Cache ``instruction`` server-side for ``ttl_seconds``"""
+        raise NotImplementedError
+
+    def refresh_cached_context(self, context: CachedContext, ttl_seconds: float) -> None:
+        """Extend ``context`` to expire ``ttl_seconds`` from now"""
+        raise NotImplementedError
+
+    def delete_cached_context(self, context: CachedContext) -> None:
+        raise NotImplementedError
+
+    def count_tokens(self, text: str) -> int:
+        """Number of input tokens ``text`` would use"""
+        return estimate_token_count(text)
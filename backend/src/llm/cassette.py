@@ -0,0 +1,214 @@
+# backend/src/llm/cassette.py
+"""
+Record/replay cassettes for LLM traffic
+
+In record mode every call made through the wrapped backend is appended to a
+JSONL cassette: a hash of (model, prompt, generation config), the raw response
+text or error, token usage and latency. In replay mode the cassette answers
+the same calls offline, optionally sleeping for the recorded latency, which
+gives repeatable benchmarks against real model output.
+
+Prompts are not stored unless ``store_prompts`` is set, which keeps cassettes
+small.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from .base import LLMBackend, LLMResponse, StreamUsage, estimate_token_count, usage_metadata
+
+CASSETTE_MODES = ("record", "replay")
+DEFAULT_CASSETTE_PATH = "src/outputs/cassettes/llm.jsonl"
+
+
+def cassette_key(model_name: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+    """Identify a call independently of the backend (``models/`` and ``stub/`` prefixes are ignored)"""
+    payload = json.dumps({
+        "model": (model_name or "").split("/")[-1],
+        "prompt": prompt,
+        "config": generation_config or {}
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode for a call that is not on the cassette"""
+
+
+class CassetteBackend(LLMBackend):
+    """Records calls of ``inner`` to a cassette, or replays them from it"""
+
+    name = "cassette"
+
+    def __init__(self, path: str, mode: str = "replay", inner: Optional[LLMBackend] = None, model_name: str = "",
+                 latency_scale: float = 1.0, store_prompts: bool = False, chunk_chars: int = 40, sleep=time.sleep):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}' (expected one of {', '.join(CASSETTE_MODES)})")
+        if mode == "record" and inner is None:
+            raise ValueError("Recording a cassette needs a backend to record")
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self._model_name = model_name
+        self.latency_scale = float(latency_scale)
+        self.store_prompts = store_prompts
+        self.chunk_chars = max(1, int(chunk_chars))
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._entries = defaultdict(list)
+        self._cursor = defaultdict(int)
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        if mode == "replay":
+            self._load()
+
+    @classmethod
+    def from_env(cls, mode: str, inner: Optional[LLMBackend] = None, model_name: str = "") -> "CassetteBackend":
+        """Build a cassette configured by the ``LLM_CASSETTE_*`` environment variables"""
+        return cls(
+            path=os.getenv("LLM_CASSETTE_PATH", DEFAULT_CASSETTE_PATH),
+            mode=mode,
+            inner=inner,
+            model_name=model_name,
+            latency_scale=float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1.0")),
+            store_prompts=os.getenv("LLM_CASSETTE_STORE_PROMPTS", "false").lower() in ("1", "true", "yes")
+        )
+
+    @property
+    def model_name(self) -> str:
+        if self.inner is not None:
+            return self.inner.model_name
+        # Replayed output gets its own namespace in the generation cache
+        return f"cassette/{self._model_name}"
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crashed recorder can leave a partial last line
+                    logging.warning(f"Skipping unreadable cassette line {line_number} in {self.path}")
+                    continue
+                self._entries[entry["key"]].append(entry)
+        logging.info(f"Loaded {sum(len(v) for v in self._entries.values())} cassette entries from {self.path}")
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.recorded += 1
+
+    def _record(self, key: str, prompt: str, latency: float, response: Optional[LLMResponse] = None,
+                error: Optional[BaseException] = None) -> None:
+        entry = {"key": key, "model": self.inner.model_name, "latency_ms": round(latency * 1000, 1)}
+        if self.store_prompts:
+            entry["prompt"] = prompt
+        if error is not None:
+            entry["error"] = str(error)
+        else:
+            usage = response.usage_metadata
+            entry["text"] = response.text
+            entry["usage"] = [getattr(usage, "prompt_token_count", None) or 0,
+                              getattr(usage, "candidates_token_count", None) or 0]
+            if getattr(usage, "total_token_count", None):
+                entry["usage"].append(usage.total_token_count)
+        self._append(entry)
+
+    def _next_entry(self, key: str) -> Dict[str, Any]:
+        """Recorded entries for a call are served in order, then cycled"""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.misses += 1
+                raise CassetteMiss(f"No cassette entry for this call in {self.path} - record it first")
+            entry = entries[self._cursor[key] % len(entries)]
+            self._cursor[key] += 1
+            self.replayed += 1
+            return entry
+
+    def _replay(self, prompt: str, generation_config: Optional[Dict[str, Any]], timeout: Optional[float] = None) -> LLMResponse:
+        entry = self._next_entry(cassette_key(self.model_name, prompt, generation_config))
+        latency = entry.get("latency_ms", 0) / 1000.0 * self.latency_scale
+        if timeout is not None and latency > timeout:
+            self._sleep(timeout)
+            raise TimeoutError(f"504 Deadline Exceeded after {timeout:.1f}s (cassette)")
+        if "error" in entry:
+            self._sleep(entry.get("latency_ms", 0) / 1000.0 * self.latency_scale)
+            raise Exception(entry["error"])
+        usage = entry.get("usage") or [estimate_token_count(prompt), estimate_token_count(entry["text"])]
+        metadata = usage_metadata(usage[0], usage[1])
+        if len(usage) > 2:
+            metadata.total_token_count = usage[2]
+        return LLMResponse(text=entry["text"], usage_metadata=metadata, raw=entry)
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None) -> LLMResponse:
+        if self.mode == "replay":
+            response = self._replay(prompt, generation_config, timeout)
+            self._sleep(response.raw.get("latency_ms", 0) / 1000.0 * self.latency_scale)
+            return response
+        key = cassette_key(self.model_name, prompt, generation_config)
+        started = time.monotonic()
+        try:
+            response = self.inner.generate(prompt, generation_config, timeout)
+        except Exception as e:
+            self._record(key, prompt, time.monotonic() - started, error=e)
+            raise
+        self._record(key, prompt, time.monotonic() - started, response=response)
+        return response
+
+    def stream(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+               timeout: Optional[float] = None) -> Iterator[Union[str, StreamUsage]]:
+        if self.mode == "replay":
+            response = self._replay(prompt, generation_config, timeout)
+            chunks = [response.text[i:i + self.chunk_chars] for i in range(0, len(response.text), self.chunk_chars)] or [""]
+            delay = response.raw.get("latency_ms", 0) / 1000.0 * self.latency_scale / len(chunks)
+            for chunk in chunks:
+                self._sleep(delay)
+                yield chunk
+            return
+        key = cassette_key(self.model_name, prompt, generation_config)
+        started = time.monotonic()
+        chunks: List[str] = []
+        usage = None
+        try:
+            for chunk in self.inner.stream(prompt, generation_config, timeout):
+                if isinstance(chunk, StreamUsage):
+                    usage = chunk.usage_metadata
+                else:
+                    chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            self._record(key, prompt, time.monotonic() - started, error=e)
+            raise
+        text = "".join(chunks)
+        if usage is None:
+            usage = usage_metadata(self.count_tokens(prompt), estimate_token_count(text))
+        self._record(key, prompt, time.monotonic() - started, response=LLMResponse(text=text, usage_metadata=usage))
+
+    def count_tokens(self, text: str) -> int:
+        if self.inner is not None:
+            return self.inner.count_tokens(text)
+        return estimate_token_count(text)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, "path": self.path, "recorded": self.recorded,
+                    "replayed": self.replayed, "misses": self.misses}
@@ -0,0 +1,244 @@
+# backend/src/llm/context_cache.py
+"""
+Context caching of static prompt instructions
+
+``ContextCachingBackend`` wraps a backend that supports cached contexts. A
+``split_prompt`` function separates each prompt into its static instruction
+and the per-call part; the instruction is cached server-side once (one handle
+per distinct instruction, created lazily on first use) and only the per-call
+part is sent with each request. Prompts that cannot be split, and calls made
+while a handle is unavailable, are sent whole.
+
+Handles are refreshed ``refresh_margin`` seconds before their TTL runs out
+while they are in use, and left to expire when they are not. A failed
+creation is not retried for ``retry_seconds``; a handle the server no longer
+knows is dropped and the call is repeated with the full prompt.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from .base import CachedContext, LLMBackend, LLMResponse, StreamUsage
+
+GEMINI_CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+GEMINI_CONTEXT_CACHE_TTL = float(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+GEMINI_CONTEXT_CACHE_REFRESH_MARGIN = float(os.getenv("GEMINI_CONTEXT_CACHE_REFRESH_MARGIN", "300"))
+GEMINI_CONTEXT_CACHE_RETRY_SECONDS = float(os.getenv("GEMINI_CONTEXT_CACHE_RETRY_SECONDS", "600"))
+
+SplitPrompt = Callable[[str], Optional[Tuple[str, str]]]
+
+
+def is_missing_context_error(error: BaseException) -> bool:
+    """True for errors saying the cached content expired or was deleted"""
+    message = str(error).lower()
+    return "cachedcontent" in message.replace(" ", "") and ("not found" in message or "404" in message or "expired" in message)
+
+
+class _Handle:
+    """One cached instruction and its local expiry estimate"""
+
+    def __init__(self):
+        self.lock = threading.Lock()  # held while creating or refreshing
+        self.context: Optional[CachedContext] = None
+        self.expires_at = 0.0
+        self.retry_at = 0.0
+
+
+class ContextCachingBackend(LLMBackend):
+    """Sends the static part of prompts as a cached context of ``inner``"""
+
+    def __init__(self, inner: LLMBackend, split_prompt: SplitPrompt, ttl_seconds: float = GEMINI_CONTEXT_CACHE_TTL,
+                 refresh_margin: float = GEMINI_CONTEXT_CACHE_REFRESH_MARGIN,
+                 retry_seconds: float = GEMINI_CONTEXT_CACHE_RETRY_SECONDS, clock=time.monotonic):
+        self.inner = inner
+        self.split_prompt = split_prompt
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = min(refresh_margin, ttl_seconds / 2)
+        self.retry_seconds = retry_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._handles: Dict[str, _Handle] = {}
+        self.created = 0
+        self.refreshed = 0
+        self.expired = 0
+        self.create_failures = 0
+        self.lost = 0
+        self.cached_calls = 0
+        self.uncached_calls = 0
+        self.cached_tokens = 0
+
+    @property
+    def name(self) -> str:
+        return self.inner.name
+
+    @property
+    def model_name(self) -> str:
+        return self.inner.model_name
+
+    def count_tokens(self, text: str) -> int:
+        return self.inner.count_tokens(text)
+
+    def _handle(self, instruction: str) -> _Handle:
+        key = hashlib.sha256(instruction.encode("utf-8")).hexdigest()
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = self._handles[key] = _Handle()
+            return handle
+
+    def _context(self, instruction: str) -> Optional[CachedContext]:
+        """A live cached context for ``instruction``, or ``None`` to send the prompt whole"""
+        handle = self._handle(instruction)
+        now = self._clock()
+        context = handle.context
+        if context is not None and now < handle.expires_at and (now < handle.expires_at - self.refresh_margin or now < handle.retry_at):
+            return context
+        if context is None and now < handle.retry_at:
+            return None
+        # One caller creates or refreshes; the others use what is there instead of waiting
+        if not handle.lock.acquire(blocking=False):
+            return context if context is not None and now < handle.expires_at else None
+        try:
+            if handle.context is not None and now >= handle.expires_at:
+                handle.context = None
+                with self._lock:
+                    self.expired += 1
+            if handle.context is not None:
+                try:
+                    self.inner.refresh_cached_context(handle.context, self.ttl_seconds)
+                    handle.expires_at = now + self.ttl_seconds
+                    with self._lock:
+                        self.refreshed += 1
+                except Exception as e:
+                    logging.warning(f"Refreshing cached context {handle.context.name} failed: {e}")
+                    handle.retry_at = now + self.retry_seconds
+                    if is_missing_context_error(e):
+                        handle.context = None
+                return handle.context
+            try:
+                handle.context = self.inner.create_cached_context(instruction, self.ttl_seconds)
+            except Exception as e:
+                handle.retry_at = now + self.retry_seconds
+                with self._lock:
+                    self.create_failures += 1
+                logging.warning(f"Creating a cached context failed, sending full prompts for {self.retry_seconds:.0f}s: {e}")
+                return None
+            handle.expires_at = now + self.ttl_seconds
+            with self._lock:
+                self.created += 1
+            logging.info(f"Created cached context {handle.context.name} ({handle.context.token_count} tokens)")
+            return handle.context
+        finally:
+            handle.lock.release()
+
+    def _drop(self, instruction: str, context: CachedContext) -> None:
+        handle = self._handle(instruction)
+        with handle.lock:
+            if handle.context is context:
+                handle.context = None
+        with self._lock:
+            self.lost += 1
+
+    def _prepare(self, prompt: str) -> Tuple[Optional[str], str, Optional[CachedContext]]:
+        split = self.split_prompt(prompt) if self.inner.supports_context_cache else None
+        if split is None:
+            return None, prompt, None
+        instruction, rest = split
+        context = self._context(instruction)
+        return instruction, rest, context
+
+    def _count(self, context: Optional[CachedContext]) -> None:
+        with self._lock:
+            if context is None:
+                self.uncached_calls += 1
+            else:
+                self.cached_calls += 1
+                self.cached_tokens += context.token_count
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None, context: Optional[CachedContext] = None) -> LLMResponse:
+        instruction, rest, cached = self._prepare(prompt)
+        if cached is not None:
+            try:
+                response = self.inner.generate(rest, generation_config, timeout, context=cached)
+            except Exception as e:
+                if not is_missing_context_error(e):
+                    raise
+                self._drop(instruction, cached)
+            else:
+                self._count(cached)
+                return response
+        self._count(None)
+        return self.inner.generate(prompt, generation_config, timeout)
+
+    def stream(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+               timeout: Optional[float] = None, context: Optional[CachedContext] = None) -> Iterator[Union[str, StreamUsage]]:
+        instruction, rest, cached = self._prepare(prompt)
+        if cached is not None:
+            started = False
+            try:
+                for chunk in self.inner.stream(rest, generation_config, timeout, context=cached):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                if started or not is_missing_context_error(e):
+                    raise
+                self._drop(instruction, cached)
+            else:
+                self._count(cached)
+                return
+        self._count(None)
+        yield from self.inner.stream(prompt, generation_config, timeout)
+
+    def close(self) -> None:
+        """Delete every cached context (they would otherwise live until their TTL)"""
+        with self._lock:
+            handles = list(self._handles.values())
+            self._handles.clear()
+        for handle in handles:
+            if handle.context is None:
+                continue
+            try:
+                self.inner.delete_cached_context(handle.context)
+            except Exception as e:
+                logging.warning(f"Deleting cached context {handle.context.name} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            live = sum(1 for handle in self._handles.values() if handle.context is not None and now < handle.expires_at)
+            calls = self.cached_calls + self.uncached_calls
+            return {
+                "handles": live,
+                "created": self.created,
+                "refreshed": self.refreshed,
+                "expired": self.expired,
+                "create_failures": self.create_failures,
+                "lost": self.lost,
+                "cached_calls": self.cached_calls,
+                "uncached_calls": self.uncached_calls,
+                "cached_call_rate": round(self.cached_calls / calls, 4) if calls else 0.0,
+                "cached_tokens": self.cached_tokens
+            }
+
+
+def _context_caching_backends(backends: Iterable[Any]) -> Iterator[ContextCachingBackend]:
+    for backend in backends:
+        while backend is not None and not isinstance(backend, ContextCachingBackend):
+            backend = getattr(backend, "inner", None)  # e.g. a recording cassette
+        if backend is not None:
+            yield backend
+
+
+def context_cache_stats(backends: Iterable[Any]) -> Dict[str, Any]:
+    """Context-cache stats of ``backends`` that use one, by model name"""
+    return {backend.model_name or f"model{n}": backend.stats() for n, backend in enumerate(_context_caching_backends(backends))}
+
+
+def close_context_caches(backends: Iterable[Any]) -> None:
+    for backend in _context_caching_backends(backends):
+        backend.close()
@@ -0,0 +1,85 @@
+# backend/src/llm/gemini.py
+"""
+Google Gemini backend (``google.generativeai``)
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import google.generativeai as genai
+
+from .base import CachedContext, LLMBackend, LLMResponse, StreamUsage
+
+
+class GeminiBackend(LLMBackend):
+    """Wraps a ``genai.GenerativeModel`` (or any object with a compatible ``generate_content``)"""
+
+    name = "gemini"
+    supports_context_cache = True
+
+    def __init__(self, model: Any, safety_settings: Optional[List[Dict[str, str]]] = None):
+        if isinstance(model, str):
+            model = genai.GenerativeModel(model)
+        self.model = model
+        self.safety_settings = safety_settings
+        self._cached_models: Dict[str, Any] = {}  # cached content name -> model bound to it
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.model, "model_name", "") or ""
+
+    def _request(self, prompt: str, generation_config: Optional[Dict[str, Any]], timeout: Optional[float] = None,
+                 context: Optional[CachedContext] = None, **kwargs) -> Any:
+        if timeout:
+            kwargs["request_options"] = {"timeout": timeout}
+        model = self.model
+        if context is not None:
+            model = self._cached_models.get(context.name)
+            if model is None:
+                model = self._cached_models[context.name] = genai.GenerativeModel.from_cached_content(context.handle)
+        return model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(**(generation_config or {})),
+            safety_settings=self.safety_settings,
+            **kwargs
+        )
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None, context: Optional[CachedContext] = None) -> LLMResponse:
+        response = self._request(prompt, generation_config, timeout, context)
+        # ``response.text`` raises for blocked or empty candidates; let that surface as the API error
+        return LLMResponse(text=response.text, usage_metadata=getattr(response, "usage_metadata", None), raw=response)
+
+    def stream(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+               timeout: Optional[float] = None, context: Optional[CachedContext] = None) -> Iterator[Union[str, StreamUsage]]:
+        usage = None
+        for chunk in self._request(prompt, generation_config, timeout, context, stream=True):
+            # Usage is cumulative; the last chunk carries the totals for the whole stream
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+        if usage is not None:
+            yield StreamUsage(usage)
+
+    def create_cached_context(self, instruction: str, ttl_seconds: float) -> CachedContext:
+        cached = genai.caching.CachedContent.create(
+            model=self.model_name, system_instruction=instruction, ttl=timedelta(seconds=ttl_seconds)
+        )
+        usage = getattr(cached, "usage_metadata", None)
+        return CachedContext(name=cached.name, token_count=getattr(usage, "total_token_count", 0) or 0, handle=cached)
+
+    def refresh_cached_context(self, context: CachedContext, ttl_seconds: float) -> None:
+        context.handle.update(ttl=timedelta(seconds=ttl_seconds))
+
+    def delete_cached_context(self, context: CachedContext) -> None:
+        self._cached_models.pop(context.name, None)
+        context.handle.delete()
+
+    def count_tokens(self, text: str) -> int:
+        try:
+            return self.model.count_tokens(text).total_tokens
+        except Exception as e:
+            logging.warning(f"Gemini count_tokens failed, estimating instead: {e}")
+            return super().count_tokens(text)
@@ -0,0 +1,229 @@
+# backend/src/llm/stub.py
+"""
+Deterministic offline LLM backend
+
+Answers product-description prompts (single and packed) with schema-valid
+JSON built from the prompt itself, after a simulated latency. Error and
+malformed-output rates let load tests and benchmarks exercise the retry,
+circuit breaker, validation and escalation paths without network access.
+
+Every draw is derived from ``(seed, prompt, n-th call with this prompt)``,
+so a run is reproducible regardless of request interleaving, while a retry
+of the same prompt gets a fresh draw.
+
+Cached contexts are kept in memory, so the context-cache handle lifecycle
+(create, refresh, expiry, deletion) can be exercised offline.
+"""
+
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .base import CachedContext, LLMBackend, LLMResponse, estimate_token_count, usage_metadata
+
+# Weighted kinds, e.g. "503:2,429:1,timeout:1"
+ERROR_MESSAGES = {
+    "503": "503 Service Unavailable: the model is overloaded (stub)",
+    "500": "500 Internal error encountered (stub)",
+    "429": "429 Resource has been exhausted (e.g. check quota). (stub)",
+    "timeout": "504 Deadline Exceeded (stub)",
+    "safety": "Response blocked by safety filters (stub)"
+}
+MALFORMED_KINDS = ("truncated", "prose", "missing_bullets", "short_bullets")
+
+
+def parse_weights(spec: str, known) -> List[Tuple[str, float]]:
+    """Parse ``"kind:weight,kind"`` into ``[(kind, weight)]`` (weight defaults to 1)"""
+    weights = []
+    for part in (spec or "").split(","):
+        kind, _, weight = part.strip().partition(":")
+        if not kind:
+            continue
+        if kind not in known:
+            raise ValueError(f"Unknown stub kind '{kind}' (expected one of {', '.join(known)})")
+        weights.append((kind, float(weight) if weight else 1.0))
+    return weights
+
+
+def _choose(rng: random.Random, weights: List[Tuple[str, float]]) -> str:
+    kinds, values = zip(*weights)
+    return rng.choices(kinds, weights=values)[0]
+
+
+def _field(prompt: str, label: str) -> str:
+    match = re.search(rf"\*\*{re.escape(label)}:\*\*\s*(.*)", prompt)
+    return match.group(1).strip() if match else ""
+
+
+def _product_json(name: str, features: str, keyword: str, rng: random.Random) -> Dict[str, Any]:
+    name = name or "Product"
+    keyword = keyword or name.split()[0].lower()
+    feature_list = [f.strip() for f in re.split(r"[;,]", features) if f.strip()] or ["thoughtful design"]
+    while len(feature_list) < 3:
+        feature_list.append(feature_list[-1])
+    adjective = rng.choice(["Premium", "Everyday", "Essential", "Versatile", "Reliable"])
+    sentences = [
+        f"Discover the {name}, the {keyword} built around {feature_list[0]} for people who expect more from everyday essentials.",
+        f"Every detail, from {feature_list[1]} to {feature_list[2]}, is designed to make daily routines easier, faster and more enjoyable.",
+        f"Whether it is a gift or an upgrade for your own home, this {keyword} delivers dependable performance you will notice from day one.",
+        "Enjoy consistent quality, simple care and a finish that keeps looking great long after purchase."
+    ]
+    return {
+        "title": f"{adjective} {name} - {keyword.title()}",
+        "description": " ".join(sentences),
+        "bullets": [f"{feature.capitalize()} - designed for reliable everyday performance" for feature in feature_list[:3]],
+        "meta": f"Shop the {name}: {keyword} with {feature_list[0]}. Reliable quality for everyday use."[:140]
+    }
+
+
+class StubBackend(LLMBackend):
+    """Offline backend returning deterministic product JSON with configurable latency and failures"""
+
+    name = "stub"
+    supports_context_cache = True
+
+    def __init__(self, model_name: str = "stub", latency_ms: float = 200, jitter_ms: float = 50,
+                 tail_rate: float = 0.0, tail_ms: float = 2000, error_rate: float = 0.0,
+                 error_kinds: str = "503:2,429:1,timeout:1", malformed_rate: float = 0.0,
+                 malformed_kinds: str = "truncated,prose,missing_bullets", seed: int = 42,
+                 chunk_chars: int = 40, sleep=time.sleep):
+        self.model_name = model_name
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.tail_rate = float(tail_rate)
+        self.tail_ms = float(tail_ms)
+        self.error_rate = float(error_rate)
+        self.error_weights = parse_weights(error_kinds, ERROR_MESSAGES)
+        self.malformed_rate = float(malformed_rate)
+        self.malformed_weights = parse_weights(malformed_kinds, MALFORMED_KINDS)
+        self.seed = seed
+        self.chunk_chars = max(1, int(chunk_chars))
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._seen = {}
+        self.calls = 0
+        self.errors = 0
+        self.malformed = 0
+        self.contexts: Dict[str, CachedContext] = {}
+        self.contexts_created = 0
+
+    @classmethod
+    def from_env(cls, model_name: str = "stub") -> "StubBackend":
+        """Build a stub configured by the ``LLM_STUB_*`` environment variables"""
+        return cls(
+            model_name=model_name,
+            latency_ms=float(os.getenv("LLM_STUB_LATENCY_MS", "200")),
+            jitter_ms=float(os.getenv("LLM_STUB_JITTER_MS", "50")),
+            tail_rate=float(os.getenv("LLM_STUB_TAIL_RATE", "0")),
+            tail_ms=float(os.getenv("LLM_STUB_TAIL_MS", "2000")),
+            error_rate=float(os.getenv("LLM_STUB_ERROR_RATE", "0")),
+            error_kinds=os.getenv("LLM_STUB_ERROR_KINDS", "503:2,429:1,timeout:1"),
+            malformed_rate=float(os.getenv("LLM_STUB_MALFORMED_RATE", "0")),
+            malformed_kinds=os.getenv("LLM_STUB_MALFORMED_KINDS", "truncated,prose,missing_bullets"),
+            seed=int(os.getenv("LLM_STUB_SEED", "42"))
+        )
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}\x00{self.model_name}\x00{prompt}".encode("utf-8")).hexdigest()
+        with self._lock:
+            self.calls += 1
+            attempt = self._seen.get(digest, 0)
+            self._seen[digest] = attempt + 1
+        return random.Random(f"{digest}:{attempt}")
+
+    def _latency(self, rng: random.Random) -> float:
+        latency_ms = max(0.0, rng.gauss(self.latency_ms, self.jitter_ms)) if self.jitter_ms else self.latency_ms
+        if self.tail_rate and rng.random() < self.tail_rate:
+            latency_ms += self.tail_ms
+        return latency_ms / 1000.0
+
+    def _answer(self, prompt: str, rng: random.Random) -> str:
+        """Well-formed answer for a single or packed prompt"""
+        blocks = re.split(r"\*\*PRODUCT (P\d+):\*\*", prompt)
+        if len(blocks) > 1:
+            products = []
+            for slot_id, block in zip(blocks[1::2], blocks[2::2]):
+                product = _product_json(_field(block, "Product Name"), _field(block, "Key Features"), _field(block, "Primary Keyword"), rng)
+                products.append({"id": slot_id, **product})
+            return "```json\n" + json.dumps(products, ensure_ascii=False, indent=2) + "\n```"
+        product = _product_json(_field(prompt, "Product Name"), _field(prompt, "Key Features"), _field(prompt, "Primary Keyword"), rng)
+        return json.dumps(product, ensure_ascii=False, indent=2)
+
+    def _malform(self, text: str, kind: str) -> str:
+        if kind == "truncated":
+            return text[:len(text) // 2]
+        if kind == "prose":
+            return "Here is a compelling description for your product! It is great and you will love it."
+        data = json.loads(text.strip("`").replace("json\n", "", 1)) if text.startswith("```") else json.loads(text)
+        for product in (data if isinstance(data, list) else [data]):
+            product["bullets"] = product["bullets"][:2] if kind == "missing_bullets" else ["Good", "Nice", "Great"]
+        return json.dumps(data, ensure_ascii=False)
+
+    def _complete(self, prompt: str, timeout: Optional[float] = None) -> Tuple[str, float]:
+        """Draw the outcome of one call: ``(text, latency)`` or raise the simulated API error"""
+        rng = self._rng(prompt)
+        latency = self._latency(rng)
+        if timeout is not None and latency > timeout:
+            self._sleep(timeout)
+            raise TimeoutError(f"504 Deadline Exceeded after {timeout:.1f}s (stub)")
+        if self.error_rate and self.error_weights and rng.random() < self.error_rate:
+            with self._lock:
+                self.errors += 1
+            self._sleep(latency)
+            raise Exception(ERROR_MESSAGES[_choose(rng, self.error_weights)])
+        text = self._answer(prompt, rng)
+        if self.malformed_rate and self.malformed_weights and rng.random() < self.malformed_rate:
+            with self._lock:
+                self.malformed += 1
+            text = self._malform(text, _choose(rng, self.malformed_weights))
+        return text, latency
+
+    def _check_context(self, context: Optional[CachedContext]) -> int:
+        """Tokens served from ``context``; raises like Gemini when it no longer exists"""
+        if context is None:
+            return 0
+        with self._lock:
+            if context.name not in self.contexts:
+                raise Exception(f"404 CachedContent not found: {context.name} (stub)")
+        return context.token_count
+
+    def generate(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None, context: Optional[CachedContext] = None) -> LLMResponse:
+        cached_tokens = self._check_context(context)
+        text, latency = self._complete(prompt, timeout)
+        self._sleep(latency)
+        prompt_tokens = self.count_tokens(prompt) + cached_tokens
+        return LLMResponse(text=text, usage_metadata=usage_metadata(prompt_tokens, estimate_token_count(text), cached_tokens))
+
+    def stream(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None,
+               timeout: Optional[float] = None, context: Optional[CachedContext] = None) -> Iterator[str]:
+        self._check_context(context)
+        text, latency = self._complete(prompt, timeout)
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        for chunk in chunks:
+            self._sleep(latency / len(chunks))
+            yield chunk
+
+    def create_cached_context(self, instruction: str, ttl_seconds: float) -> CachedContext:
+        with self._lock:
+            self.contexts_created += 1
+            context = CachedContext(name=f"cachedContents/stub-{self.contexts_created}",
+                                    token_count=self.count_tokens(instruction), handle=instruction)
+            self.contexts[context.name] = context
+        return context
+
+    def refresh_cached_context(self, context: CachedContext, ttl_seconds: float) -> None:
+        self._check_context(context)
+
+    def delete_cached_context(self, context: CachedContext) -> None:
+        with self._lock:
+            self.contexts.pop(context.name, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors, "malformed": self.malformed}
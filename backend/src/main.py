@@ -10,10 +10,11 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import pandas as pd
 import json
 import io
+import csv
 from dotenv import load_dotenv
 
 try:
@@ -31,9 +32,26 @@ sys.path.insert(0, str(BACKEND_DIR))
 # Load environment BEFORE importing modules that need it
 load_dotenv(BACKEND_DIR / ".env")
 
-from utils.helpers import ensure_dir, timestamp, safe_extract_json, validate_and_ensure_compliance, generate_fallback_bullets
-from src.ai_pipeline import load_env, call_gemini_generate, build_gemini_prompt, row_to_dict, CostTracker, SafetyFilter
+from utils.helpers import ensure_dir, timestamp, safe_extract_json, validate_and_ensure_compliance, generate_fallback_bullets, extract_partial_product
+from src.ai_pipeline import load_env, build_product_prompt, get_template_registry, prompt_variant, row_to_dict, CostTracker, SafetyFilter, set_usage_context, gemini_generation_config, gemini_model_name
 from src.seo_check import seo_evaluate
+from src.csv_ingest import CSVColumnMapping, CSVFrameReader, CSVTooLarge, spool_upload
+from src.generation import call_gemini_generate_async, shutdown_generation_executor
+from src.generation.cache import get_generation_cache, generation_cache_key
+from src.generation.singleflight import get_generation_singleflight
+from src.generation.governor import get_rate_governor
+from src.generation.circuit_breaker import get_circuit_breaker
+from src.generation.hedging import get_hedger
+from src.generation.cascade import ModelCascade, QualityCheckFailed
+from src.generation.retry_policy import generation_deadline
+from src.generation.repair import get_repairer
+from src.generation.structured import GEMINI_STRUCTURED_OUTPUT, parse_product_response, get_parse_stats
+from src.generation.streaming import GenerationStream, partial_json_fields, get_stream_stats
+from src.generation.batch import iter_batch, iter_grouped_batch, BatchStopped, get_process_semaphore
+from src.generation.packing import GENERATION_PACK_SIZE, iter_packs, aiter_packs, generate_packed_async
+from src.generation.features import get_feature_compactor
+from src.generation.jobs import BatchJobWorker, create_batch_job, get_batch_job_snapshot, mark_batch_job_charged, summarize_progress
+from src.llm import context_cache_stats, close_context_caches
 
 from src.auth.firebase import get_current_user
 from src.payments.endpoints import router as payment_router
@@ -109,101 +127,30 @@ app.include_router(payment_router)
 
 # Global variables for model and components
 model = None
+generation_cascade = None
 cost_tracker = None
 safety_filter = None
 credit_service = None
-
-def find_column(columns, synonyms):
-    """
-    Find the best matching column for given synonyms.
-    Normalizes column names and returns the first match.
-    """
-    normalized_columns = {}
-    for col in columns:
-        # Normalize: lowercase, remove spaces, hyphens, underscores
-        normalized = col.lower().replace(' ', '').replace('-', '').replace('_', '')
-        normalized_columns[normalized] = col
-    
-    for synonym in synonyms:
-        normalized_synonym = synonym.lower().replace(' ', '').replace('-', '').replace('_', '')
-        if normalized_synonym in normalized_columns:
-            return normalized_columns[normalized_synonym]
-    
-    return None
-
-def process_csv_row(row, target_audience, columns, language_code="en"):
-    """
-    Process a CSV row using automatic column mapping and dynamic feature generation.
-    """
-    # Define synonyms for automatic mapping
-    product_name_synonyms = ['title', 'name', 'product', 'productname', 'item', 'model']
-    category_synonyms = ['category', 'type', 'department', 'group', 'collection']
-    
-    # Blocklist for columns that shouldn't be used as features
-    feature_blocklist = ['id', 'sku', 'price', 'cost', 'url', 'image', 'images']
-    
-    # Find mapped columns
-    product_name_col = find_column(columns, product_name_synonyms)
-    category_col = find_column(columns, category_synonyms)
-    
-    # Fallback logic
-    if not product_name_col:
-        product_name_col = columns[0] if columns else "Unknown"
-    
-    if not category_col:
-        category_col = "General"
-    
-    # Extract values
-    product_name = str(row.get(product_name_col, "")).strip()
-    category = str(row.get(category_col, "")).strip() if category_col != "General" else "General"
-    
-    # Generate features from all other columns
-    feature_parts = []
-    for col in columns:
-        if col not in [product_name_col, category_col] and col.lower() not in feature_blocklist:
-            value = str(row.get(col, "")).strip()
-            if value:  # Only include non-empty values
-                feature_parts.append(f"{col}: {value}")
-    
-    features = ". ".join(feature_parts) if feature_parts else ""
-    
-    # Log mapping decisions for debugging
-    logging.info(f"Mapped '{product_name_col}' to 'product_name', '{category_col}' to 'category'")
-    
-    return {
-        "id": str(row.get("id", "")).strip(),
-        "sku": str(row.get("sku", "")).strip(),
-        "title": product_name,
-        "category": category.lower(),
-        "features": features,
-        "primary_keyword": str(row.get("primary_keyword", "")).strip(),
-        "tone": str(row.get("tone", "")).strip(),
-        "price": row.get("price", ""),
-        "images": str(row.get("images", "")).strip(),
-        "audience": target_audience,
-        "languageCode": language_code
-    }
+batch_worker = None
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the AI model and components on startup"""
-    global model, cost_tracker, safety_filter, credit_service
+    global model, generation_cascade, cost_tracker, safety_filter, credit_service, batch_worker
     
     try:
         # Load environment and initialize model
         conf = load_env(dry_run=False)  # Use real API key
         model = conf["model"]
         cost_tracker = CostTracker()
+        if model is not None:
+            generation_cascade = ModelCascade(conf["cascade_models"] or [model], cost_tracker=cost_tracker)
         safety_filter = SafetyFilter()
         credit_service = CreditService()
         
-        # TEMPORARILY DISABLED FOR TESTING - Rate limiting for API calls
-        # last_api_call_time = 0
-        # MIN_API_INTERVAL = 2.0  # Minimum 2 seconds between API calls
-        
         print("✅ AI Product Descriptions API started successfully")
         if model is not None:
-            print(f"🤖 Model: {conf['model_name']} (Live mode)")
+            print(f"🤖 Model: {conf['model_name']} (Live mode, {conf['backend']} backend)")
             print(f"🌡️  Temperature: {conf['temperature']}")
             print("✅ API key configured - ready for AI generation")
         else:
@@ -212,6 +159,13 @@ async def startup_event():
             print("⚠️  Running in dry-run mode - API key not configured")
         
         print("💳 Credit service initialized - rate limiting enabled")
+        print(f"📝 Category prompt templates: {', '.join(get_template_registry().categories()) or 'none'}")
+        
+        # Background workers for queued batch jobs (/api/batch-jobs)
+        if int(os.getenv("BATCH_WORKERS", "4")) > 0:
+            batch_worker = BatchJobWorker(_process_batch_job_item, on_job_finished=_finish_batch_job)
+            batch_worker.start()
+            print(f"🧵 Batch job workers started: {batch_worker.concurrency}")
         
         # Initialize subscription plans
         try:
@@ -225,27 +179,28 @@ async def startup_event():
         print(f"❌ Failed to start API: {str(e)}")
         raise
 
-# TEMPORARILY DISABLED FOR TESTING
-def rate_limit_api_call():
-    """Ensure minimum interval between API calls to avoid rate limiting"""
-    # global last_api_call_time
-    # current_time = time.time()
-    # time_since_last_call = current_time - last_api_call_time
-    # 
-    # if time_since_last_call < MIN_API_INTERVAL:
-    #     sleep_time = MIN_API_INTERVAL - time_since_last_call
-    #     logging.info(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-    #     time.sleep(sleep_time)
-    # 
-    # last_api_call_time = time.time()
-    pass
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop batch workers and release the Gemini worker threads on shutdown"""
+    if batch_worker is not None:
+        await batch_worker.stop()
+    shutdown_generation_executor(wait=False)
+    close_context_caches(_llm_backends())
+
+def _llm_backends():
+    """The primary model and the cascade tiers, each once"""
+    backends = [model] + (generation_cascade.models if generation_cascade is not None else [])
+    return list({id(backend): backend for backend in backends if backend is not None}.values())
 
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
+    breaker = get_circuit_breaker().stats()
     return {
-        "status": "healthy",
+        "status": "healthy" if breaker["state"] != "open" else "degraded",
         "model_loaded": model is not None,
+        "llm_backend": getattr(model, "name", None),
+        "gemini_circuit": breaker,
         "timestamp": timestamp()
     }
 
@@ -264,7 +219,13 @@ def readiness():
         db_ok = True
     except Exception:
         db_ok = False
-    return {"status": "ok" if db_ok else "degraded", "db": db_ok}
+    circuit = get_circuit_breaker().state
+    body = {"status": "ok" if db_ok else "degraded", "db": db_ok, "gemini_circuit": circuit}
+    if circuit == "open":
+        # Ask the load balancer to shed traffic until the probe closes the circuit
+        body["status"] = "unavailable"
+        return JSONResponse(status_code=503, content=body)
+    return body
 
 @app.get("/auth/me")
 async def auth_me(user = Depends(get_current_user)):
@@ -310,8 +271,7 @@ Return JSON:
         logging.info(f"Testing language generation for: {language_code}")
         logging.info(f"Test prompt: {test_prompt}")
         
-        # TEMPORARILY DISABLED FOR TESTING - rate_limit_api_call()  # Add rate limiting
-        ai_text, tokens_used, response_time = call_gemini_generate(
+        ai_text, tokens_used, response_time = await call_gemini_generate_async(
             model=model,
             prompt=test_prompt,
             temperature=0.8,  # Increased for more creative and persuasive content
@@ -345,6 +305,8 @@ Return JSON:
             error_type = "SAFETY_FILTER"
         elif "NETWORK_ERROR" in error_msg:
             error_type = "NETWORK_ERROR"
+        elif "CIRCUIT_OPEN" in error_msg:
+            error_type = "CIRCUIT_OPEN"
         elif "RETRY_EXHAUSTED" in error_msg:
             error_type = "RETRY_EXHAUSTED"
         else:
@@ -358,23 +320,144 @@ Return JSON:
             "original_error_type": type(e).__name__
         }
 
-@app.post("/api/generate-description")
-async def generate_description(
-    title: str = Form(...),
-    features: str = Form(...),
-    category: str = Form("generic"),
-    primary_keyword: str = Form(""),
-    tone: str = Form("professional"),
-    sku: str = Form(""),
-    languageCode: str = Form("en"),
-    user = Depends(get_current_user)
-):
-    """Generate a single product description"""
-    if model is None or credit_service is None:
-        raise HTTPException(status_code=500, detail="AI model or credit service not initialized")
+async def _validate_generated(ai_text, row_dict, call_repair=None, structured=False):
+    """
+    Parse a sanitized Gemini response and enforce compliance.
     
-    user_id = user.get("uid")
+    Returns ``(validated, repair_tokens, repair_time)``. When only the bullets
+    fail validation, ``call_repair`` asks for the missing ones, falling back
+    to generated bullets; raises ``ValueError`` when the response cannot be
+    used at all.
+    """
+    try:
+        parsed = parse_product_response(ai_text, structured)
+        return validate_and_ensure_compliance(parsed), 0, 0.0
+    except ValueError as validation_error:
+        logging.warning(f"Compliance validation failed for product {row_dict.get('id', 'Unknown')}: {validation_error}")
+        # Extract what we can from the response
+        partial = extract_partial_product(ai_text)
+        if partial is None:
+            logging.error(f"Fallback generation failed for product {row_dict.get('id', 'Unknown')}: missing title or description")
+            raise validation_error
+        repair_tokens, repair_time = 0, 0.0
+        if call_repair is not None:
+            repaired, repair_tokens, repair_time = await get_repairer().repair_bullets(partial, row_dict, call_repair)
+            if repaired is not None:
+                return repaired, repair_tokens, repair_time
+        # Generate fallback bullets
+        fallback_bullets = generate_fallback_bullets(
+            partial["title"],
+            partial["description"],
+            row_dict.get("features", "")
+        )
+        logging.info(f"Used fallback bullets for product {row_dict.get('id', 'Unknown')}")
+        return {
+            "title": partial["title"],
+            "description": partial["description"],
+            "bullets": fallback_bullets,
+            "meta": partial["meta"]
+        }, repair_tokens, repair_time
+
+def _generation_cache_key(prompt, temperature):
+    model_key = generation_cascade.key if generation_cascade is not None else gemini_model_name(model)
+    return generation_cache_key(prompt, model_key, gemini_generation_config(temperature, structured=GEMINI_STRUCTURED_OUTPUT))
+
+async def _accept_generated(ai_text, row_dict, tier_model, temperature, last_tier, tokens_used, response_time):
+    """
+    Sanitize, validate and if needed repair a raw answer from ``tier_model``.
+    
+    Returns ``(validated, tokens_used, response_time)`` including any repair
+    calls. Raises ``QualityCheckFailed`` when the answer is unusable, or when
+    a non-final cascade tier still fails the SEO check after repair.
+    """
+    async def call_repair(repair_prompt, max_output_tokens):
+        repair_text, repair_tokens, repair_time = await call_gemini_generate_async(
+            model=tier_model,
+            prompt=repair_prompt,
+            temperature=temperature,
+            cost_tracker=cost_tracker,
+            max_output_tokens=max_output_tokens
+        )
+        return safety_filter.sanitize_output(repair_text), repair_tokens, repair_time
+    
+    # Sanitize output, then parse with compliance validation
+    ai_text = safety_filter.sanitize_output(ai_text)
+    try:
+        validated, repair_tokens, repair_time = await _validate_generated(
+            ai_text, row_dict, call_repair, structured=GEMINI_STRUCTURED_OUTPUT
+        )
+    except ValueError as validation_error:
+        raise QualityCheckFailed(str(validation_error), tokens_used, response_time) from validation_error
+    tokens_used += repair_tokens
+    response_time += repair_time
+    
+    seo = seo_evaluate(validated.get("description", ""), row_dict.get("primary_keyword", ""))
+    if not seo["passes"]:
+        repaired, repair_tokens, repair_time = await get_repairer().repair_description(validated, row_dict, seo, call_repair)
+        tokens_used += repair_tokens
+        response_time += repair_time
+        if repaired is not None:
+            validated = repaired
+        elif not last_tier:
+            # Cheaper tiers must also pass the SEO check, otherwise escalate
+            raise QualityCheckFailed(f"SEO check failed: {seo['notes']}", tokens_used, response_time)
+    return validated, tokens_used, response_time
+
+async def _generate_validated(prompt, row_dict, temperature=0.8, refresh=False, hedge=False):
+    """
+    Generate, sanitize and validate a description for ``prompt``.
+    
+    Returns ``(validated, tokens_used, response_time)``. Identical prompts are
+    served from the generation cache without calling Gemini (zero tokens), and
+    concurrent identical prompts share one in-flight call; ``refresh=True``
+    skips the cache lookup and replaces the cached entry. ``hedge=True`` (for
+    interactive endpoints) races a backup call against a slow one when hedging
+    is enabled. Answers that miss only their bullets or fail the SEO check
+    are first repaired with a short follow-up prompt; with a model cascade
+    configured, answers that still fail on a cheaper tier are retried on the
+    next one.
+    """
+    generation_cache = get_generation_cache()
+    cache_key = _generation_cache_key(prompt, temperature)
+    if not refresh:
+        cached = generation_cache.get(cache_key)
+        if cached is not None:
+            logging.info(f"Generation cache hit for product {row_dict.get('id', 'Unknown')}")
+            return cached, 0, 0.0
+    
+    async def attempt(tier_model, last_tier):
+        ai_text, tokens_used, response_time = await call_gemini_generate_async(
+            model=tier_model,
+            prompt=prompt,
+            temperature=temperature,
+            cost_tracker=cost_tracker,
+            structured=GEMINI_STRUCTURED_OUTPUT
+        )
+        return await _accept_generated(ai_text, row_dict, tier_model, temperature, last_tier, tokens_used, response_time)
+    
+    def tier_attempt(tier_model, last_tier):
+        # A hedged attempt only wins with a valid result
+        if hedge:
+            return get_hedger().run(lambda: attempt(tier_model, last_tier))
+        return attempt(tier_model, last_tier)
+    
+    async def generate():
+        if generation_cascade is not None:
+            result = await generation_cascade.run(tier_attempt)
+        else:
+            result = await tier_attempt(model, True)
+        generation_cache.set(cache_key, result[0])
+        return result
     
+    (validated, tokens_used, response_time), shared = await get_generation_singleflight().do(cache_key, generate)
+    if shared:
+        # Tokens were paid for by the request that made the call
+        logging.info(f"Joined in-flight generation for product {row_dict.get('id', 'Unknown')}")
+        return validated, 0, response_time
+    return validated, tokens_used, response_time
+
+async def _check_single_description_credits(user_id):
+    """Refresh and check credits for one description; raises 402 when the user cannot proceed"""
     # Check and refresh credits if needed
     await credit_service.check_and_refresh_credits(user_id)
     
@@ -396,128 +479,277 @@ async def generate_description(
                 "rate_limits": credit_info.get("rate_limits", {})
             }
         )
-    
+    return operation_type, credit_info
+
+def _checked_prompt_variant(name):
+    """Validate a requested prompt variant ("" keeps the server default); raises 400 for unknown names"""
+    if not name:
+        return None
+    try:
+        return prompt_variant(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _single_description_row(title, features, category, primary_keyword, tone, sku, languageCode, promptVariant=""):
+    """Build and check the row for a single description; raises 400 for unsupported or unsafe input"""
     # Validate language code
     SUPPORTED_LANGUAGES = ['en', 'es', 'fr', 'de', 'ja', 'zh']
     if languageCode not in SUPPORTED_LANGUAGES:
         raise HTTPException(status_code=400, detail=f"Unsupported language code: {languageCode}")
     
+    # Create row dict
+    row = {
+        "id": sku or timestamp(),
+        "sku": sku,
+        "title": title,
+        "category": category,
+        "features": features,
+        "primary_keyword": primary_keyword,
+        "tone": tone,
+        "languageCode": languageCode,
+        "prompt_variant": _checked_prompt_variant(promptVariant)
+    }
+    
+    # Validate input
+    is_valid, validation_msg = safety_filter.validate_input(title + " " + features)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=f"Invalid input: {validation_msg}")
+    return row
+
+async def _finish_single_description(row, validated, tokens_used, response_time, usage_id, user_id, operation_type, credit_info):
+    """Score a validated description, deduct the credit and build the response data"""
+    # Extract fields from validated data
+    generated_title = validated.get("title", row["title"])
+    description = validated.get("description", "").strip()
+    bullets = validated.get("bullets", [])
+    meta = validated.get("meta", "")
+    
+    # SEO evaluation
+    seo = seo_evaluate(description, row["primary_keyword"])
+    
+    # Deduct credits after successful generation
+    deduct_success, deduct_result = await credit_service.deduct_credits(
+        user_id, operation_type, product_count=1, request_id=row["id"]
+    )
+    if not deduct_success:
+        logging.warning(f"Failed to deduct credits for user {user_id}: {deduct_result.get('error')}")
+    
+    return {
+        "id": row["id"],
+        "sku": row["sku"],
+        "title": generated_title,
+        "original_title": row["title"],
+        "description": description,
+        "bullets": bullets,
+        "meta": meta,
+        "seo_score": seo,
+        "languageCode": row["languageCode"],
+        "tokens_used": tokens_used,
+        "response_time": response_time,
+        "cost": cost_tracker.get_request_cost(usage_id),
+        "credits_used": credit_info.get("required_credits", 1),
+        "remaining_credits": deduct_result.get("remaining_credits", 0),
+        "operation_type": operation_type.value,
+        "subscription_tier": credit_info.get("subscription_tier", "free")
+    }
+
+def _generation_error_status(error):
+    """HTTP status and client message for a failed single generation"""
+    if "CIRCUIT_OPEN" in str(error):
+        return 503, "AI service temporarily unavailable - please try again shortly"
+    if "DEADLINE_EXCEEDED" in str(error):
+        return 504, "Generation timed out - please try again"
+    return 500, f"Generation failed: {str(error)}"
+
+@app.post("/api/generate-description")
+async def generate_description(
+    title: str = Form(...),
+    features: str = Form(...),
+    category: str = Form("generic"),
+    primary_keyword: str = Form(""),
+    tone: str = Form("professional"),
+    sku: str = Form(""),
+    languageCode: str = Form("en"),
+    promptVariant: str = Form(""),
+    user = Depends(get_current_user)
+):
+    """Generate a single product description"""
+    if model is None or credit_service is None:
+        raise HTTPException(status_code=500, detail="AI model or credit service not initialized")
+    
+    user_id = user.get("uid")
+    operation_type, credit_info = await _check_single_description_credits(user_id)
+    
     try:
-        # Create row dict
-        row = {
-            "id": sku or timestamp(),
-            "sku": sku,
-            "title": title,
-            "category": category,
-            "features": features,
-            "primary_keyword": primary_keyword,
-            "tone": tone,
-            "languageCode": languageCode
-        }
-        
-        # Validate input
-        is_valid, validation_msg = safety_filter.validate_input(title + " " + features)
-        if not is_valid:
-            raise HTTPException(status_code=400, detail=f"Invalid input: {validation_msg}")
+        row = _single_description_row(title, features, category, primary_keyword, tone, sku, languageCode, promptVariant)
         
         # Build prompt
-        prompt = build_gemini_prompt(row)
+        prompt = build_product_prompt(row)
         
-        # Call AI
-        ai_text, tokens_used, response_time = call_gemini_generate(
-            model=model,
-            prompt=prompt,
-            temperature=0.8,  # Increased for more creative and persuasive content
-            cost_tracker=cost_tracker
-        )
-        
-        # Sanitize output
-        ai_text = safety_filter.sanitize_output(ai_text)
+        # Account this request's Gemini usage to the user
+        usage_id = set_usage_context(user_id=user_id)
         
-        # Parse response with compliance validation
+        # Generate (or reuse a cached generation) with compliance validation
         try:
-            parsed = safe_extract_json(ai_text)
-            validated = validate_and_ensure_compliance(parsed)
+            with generation_deadline():
+                validated, tokens_used, response_time = await _generate_validated(
+                    prompt, row, temperature=0.8, hedge=True  # Increased for more creative and persuasive content
+                )
         except ValueError as validation_error:
-            # If compliance validation fails, try to generate fallback bullets
-            logging.warning(f"Compliance validation failed: {validation_error}")
-            try:
-                # Extract what we can from the response
-                fallback_parsed = safe_extract_json(ai_text)
-                if fallback_parsed.get("title") and fallback_parsed.get("description"):
-                    # Generate fallback bullets
-                    fallback_bullets = generate_fallback_bullets(
-                        fallback_parsed.get("title", ""),
-                        fallback_parsed.get("description", ""),
-                        features
-                    )
-                    validated = {
-                        "title": fallback_parsed.get("title", title),
-                        "description": fallback_parsed.get("description", ""),
-                        "bullets": fallback_bullets,
-                        "meta": fallback_parsed.get("meta", "")
-                    }
-                    logging.info("Used fallback bullets due to compliance failure")
-                else:
-                    raise validation_error
-            except Exception as fallback_error:
-                logging.error(f"Fallback generation failed: {fallback_error}")
-                raise HTTPException(status_code=500, detail=f"Description generation failed compliance validation: {validation_error}")
-        
-        # Extract fields from validated data
-        generated_title = validated.get("title", title)
-        description = validated.get("description", "").strip()
-        bullets = validated.get("bullets", [])
-        meta = validated.get("meta", "")
-        
-        # SEO evaluation
-        seo = seo_evaluate(description, primary_keyword)
-        
-        # Deduct credits after successful generation
-        deduct_success, deduct_result = await credit_service.deduct_credits(
-            user_id, operation_type, product_count=1, request_id=row["id"]
-        )
-        if not deduct_success:
-            logging.warning(f"Failed to deduct credits for user {user_id}: {deduct_result.get('error')}")
+            raise HTTPException(status_code=500, detail=f"Description generation failed compliance validation: {validation_error}")
         
         return {
             "success": True,
-            "data": {
-                "id": row["id"],
-                "sku": sku,
-                "title": generated_title,
-                "original_title": title,
-                "description": description,
-                "bullets": bullets,
-                "meta": meta,
-                "seo_score": seo,
-                "languageCode": languageCode,
-                "tokens_used": tokens_used,
-                "response_time": response_time,
-                "cost": cost_tracker.get_current_cost(),
-                "credits_used": credit_info.get("required_credits", 1),
-                "remaining_credits": deduct_result.get("remaining_credits", 0),
-                "operation_type": operation_type.value,
-                "subscription_tier": credit_info.get("subscription_tier", "free")
-            }
+            "data": await _finish_single_description(
+                row, validated, tokens_used, response_time, usage_id, user_id, operation_type, credit_info
+            )
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error generating description: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+        status_code, detail = _generation_error_status(e)
+        raise HTTPException(status_code=status_code, detail=detail)
 
-@app.post("/api/generate-batch")
-async def generate_batch_json(request: Dict[str, Any], user = Depends(get_current_user)):
-    """Generate descriptions for multiple products from batch request"""
-    logging.info(f"🚀 Generate batch endpoint called - user: {user.get('email', 'unknown')}")
+async def _stream_validated(prompt, row, emit):
+    """
+    Stream a generation for ``prompt``, calling ``emit`` with ``partial``
+    records as the title and description arrive.
+    
+    Returns ``(validated, tokens_used, response_time)`` like ``_generate_validated``.
+    Cached prompts are answered at once. Only the first cascade tier is
+    streamed: an unusable answer escalates to the remaining tiers as single
+    calls, and a stream that fails falls back to ``_generate_validated``
+    (retries, cascade). Either way a ``reset`` record is sent first if
+    partial output was already sent.
+    """
+    temperature = 0.8
+    cache_key = _generation_cache_key(prompt, temperature)
+    cached = get_generation_cache().get(cache_key)
+    if cached is not None:
+        logging.info(f"Generation cache hit for product {row.get('id', 'Unknown')}")
+        return cached, 0, 0.0
+    
+    tiers = generation_cascade.models if generation_cascade is not None else [model]
+    sent = {}
+    stream_error = None
+    
+    def reset():
+        nonlocal sent
+        if sent:
+            emit({"type": "reset"})
+            sent = {}
+    
+    async def attempt(tier_model, last_tier):
+        nonlocal sent, stream_error
+        if tier_model is not tiers[0]:
+            reset()
+            ai_text, tokens_used, response_time = await call_gemini_generate_async(
+                model=tier_model,
+                prompt=prompt,
+                temperature=temperature,
+                cost_tracker=cost_tracker,
+                structured=GEMINI_STRUCTURED_OUTPUT
+            )
+            return await _accept_generated(ai_text, row, tier_model, temperature, last_tier, tokens_used, response_time)
+        stream = GenerationStream(tier_model, prompt, temperature=temperature, cost_tracker=cost_tracker,
+                                  structured=GEMINI_STRUCTURED_OUTPUT)
+        try:
+            async for _ in stream:
+                fields = partial_json_fields(stream.text)
+                if fields and fields != sent:
+                    sent = fields
+                    emit({"type": "partial", **fields})
+            return await _accept_generated(
+                stream.text, row, tier_model, temperature, last_tier, stream.tokens_used, stream.response_time
+            )
+        except QualityCheckFailed:
+            raise
+        except Exception as e:
+            stream_error = e
+            raise
+    
+    try:
+        if generation_cascade is not None:
+            result = await generation_cascade.run(attempt)
+        else:
+            result = await attempt(model, True)
+    except Exception as e:
+        if e is not stream_error:
+            raise
+        logging.warning(f"Streamed generation failed for product {row.get('id', 'Unknown')}, falling back: {e}")
+        reset()
+        return await _generate_validated(prompt, row, temperature=temperature)
+    get_generation_cache().set(cache_key, result[0])
+    return result
+
+@app.post("/api/generate-description/stream")
+async def generate_description_stream(
+    title: str = Form(...),
+    features: str = Form(...),
+    category: str = Form("generic"),
+    primary_keyword: str = Form(""),
+    tone: str = Form("professional"),
+    sku: str = Form(""),
+    languageCode: str = Form("en"),
+    promptVariant: str = Form(""),
+    user = Depends(get_current_user)
+):
+    """
+    Generate a single product description, streamed as server-sent events.
+    
+    ``partial`` events carry the title and description parsed so far, a
+    ``reset`` event means the partial output is being regenerated, and the
+    final ``result`` event carries the same data as ``/api/generate-description``
+    (validated answer, SEO score, credits). Errors end the stream with ``failed``.
+    """
     if model is None or credit_service is None:
         raise HTTPException(status_code=500, detail="AI model or credit service not initialized")
     
     user_id = user.get("uid")
+    operation_type, credit_info = await _check_single_description_credits(user_id)
+    row = _single_description_row(title, features, category, primary_keyword, tone, sku, languageCode, promptVariant)
+    prompt = build_product_prompt(row)
+    usage_id = set_usage_context(user_id=user_id)
     
-    # Check and refresh credits if needed
-    await credit_service.check_and_refresh_credits(user_id)
+    async def produce(queue):
+        # Runs as its own task so the deadline scope never spans a yield to the client
+        try:
+            with generation_deadline():
+                validated, tokens_used, response_time = await _stream_validated(prompt, row, queue.put_nowait)
+            data = await _finish_single_description(
+                row, validated, tokens_used, response_time, usage_id, user_id, operation_type, credit_info
+            )
+            queue.put_nowait({"type": "result", "success": True, "data": data})
+        except Exception as e:
+            logging.error(f"Error streaming description: {str(e)}")
+            status_code, detail = _generation_error_status(e)
+            if isinstance(e, ValueError):
+                detail = f"Description generation failed compliance validation: {e}"
+            queue.put_nowait({"type": "failed", "success": False, "status": status_code, "error": detail})
     
+    async def body():
+        queue = asyncio.Queue()
+        task = asyncio.create_task(produce(queue))
+        try:
+            while True:
+                record = await queue.get()
+                yield _encode_stream_record(record, "sse")
+                if record["type"] in ("result", "failed"):
+                    break
+        finally:
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_FORMATS["sse"],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _parse_batch_request(request):
+    """Return ``(products, tone, style, language_code)`` from a batch request body"""
     # Handle both old format (array of products) and new format (batch request)
     if isinstance(request, list):
         # Legacy format - array of products
@@ -531,209 +763,168 @@ async def generate_batch_json(request: Dict[str, Any], user = Depends(get_curren
         batch_tone = request.get("batchTone", "professional")
         batch_style = request.get("batchStyle", "amazon")
         language_code = request.get("languageCode", "en")
+        # Batch-level prompt variant; products may also set their own "prompt_variant"
+        variant = _checked_prompt_variant(request.get("promptVariant"))
+        if variant:
+            products = [dict(product, prompt_variant=product.get("prompt_variant") or variant) for product in products]
     
     # Validate language code
     SUPPORTED_LANGUAGES = ['en', 'es', 'fr', 'de', 'ja', 'zh']
     if language_code not in SUPPORTED_LANGUAGES:
         raise HTTPException(status_code=400, detail=f"Unsupported language code: {language_code}")
     
-    # Determine operation type and check credits
-    product_count = len(products)
-    operation_type = credit_service.determine_operation_type(product_count, is_regeneration=False)
-    
-    can_proceed, credit_info = await credit_service.check_credits_and_limits(
-        user_id, operation_type, product_count
-    )
-    
-    if not can_proceed:
-        raise HTTPException(
-            status_code=402,  # Payment Required
-            detail={
-                "error": credit_info.get("error"),
-                "upgrade_required": credit_info.get("upgrade_required", False),
-                "current_credits": credit_info.get("current_credits", 0),
-                "required_credits": credit_info.get("required_credits", 1),
-                "subscription_tier": credit_info.get("subscription_tier", "free"),
-                "operation_type": operation_type.value,
-                "product_count": product_count,
-                "rate_limits": credit_info.get("rate_limits", {})
+    return products, batch_tone, batch_style, language_code
+
+def _batch_row(idx, product, batch_tone, batch_style, language_code):
+    """Convert a JSON batch product to the row dict format used by the prompt builder"""
+    return {
+        "id": product.get("id", f"product_{idx}"),
+        "sku": product.get("sku", ""),
+        "title": product.get("product_name", ""),  # Frontend sends product_name
+        "category": product.get("category", "generic"),
+        "features": product.get("features", ""),
+        "primary_keyword": product.get("keywords", ""),  # Frontend sends keywords
+        "audience": product.get("audience", "general consumers"),  # Frontend sends audience
+        "tone": batch_tone,  # Use batch-level tone
+        "style_variation": batch_style,  # Use batch-level style
+        "languageCode": language_code,  # Use batch-level language
+        "prompt_variant": _checked_prompt_variant(product.get("prompt_variant"))
+    }
+
+async def _generate_batch_item(idx, product, batch_tone, batch_style, language_code, pregenerated=None):
+    """
+    Generate one product of a JSON batch.
+
+    Returns ``("item", result)`` or ``("error", error)``. Raises ``BatchStopped``
+    when the API quota is exhausted so the rest of the batch is not attempted.
+    ``pregenerated`` is a ``(validated, tokens_used, response_time)`` result
+    already produced by a packed prompt.
+    """
+    try:
+        # Convert to row dict format
+        row_dict = _batch_row(idx, product, batch_tone, batch_style, language_code)
+        
+        # Basic validation for required fields
+        if not row_dict["title"] or not row_dict["features"]:
+            return "error", {
+                "row": idx,
+                "id": row_dict.get("id", ""),
+                "error": "Missing required fields: product_name and features are required"
             }
+        
+        # Validate input
+        is_valid, validation_msg = safety_filter.validate_input(
+            row_dict["title"] + " " + row_dict["features"]
         )
-    
-    try:
-        results = []
-        errors = []
+        if not is_valid:
+            return "error", {
+                "row": idx,
+                "id": row_dict.get("id", ""),
+                "error": f"Invalid input: {validation_msg}"
+            }
         
-        for idx, product in enumerate(products):
+        # Build prompt and generate
+        prompt = build_product_prompt(row_dict)
+        tokens_used = 0
+        response_time = 0
+        
+        try:
+            logging.info(f"Generating content for language: {language_code}")
             try:
-                # Convert to row dict format
-                row_dict = {
-                    "id": product.get("id", f"product_{idx}"),
-                    "sku": product.get("sku", ""),
-                    "title": product.get("product_name", ""),  # Frontend sends product_name
-                    "category": product.get("category", "generic"),
-                    "features": product.get("features", ""),
-                    "primary_keyword": product.get("keywords", ""),  # Frontend sends keywords
-                    "audience": product.get("audience", "general consumers"),  # Frontend sends audience
-                    "tone": batch_tone,  # Use batch-level tone
-                    "style_variation": batch_style,  # Use batch-level style
-                    "languageCode": language_code  # Use batch-level language
+                if pregenerated is not None:
+                    validated, tokens_used, response_time = pregenerated
+                else:
+                    validated, tokens_used, response_time = await _generate_validated(
+                        prompt, row_dict, temperature=0.8  # Increased for more creative and persuasive content
+                    )
+            except ValueError as validation_error:
+                return "error", {
+                    "row": idx,
+                    "id": row_dict.get("id", ""),
+                    "error": f"Description generation failed compliance validation: {validation_error}"
                 }
-                
-                # Basic validation for required fields
-                if not row_dict["title"] or not row_dict["features"]:
-                    errors.append({
-                        "row": idx,
-                        "id": row_dict.get("id", ""),
-                        "error": "Missing required fields: product_name and features are required"
-                    })
-                    continue
-                
-                # Validate input
-                is_valid, validation_msg = safety_filter.validate_input(
-                    row_dict["title"] + " " + row_dict["features"]
-                )
-                if not is_valid:
-                    errors.append({
-                        "row": idx,
-                        "id": row_dict.get("id", ""),
-                        "error": f"Invalid input: {validation_msg}"
-                    })
-                    continue
-                
-                # Build prompt and generate
-                prompt = build_gemini_prompt(row_dict)
-                parsed = None
-                tokens_used = 0
-                response_time = 0
-                
+            
+            logging.info(f"Validated JSON: {validated}")
+            
+            # Validate that the generated content is in the requested language
+            if language_code != "en" and validated.get("description", ""):
+                # Basic check: if description contains mostly English words, flag as potential issue
+                english_words = ["the", "and", "for", "with", "this", "that", "product", "quality", "features"]
+                description_lower = validated.get("description", "").lower()
+                english_word_count = sum(1 for word in english_words if word in description_lower)
+                if english_word_count > 3:  # If more than 3 common English words, might be in English
+                    logging.warning(f"Generated content for language {language_code} may contain English text")
+            
+        except Exception as gen_error:
+            error_msg = str(gen_error)
+            logging.error(f"Generation error for product {row_dict.get('id', 'Unknown')}: {error_msg}")
+            logging.error(f"Error type: {type(gen_error).__name__}")
+            
+            # Enhanced error handling with specific error types
+            if "QUOTA_EXCEEDED" in error_msg:
+                logging.error("API quota exceeded - stopping batch processing")
+                raise BatchStopped(("error", {
+                    "row": idx,
+                    "id": row_dict.get("id", ""),
+                    "error": "API quota exceeded - please try again later"
+                }))  # Stop processing if quota exceeded
+            elif "SAFETY_FILTER" in error_msg:
+                logging.warning(f"Content blocked by safety filters for product: {row_dict.get('title', 'Unknown')}")
+                return "error", {
+                    "row": idx,
+                    "id": row_dict.get("id", ""),
+                    "error": "Content blocked by safety filters - please review product details"
+                }
+            elif "NETWORK_ERROR" in error_msg:
+                logging.warning(f"Network error for product: {row_dict.get('title', 'Unknown')} - will retry")
+                return "error", {
+                    "row": idx,
+                    "id": row_dict.get("id", ""),
+                    "error": "Network error - please try again"
+                }
+            elif "CIRCUIT_OPEN" in error_msg:
+                return "error", {
+                    "row": idx,
+                    "id": row_dict.get("id", ""),
+                    "error": "AI service temporarily unavailable - please try again shortly"
+                }
+            elif "DEADLINE_EXCEEDED" in error_msg:
+                # The fallbacks below would share the same spent budget
+                return "error", {
+                    "row": idx,
+                    "id": row_dict.get("id", ""),
+                    "error": "Generation timed out - please try again"
+                }
+            elif "RETRY_EXHAUSTED" in error_msg:
+                logging.warning(f"All retry attempts exhausted for product: {row_dict.get('title', 'Unknown')}")
+                return "error", {
+                    "row": idx,
+                    "id": row_dict.get("id", ""),
+                    "error": "API retry attempts exhausted - please try again later"
+                }
+            
+            # Try a fallback with English if non-English fails
+            if language_code != "en":
+                logging.info(f"Attempting fallback to English for product: {row_dict.get('title', 'Unknown')}")
                 try:
-                    logging.info(f"Generating content for language: {language_code}")
-                    # TEMPORARILY DISABLED FOR TESTING - rate_limit_api_call()  # Add rate limiting
-                    ai_text, tokens_used, response_time = call_gemini_generate(
-                        model=model,
-                        prompt=prompt,
-                        temperature=0.8,  # Increased for more creative and persuasive content
-                        cost_tracker=cost_tracker
-                    )
-                    
-                    logging.info(f"AI response received: {ai_text[:200]}...")
-                    
-                    # Parse and process with compliance validation
-                    ai_text = safety_filter.sanitize_output(ai_text)
-                    try:
-                        parsed = safe_extract_json(ai_text)
-                        validated = validate_and_ensure_compliance(parsed)
-                    except ValueError as validation_error:
-                        # If compliance validation fails, try to generate fallback bullets
-                        logging.warning(f"Compliance validation failed for product {row_dict.get('id', 'Unknown')}: {validation_error}")
-                        try:
-                            # Extract what we can from the response
-                            fallback_parsed = safe_extract_json(ai_text)
-                            if fallback_parsed.get("title") and fallback_parsed.get("description"):
-                                # Generate fallback bullets
-                                fallback_bullets = generate_fallback_bullets(
-                                    fallback_parsed.get("title", ""),
-                                    fallback_parsed.get("description", ""),
-                                    row_dict.get("features", "")
-                                )
-                                validated = {
-                                    "title": fallback_parsed.get("title", row_dict.get("title", "")),
-                                    "description": fallback_parsed.get("description", ""),
-                                    "bullets": fallback_bullets,
-                                    "meta": fallback_parsed.get("meta", "")
-                                }
-                                logging.info(f"Used fallback bullets for product {row_dict.get('id', 'Unknown')}")
-                            else:
-                                raise validation_error
-                        except Exception as fallback_error:
-                            logging.error(f"Fallback generation failed for product {row_dict.get('id', 'Unknown')}: {fallback_error}")
-                            errors.append({
-                                "row": idx,
-                                "id": row_dict.get("id", ""),
-                                "error": f"Description generation failed compliance validation: {validation_error}"
-                            })
-                            continue
-                    
-                    logging.info(f"Validated JSON: {validated}")
+                    # Create a simple English fallback
+                    fallback_row = row_dict.copy()
+                    fallback_row["languageCode"] = "en"
+                    fallback_prompt = build_product_prompt(fallback_row)
                     
-                    # Validate that the generated content is in the requested language
-                    if language_code != "en" and validated.get("description", ""):
-                        # Basic check: if description contains mostly English words, flag as potential issue
-                        english_words = ["the", "and", "for", "with", "this", "that", "product", "quality", "features"]
-                        description_lower = validated.get("description", "").lower()
-                        english_word_count = sum(1 for word in english_words if word in description_lower)
-                        if english_word_count > 3:  # If more than 3 common English words, might be in English
-                            logging.warning(f"Generated content for language {language_code} may contain English text")
+                    validated, tokens_used, response_time = await _generate_validated(
+                        fallback_prompt, row_dict, temperature=0.8  # Increased for more creative and persuasive content
+                    )
                     
-                except Exception as gen_error:
-                    error_msg = str(gen_error)
-                    logging.error(f"Generation error for product {row_dict.get('id', 'Unknown')}: {error_msg}")
-                    logging.error(f"Error type: {type(gen_error).__name__}")
+                    logging.info(f"Fallback to English successful")
                     
-                    # Enhanced error handling with specific error types
-                    if "QUOTA_EXCEEDED" in error_msg:
-                        logging.error("API quota exceeded - stopping batch processing")
-                        errors.append({
-                            "row": idx,
-                            "id": row_dict.get("id", ""),
-                            "error": "API quota exceeded - please try again later"
-                        })
-                        break  # Stop processing if quota exceeded
-                    elif "SAFETY_FILTER" in error_msg:
-                        logging.warning(f"Content blocked by safety filters for product: {row_dict.get('title', 'Unknown')}")
-                        errors.append({
-                            "row": idx,
-                            "id": row_dict.get("id", ""),
-                            "error": "Content blocked by safety filters - please review product details"
-                        })
-                        continue
-                    elif "NETWORK_ERROR" in error_msg:
-                        logging.warning(f"Network error for product: {row_dict.get('title', 'Unknown')} - will retry")
-                        errors.append({
-                            "row": idx,
-                            "id": row_dict.get("id", ""),
-                            "error": "Network error - please try again"
-                        })
-                        continue
-                    elif "RETRY_EXHAUSTED" in error_msg:
-                        logging.warning(f"All retry attempts exhausted for product: {row_dict.get('title', 'Unknown')}")
-                        errors.append({
-                            "row": idx,
-                            "id": row_dict.get("id", ""),
-                            "error": "API retry attempts exhausted - please try again later"
-                        })
-                        continue
+                except Exception as fallback_error:
+                    logging.error(f"Fallback to English also failed: {str(fallback_error)}")
                     
-                    # Try a fallback with English if non-English fails
-                    if language_code != "en":
-                        logging.info(f"Attempting fallback to English for product: {row_dict.get('title', 'Unknown')}")
-                        try:
-                            # Create a simple English fallback
-                            fallback_row = row_dict.copy()
-                            fallback_row["languageCode"] = "en"
-                            fallback_prompt = build_gemini_prompt(fallback_row)
-                            
-                            # TEMPORARILY DISABLED FOR TESTING - rate_limit_api_call()  # Add rate limiting
-                            ai_text, tokens_used, response_time = call_gemini_generate(
-                                model=model,
-                                prompt=fallback_prompt,
-                                temperature=0.8,  # Increased for more creative and persuasive content
-                                cost_tracker=cost_tracker
-                            )
-                            
-                            ai_text = safety_filter.sanitize_output(ai_text)
-                            parsed = safe_extract_json(ai_text)
-                            
-                            logging.info(f"Fallback to English successful")
-                            
-                        except Exception as fallback_error:
-                            logging.error(f"Fallback to English also failed: {str(fallback_error)}")
-                            
-                            # Try one more time with an even simpler approach
-                            try:
-                                logging.info(f"Attempting ultra-simple English generation")
-                                simple_prompt = f"""Create a product description for: {row_dict.get('title', 'Product')}
+                    # Try one more time with an even simpler approach
+                    try:
+                        logging.info(f"Attempting ultra-simple English generation")
+                        simple_prompt = f"""Create a product description for: {row_dict.get('title', 'Product')}
 
 Features: {row_dict.get('features', '')}
 Audience: {row_dict.get('audience', 'general consumers')}
@@ -745,100 +936,456 @@ Return JSON:
   "bullets": ["Benefit 1", "Benefit 2", "Benefit 3"],
   "meta": "Meta description"
 }}"""
-                                
-                                # TEMPORARILY DISABLED FOR TESTING - rate_limit_api_call()  # Add rate limiting
-                                ai_text, tokens_used, response_time = call_gemini_generate(
-                                    model=model,
-                                    prompt=simple_prompt,
-                                    temperature=0.8,  # Increased for more creative and persuasive content
-                                    cost_tracker=cost_tracker
-                                )
-                                
-                                ai_text = safety_filter.sanitize_output(ai_text)
-                                parsed = safe_extract_json(ai_text)
-                                
-                                logging.info(f"Ultra-simple English generation successful")
-                                
-                            except Exception as simple_error:
-                                logging.error(f"Ultra-simple generation also failed: {str(simple_error)}")
-                                errors.append({
-                                    "row": idx,
-                                    "id": row_dict.get("id", ""),
-                                    "error": f"All generation attempts failed for language {language_code}: {str(gen_error)}"
-                                })
-                                continue
-                    else:
-                        errors.append({
+                        
+                        validated, tokens_used, response_time = await _generate_validated(
+                            simple_prompt, row_dict, temperature=0.8  # Increased for more creative and persuasive content
+                        )
+                        
+                        logging.info(f"Ultra-simple English generation successful")
+                        
+                    except Exception as simple_error:
+                        logging.error(f"Ultra-simple generation also failed: {str(simple_error)}")
+                        return "error", {
                             "row": idx,
                             "id": row_dict.get("id", ""),
-                            "error": f"Generation failed for language {language_code}: {str(gen_error)}"
-                        })
-                        continue
-                
-                result = {
-                    "id": row_dict["id"],
-                    "product_name": validated.get("title", row_dict["title"]),
-                    "category": row_dict["category"],
-                    "audience": row_dict.get("audience", "general consumers"),
-                    "description": validated.get("description", ""),
-                    "keywords": row_dict.get("primary_keyword", ""),
-                    "features": row_dict["features"],  # Include original features
-                    "tone": batch_tone,  # Include batch-level tone
-                    "style_variation": batch_style,  # Include batch-level style variation
-                    "languageCode": language_code,  # Include batch-level language
-                    "bullets": validated.get("bullets", []),
-                    "meta": validated.get("meta", ""),
-                    "seo_score": seo_evaluate(validated.get("description", ""), row_dict.get("primary_keyword", "")),
-                    "tokens_used": tokens_used,
-                    "response_time": response_time
-                }
-                
-                results.append(result)
-                
-                # TEMPORARILY DISABLED FOR TESTING - Add delay between API calls to avoid rate limits
-                # if idx < len(products) - 1:  # Don't delay after the last item
-                #     import time
-                #     time.sleep(2)
-                
-            except Exception as e:
-                errors.append({
+                            "error": f"All generation attempts failed for language {language_code}: {str(gen_error)}"
+                        }
+            else:
+                return "error", {
                     "row": idx,
-                    "id": product.get("id", ""),
-                    "error": str(e)
-                })
-        
-        # Deduct credits after successful batch generation
-        batch_id = f"batch_{timestamp()}"
-        deduct_success, deduct_result = await credit_service.deduct_credits(
-            user_id, operation_type, product_count, batch_id=batch_id
-        )
-        if not deduct_success:
-            logging.warning(f"Failed to deduct credits for user {user_id}: {deduct_result.get('error')}")
+                    "id": row_dict.get("id", ""),
+                    "error": f"Generation failed for language {language_code}: {str(gen_error)}"
+                }
         
-        return {
-            "success": True,
-            "batch_id": batch_id,
-            "items": results,
+        result = {
+            "id": row_dict["id"],
+            "product_name": validated.get("title", row_dict["title"]),
+            "category": row_dict["category"],
+            "audience": row_dict.get("audience", "general consumers"),
+            "description": validated.get("description", ""),
+            "keywords": row_dict.get("primary_keyword", ""),
+            "features": row_dict["features"],  # Include original features
+            "tone": batch_tone,  # Include batch-level tone
+            "style_variation": batch_style,  # Include batch-level style variation
+            "languageCode": language_code,  # Include batch-level language
+            "bullets": validated.get("bullets", []),
+            "meta": validated.get("meta", ""),
+            "seo_score": seo_evaluate(validated.get("description", ""), row_dict.get("primary_keyword", "")),
+            "tokens_used": tokens_used,
+            "response_time": response_time
+        }
+        
+        return "item", result
+        
+    except BatchStopped:
+        raise
+    except Exception as e:
+        return "error", {
+            "row": idx,
+            "id": product.get("id", ""),
+            "error": str(e)
+        }
+
+async def _generate_packed(rows, temperature=0.8):
+    """
+    Generate several rows with shared packed prompts.
+    
+    Returns ``{position: (validated, tokens_used, response_time)}`` for the rows
+    that were served from the cache or answered by the packed call; the other
+    positions are left for single-product generation. Packed calls go to the
+    first cascade tier, and their answers must pass the same checks as a
+    single call on that tier before they are used or cached.
+    """
+    generation_cache = get_generation_cache()
+    results = {}
+    pending = []
+    for pos, row in enumerate(rows):
+        cache_key = _generation_cache_key(build_product_prompt(row), temperature)
+        cached = generation_cache.get(cache_key)
+        if cached is not None:
+            results[pos] = (cached, 0, 0.0)
+        else:
+            pending.append((pos, row, cache_key))
+    
+    if len(pending) > 1:
+        tiers = generation_cascade.models if generation_cascade is not None else [model]
+        packed = await generate_packed_async(
+            tiers[0], [row for _, row, _ in pending], temperature=temperature,
+            cost_tracker=cost_tracker, sanitize=safety_filter.sanitize_output
+        )
+        for slot, (pos, row, cache_key) in enumerate(pending):
+            if slot not in packed:
+                continue
+            validated, tokens_used, response_time = packed[slot]
+            try:
+                result = await _accept_generated(
+                    json.dumps(validated), row, tiers[0], temperature, len(tiers) == 1, tokens_used, response_time
+                )
+            except QualityCheckFailed as e:
+                logging.info(f"Packed answer for product {row.get('id', 'Unknown')} rejected, generating it singly: {e}")
+                continue
+            generation_cache.set(cache_key, result[0])
+            results[pos] = result
+    return results
+
+def _packable(row):
+    """Rows that would be rejected before generation are left out of packed prompts"""
+    if not row.get("title") or not row.get("features"):
+        return False
+    is_valid, _ = safety_filter.validate_input(row["title"] + " " + row["features"])
+    return is_valid
+
+async def _generate_pack(pack, generate_item):
+    """
+    Generate one pack of ``((idx, item), row)`` pairs.
+    
+    Products the packed answer covers are finished with their pregenerated
+    result; the rest go through ``generate_item`` as single calls.
+    """
+    packable = [(pos, row) for pos, (_, row) in enumerate(pack) if _packable(row)]
+    with generation_deadline():
+        pregenerated = await _generate_packed([row for _, row in packable])
+    by_pos = {pos: pregenerated[slot] for slot, (pos, _) in enumerate(packable) if slot in pregenerated}
+    
+    results = await asyncio.gather(
+        *(generate_item(idx, item, by_pos.get(pos)) for pos, ((idx, item), _) in enumerate(pack)),
+        return_exceptions=True
+    )
+    pairs = []
+    stop = None
+    for ((idx, _), _), outcome in zip(pack, results):
+        if isinstance(outcome, BatchStopped):
+            stop = stop or outcome
+            pairs.append((idx, outcome.outcome))
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            pairs.append((idx, outcome))
+    if stop is not None:
+        raise BatchStopped(pairs)
+    return pairs
+
+def _iter_batch_outcomes(items, generate_item, make_row):
+    """
+    Yield ``(idx, outcome)`` for a synchronous batch as items complete.
+    
+    With ``GENERATION_PACK_SIZE`` > 1, compatible products are packed into
+    shared prompts; ``generate_item(idx, item, pregenerated)`` finishes each one.
+    """
+    async def generate_within_deadline(idx, item, pregenerated=None):
+        # Each product gets its own generation budget, shared by its retries and fallbacks
+        with generation_deadline():
+            return await generate_item(idx, item, pregenerated)
+    
+    if GENERATION_PACK_SIZE <= 1:
+        return iter_batch(items, lambda idx, item: generate_within_deadline(idx, item, None))
+    if hasattr(items, "__aiter__"):
+        async def keyed_rows():
+            idx = 0
+            async for item in items:
+                yield (idx, item), make_row(idx, item)
+                idx += 1
+        packs = aiter_packs(keyed_rows(), GENERATION_PACK_SIZE)
+    else:
+        packs = iter_packs((((idx, item), make_row(idx, item)) for idx, item in enumerate(items)), GENERATION_PACK_SIZE)
+    return iter_grouped_batch(packs, lambda pack: _generate_pack(pack, generate_within_deadline))
+
+async def _run_batch_outcomes(items, generate_item, make_row):
+    """Collect ``_iter_batch_outcomes`` in input order (``None`` for items never attempted)"""
+    if hasattr(items, "__aiter__"):
+        # The item count is known only once the items have run out
+        completed = {}
+        async for idx, outcome in _iter_batch_outcomes(items, generate_item, make_row):
+            completed[idx] = outcome
+        return [completed.get(idx) for idx in range(max(completed, default=-1) + 1)]
+    outcomes = [None] * len(items)
+    async for idx, outcome in _iter_batch_outcomes(items, generate_item, make_row):
+        outcomes[idx] = outcome
+    return outcomes
+
+async def _finalize_batch(user_id, operation_type, product_count, credit_info, total_processed, total_errors, usage_id=None):
+    """Deduct credits for a finished batch and return its summary fields"""
+    batch_id = f"batch_{timestamp()}"
+    deduct_success, deduct_result = await credit_service.deduct_credits(
+        user_id, operation_type, product_count, batch_id=batch_id
+    )
+    if not deduct_success:
+        logging.warning(f"Failed to deduct credits for user {user_id}: {deduct_result.get('error')}")
+    
+    return {
+        "batch_id": batch_id,
+        "total_processed": total_processed,
+        "total_errors": total_errors,
+        "total_cost": cost_tracker.get_request_cost(usage_id) if usage_id else 0.0,
+        "credits_used": credit_info.get("required_credits", 1),
+        "remaining_credits": deduct_result.get("remaining_credits", 0),
+        "operation_type": operation_type.value,
+        "subscription_tier": credit_info.get("subscription_tier", "free"),
+        "product_count": product_count
+    }
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream"
+}
+
+def _validate_stream_format(stream):
+    if stream is not None and stream not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {stream} (use ndjson or sse)")
+
+def _encode_stream_record(record, stream_format):
+    data = json.dumps(record, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {record['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+def _batch_stream_response(outcomes, stream_format, finalize):
+    """
+    Stream batch outcomes as NDJSON or server-sent events.
+    
+    Emits ``{"type": "item"}`` / ``{"type": "error"}`` records as items complete and a
+    final ``{"type": "summary"}`` record once credits have been deducted.
+    """
+    async def body():
+        total_processed = 0
+        total_errors = 0
+        try:
+            async for idx, outcome in outcomes:
+                if outcome is None:
+                    continue  # Not attempted because the batch was stopped
+                kind, payload = outcome
+                if kind == "item":
+                    total_processed += 1
+                    yield _encode_stream_record({"type": "item", "row": idx, "item": payload}, stream_format)
+                else:
+                    total_errors += 1
+                    yield _encode_stream_record({"type": "error", "row": idx, "error": payload}, stream_format)
+            
+            summary = await finalize(total_processed, total_errors)
+            yield _encode_stream_record({"type": "summary", "success": True, **summary}, stream_format)
+        except Exception as e:
+            logging.error(f"Error streaming batch: {str(e)}")
+            yield _encode_stream_record({"type": "failed", "success": False, "error": f"Batch processing failed: {str(e)}"}, stream_format)
+    
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_FORMATS[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/generate-batch")
+async def generate_batch_json(request: Dict[str, Any], stream: Optional[str] = None, user = Depends(get_current_user)):
+    """
+    Generate descriptions for multiple products from batch request.
+    
+    With ``?stream=ndjson`` or ``?stream=sse`` each item or error is sent as soon
+    as it completes, followed by a summary record.
+    """
+    logging.info(f"🚀 Generate batch endpoint called - user: {user.get('email', 'unknown')}")
+    if model is None or credit_service is None:
+        raise HTTPException(status_code=500, detail="AI model or credit service not initialized")
+    _validate_stream_format(stream)
+    
+    user_id = user.get("uid")
+    
+    # Check and refresh credits if needed
+    await credit_service.check_and_refresh_credits(user_id)
+    
+    products, batch_tone, batch_style, language_code = _parse_batch_request(request)
+    
+    # Determine operation type and check credits
+    product_count = len(products)
+    operation_type = credit_service.determine_operation_type(product_count, is_regeneration=False)
+    
+    can_proceed, credit_info = await credit_service.check_credits_and_limits(
+        user_id, operation_type, product_count
+    )
+    
+    if not can_proceed:
+        raise HTTPException(
+            status_code=402,  # Payment Required
+            detail={
+                "error": credit_info.get("error"),
+                "upgrade_required": credit_info.get("upgrade_required", False),
+                "current_credits": credit_info.get("current_credits", 0),
+                "required_credits": credit_info.get("required_credits", 1),
+                "subscription_tier": credit_info.get("subscription_tier", "free"),
+                "operation_type": operation_type.value,
+                "product_count": product_count,
+                "rate_limits": credit_info.get("rate_limits", {})
+            }
+        )
+    
+    def generate_item(idx, product, pregenerated=None):
+        return _generate_batch_item(idx, product, batch_tone, batch_style, language_code, pregenerated)
+    
+    def make_row(idx, product):
+        return _batch_row(idx, product, batch_tone, batch_style, language_code)
+    
+    usage_id = set_usage_context(user_id=user_id)
+    
+    async def finalize(total_processed, total_errors):
+        return await _finalize_batch(user_id, operation_type, product_count, credit_info, total_processed, total_errors, usage_id)
+    
+    if stream:
+        return _batch_stream_response(_iter_batch_outcomes(products, generate_item, make_row), stream, finalize)
+    
+    try:
+        outcomes = await _run_batch_outcomes(products, generate_item, make_row)
+        
+        results = []
+        errors = []
+        for outcome in outcomes:
+            if outcome is None:
+                continue  # Not attempted because the batch was stopped
+            kind, payload = outcome
+            if kind == "item":
+                results.append(payload)
+            else:
+                errors.append(payload)
+        
+        # Deduct credits after successful batch generation
+        summary = await finalize(len(results), len(errors))
+        
+        return {
+            "success": True,
+            "items": results,
             "errors": errors,
-            "total_processed": len(results),
-            "total_errors": len(errors),
-            "total_cost": cost_tracker.get_current_cost(),
-            "credits_used": credit_info.get("required_credits", 1),
-            "remaining_credits": deduct_result.get("remaining_credits", 0),
-            "operation_type": operation_type.value,
-            "subscription_tier": credit_info.get("subscription_tier", "free"),
-            "product_count": product_count
+            **summary
         }
         
     except Exception as e:
         logging.error(f"Error processing JSON batch: {str(e)}")
         raise HTTPException(status_code=500, detail=f"JSON batch processing failed: {str(e)}")
 
+async def _generate_csv_item(idx, row_dict, pregenerated=None):
+    """Generate one mapped CSV row; returns ``("item", result)`` or ``("error", error)``"""
+    try:
+        # Validate input
+        is_valid, validation_msg = safety_filter.validate_input(
+            row_dict["title"] + " " + row_dict["features"]
+        )
+        if not is_valid:
+            return "error", {
+                "row": idx,
+                "id": row_dict.get("id", ""),
+                "error": f"Invalid input: {validation_msg}"
+            }
+        
+        # Build prompt and generate
+        prompt = build_product_prompt(row_dict)
+        try:
+            if pregenerated is not None:
+                validated, tokens_used, response_time = pregenerated
+            else:
+                validated, tokens_used, response_time = await _generate_validated(
+                    prompt, row_dict, temperature=0.8  # Increased for more creative and persuasive content
+                )
+        except ValueError as validation_error:
+            return "error", {
+                "row": idx,
+                "id": row_dict.get("id", ""),
+                "error": f"CSV description generation failed compliance validation: {validation_error}"
+            }
+        
+        result = {
+            "id": row_dict["id"],
+            "product_name": validated.get("title", row_dict["title"]),
+            "category": row_dict["category"],
+            "audience": row_dict["audience"],
+            "description": validated.get("description", ""),
+            "keywords": row_dict.get("primary_keyword", ""),
+            "features": row_dict["features"],  # Include original features
+            "tone": "professional",  # Default tone for CSV batch
+            "style_variation": "standard",  # Default style for CSV batch
+            "languageCode": row_dict["languageCode"],  # Include language from CSV batch
+            "bullets": validated.get("bullets", []),
+            "meta": validated.get("meta", ""),
+            "seo_score": seo_evaluate(validated.get("description", ""), row_dict.get("primary_keyword", "")),
+            "tokens_used": tokens_used,
+            "response_time": response_time
+        }
+        
+        return "item", result
+        
+    except Exception as e:
+        return "error", {
+            "row": idx,
+            "id": row_dict.get("id", ""),
+            "error": str(e)
+        }
+
+class _IncrementalCredits:
+    """Credit checks for a CSV batch whose size is known only as it is parsed"""
+    
+    def __init__(self, user_id, operation_type):
+        self.user_id = user_id
+        self.operation_type = operation_type
+        self.admitted = 0
+        self.credit_info = {}
+        self.refusal = None
+    
+    async def admit(self, count):
+        """Admit ``count`` more rows if the user's credits cover every row admitted so far"""
+        can_proceed, credit_info = await credit_service.check_credits_and_limits(
+            self.user_id, self.operation_type, self.admitted + count
+        )
+        if not can_proceed:
+            self.refusal = credit_info
+            return False
+        self.admitted += count
+        self.credit_info = credit_info
+        return True
+
+def _insufficient_credits(credit_info, operation_type, product_count):
+    return HTTPException(
+        status_code=402,  # Payment Required
+        detail={
+            "error": credit_info.get("error"),
+            "upgrade_required": credit_info.get("upgrade_required", False),
+            "current_credits": credit_info.get("current_credits", 0),
+            "required_credits": credit_info.get("required_credits", 1),
+            "subscription_tier": credit_info.get("subscription_tier", "free"),
+            "operation_type": operation_type.value,
+            "product_count": product_count,
+            "rate_limits": credit_info.get("rate_limits", {})
+        }
+    )
+
+async def _csv_row_dicts(reader, frame, credits, mapping, audience, language_code, prompt_variant):
+    """Map rows as their chunks are parsed, stopping before a chunk the user's credits do not cover"""
+    try:
+        while frame is not None:
+            # Automatic column mapping, a whole chunk at a time
+            for row_dict in await asyncio.to_thread(mapping.records, frame, audience, language_code, prompt_variant):
+                yield row_dict
+            frame = await reader.next_frame()
+            if frame is not None and not await credits.admit(len(frame)):
+                logging.warning(f"CSV batch stopped after {credits.admitted} rows: {credits.refusal.get('error')}")
+                break
+    finally:
+        reader.close()
+
+def _credit_stop_error(credits):
+    return {
+        "row": credits.admitted,
+        "id": "",
+        "error": f"Rows from {credits.admitted} on were not processed: {credits.refusal.get('error')}"
+    }
+
+async def _iter_csv_outcomes(outcomes, credits):
+    """CSV batch outcomes, followed by an error for the rows left out when credits ran out"""
+    async for entry in outcomes:
+        yield entry
+    if credits.refusal is not None:
+        yield credits.admitted, ("error", _credit_stop_error(credits))
+
 @app.post("/api/generate-batch-csv")
-async def generate_batch(file: UploadFile = File(...), audience: str = Form(...), languageCode: str = Form("en"), user = Depends(get_current_user)):
-    """Generate descriptions for multiple products from CSV with automatic column mapping"""
+async def generate_batch(file: UploadFile = File(...), audience: str = Form(...), languageCode: str = Form("en"), promptVariant: str = Form(""), stream: Optional[str] = None, user = Depends(get_current_user)):
+    """Generate descriptions for multiple products from CSV with automatic column mapping (``?stream=ndjson|sse`` supported)"""
     if model is None or credit_service is None:
         raise HTTPException(status_code=500, detail="AI model or credit service not initialized")
+    _validate_stream_format(stream)
     
     user_id = user.get("uid")
     
@@ -850,148 +1397,65 @@ async def generate_batch(file: UploadFile = File(...), audience: str = Form(...)
     if languageCode not in SUPPORTED_LANGUAGES:
         raise HTTPException(status_code=400, detail=f"Unsupported language code: {languageCode}")
     
+    variant = _checked_prompt_variant(promptVariant)
+    
     try:
-        # Read CSV file
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-        
-        # Get column names for mapping
-        columns = df.columns.tolist()
+        upload = await spool_upload(file)
+    except CSVTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    reader = CSVFrameReader(upload)
+    
+    try:
+        # Parse the first chunk; later chunks are parsed while earlier rows generate
+        frame = await reader.next_frame()
+        mapping = CSVColumnMapping(frame.columns if frame is not None else [])
         
-        # Check credits for CSV upload (1 credit per product)
-        product_count = len(df)
+        # Check credits for CSV upload (1 credit per product), one chunk at a time
         operation_type = OperationType.CSV_UPLOAD
+        credits = _IncrementalCredits(user_id, operation_type)
+        if not await credits.admit(len(frame) if frame is not None else 0):
+            raise _insufficient_credits(credits.refusal, operation_type, credits.admitted + (len(frame) if frame is not None else 0))
         
-        can_proceed, credit_info = await credit_service.check_credits_and_limits(
-            user_id, operation_type, product_count
-        )
+        row_dicts = _csv_row_dicts(reader, frame, credits, mapping, audience, languageCode, variant)
+        usage_id = set_usage_context(user_id=user_id)
         
-        if not can_proceed:
-            raise HTTPException(
-                status_code=402,  # Payment Required
-                detail={
-                    "error": credit_info.get("error"),
-                    "upgrade_required": credit_info.get("upgrade_required", False),
-                    "current_credits": credit_info.get("current_credits", 0),
-                    "required_credits": credit_info.get("required_credits", 1),
-                    "subscription_tier": credit_info.get("subscription_tier", "free"),
-                    "operation_type": operation_type.value,
-                    "product_count": product_count,
-                    "rate_limits": credit_info.get("rate_limits", {})
-                }
-            )
+        async def finalize(total_processed, total_errors):
+            return await _finalize_batch(user_id, operation_type, credits.admitted, credits.credit_info, total_processed, total_errors, usage_id)
+        
+        if stream:
+            outcomes = _iter_csv_outcomes(_iter_batch_outcomes(row_dicts, _generate_csv_item, lambda idx, row: row), credits)
+            return _batch_stream_response(outcomes, stream, finalize)
+        
+        outcomes = await _run_batch_outcomes(row_dicts, _generate_csv_item, lambda idx, row: row)
         
         results = []
         errors = []
-        
-        for idx, row in df.iterrows():
-            try:
-                # Use new automatic mapping function
-                row_dict = process_csv_row(row, audience, columns, languageCode)
-                
-                # Validate input
-                is_valid, validation_msg = safety_filter.validate_input(
-                    row_dict["title"] + " " + row_dict["features"]
-                )
-                if not is_valid:
-                    errors.append({
-                        "row": idx,
-                        "id": row_dict.get("id", ""),
-                        "error": f"Invalid input: {validation_msg}"
-                    })
-                    continue
-                
-                # Build prompt and generate
-                prompt = build_gemini_prompt(row_dict)
-                ai_text, tokens_used, response_time = call_gemini_generate(
-                    model=model,
-                    prompt=prompt,
-                    temperature=0.8,  # Increased for more creative and persuasive content
-                    cost_tracker=cost_tracker
-                )
-                
-                # Parse and process with compliance validation
-                ai_text = safety_filter.sanitize_output(ai_text)
-                try:
-                    parsed = safe_extract_json(ai_text)
-                    validated = validate_and_ensure_compliance(parsed)
-                except ValueError as validation_error:
-                    # If compliance validation fails, try to generate fallback bullets
-                    logging.warning(f"Compliance validation failed for CSV product {row_dict.get('id', 'Unknown')}: {validation_error}")
-                    try:
-                        # Extract what we can from the response
-                        fallback_parsed = safe_extract_json(ai_text)
-                        if fallback_parsed.get("title") and fallback_parsed.get("description"):
-                            # Generate fallback bullets
-                            fallback_bullets = generate_fallback_bullets(
-                                fallback_parsed.get("title", ""),
-                                fallback_parsed.get("description", ""),
-                                row_dict.get("features", "")
-                            )
-                            validated = {
-                                "title": fallback_parsed.get("title", row_dict.get("title", "")),
-                                "description": fallback_parsed.get("description", ""),
-                                "bullets": fallback_bullets,
-                                "meta": fallback_parsed.get("meta", "")
-                            }
-                            logging.info(f"Used fallback bullets for CSV product {row_dict.get('id', 'Unknown')}")
-                        else:
-                            raise validation_error
-                    except Exception as fallback_error:
-                        logging.error(f"Fallback generation failed for CSV product {row_dict.get('id', 'Unknown')}: {fallback_error}")
-                        raise HTTPException(status_code=500, detail=f"CSV description generation failed compliance validation: {validation_error}")
-                
-                result = {
-                    "id": row_dict["id"],
-                    "product_name": validated.get("title", row_dict["title"]),
-                    "category": row_dict["category"],
-                    "audience": row_dict["audience"],
-                    "description": validated.get("description", ""),
-                    "keywords": row_dict.get("primary_keyword", ""),
-                    "features": row_dict["features"],  # Include original features
-                    "tone": "professional",  # Default tone for CSV batch
-                    "style_variation": "standard",  # Default style for CSV batch
-                    "languageCode": languageCode,  # Include language from CSV batch
-                    "bullets": validated.get("bullets", []),
-                    "meta": validated.get("meta", ""),
-                    "seo_score": seo_evaluate(validated.get("description", ""), row_dict.get("primary_keyword", "")),
-                    "tokens_used": tokens_used,
-                    "response_time": response_time
-                }
-                
-                results.append(result)
-                
-            except Exception as e:
-                errors.append({
-                    "row": idx,
-                    "id": row_dict.get("id", ""),
-                    "error": str(e)
-                })
+        for outcome in outcomes:
+            if outcome is None:
+                continue  # Not attempted because the batch was stopped
+            kind, payload = outcome
+            if kind == "item":
+                results.append(payload)
+            else:
+                errors.append(payload)
+        if credits.refusal is not None:
+            errors.append(_credit_stop_error(credits))
         
         # Deduct credits after successful CSV batch generation
-        batch_id = f"batch_{timestamp()}"
-        deduct_success, deduct_result = await credit_service.deduct_credits(
-            user_id, operation_type, product_count, batch_id=batch_id
-        )
-        if not deduct_success:
-            logging.warning(f"Failed to deduct credits for user {user_id}: {deduct_result.get('error')}")
+        summary = await finalize(len(results), len(errors))
         
         return {
             "success": True,
-            "batch_id": batch_id,
             "items": results,
             "errors": errors,
-            "total_processed": len(results),
-            "total_errors": len(errors),
-            "total_cost": cost_tracker.get_current_cost(),
-            "credits_used": credit_info.get("required_credits", 1),
-            "remaining_credits": deduct_result.get("remaining_credits", 0),
-            "operation_type": operation_type.value,
-            "subscription_tier": credit_info.get("subscription_tier", "free"),
-            "product_count": product_count
+            **summary
         }
         
+    except HTTPException:
+        reader.close()
+        raise
     except Exception as e:
+        reader.close()
         logging.error(f"Error processing batch: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Batch processing failed: {str(e)}")
 
@@ -1006,6 +1470,41 @@ async def get_usage_stats():
         "data": cost_tracker.get_usage_stats()
     }
 
+@app.get("/api/user/usage")
+async def get_user_usage(user = Depends(get_current_user)):
+    """Get the current user's Gemini token usage and cost since server start"""
+    if cost_tracker is None:
+        raise HTTPException(status_code=500, detail="Cost tracker not initialized")
+    
+    user_id = user.get("uid")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User ID not found in token")
+    
+    return {
+        "success": True,
+        "data": cost_tracker.get_user_usage(user_id)
+    }
+
+@app.get("/api/generation/metrics")
+async def get_generation_metrics():
+    """Generation runtime counters (cache hits/misses, coalesced calls, rate governor state, hedging and latency, repairs, response parsing, streaming, prompt templates, context caches, feature compaction, cascade tiers)"""
+    return {
+        "success": True,
+        "data": {
+            "cache": get_generation_cache().stats(),
+            "singleflight": get_generation_singleflight().stats(),
+            "governor": get_rate_governor().stats(),
+            "hedging": get_hedger().stats(),
+            "repair": get_repairer().stats(),
+            "parsing": get_parse_stats().stats(),
+            "streaming": get_stream_stats().stats(),
+            "prompt_templates": get_template_registry().stats(),
+            "context_cache": context_cache_stats(_llm_backends()),
+            "features": get_feature_compactor().stats(),
+            "cascade": generation_cascade.stats() if generation_cascade is not None else None
+        }
+    }
+
 @app.get("/api/user/credits")
 async def get_user_credit_info(user = Depends(get_current_user)):
     """Get user's credit information and subscription details"""
@@ -1030,26 +1529,213 @@ async def get_user_credit_info(user = Depends(get_current_user)):
         "data": credit_info
     }
 
+async def _process_batch_job_item(item):
+    """Generate one persisted batch job item (called by the background worker)"""
+    options = item["options"]
+    set_usage_context(item["batch_id"], item["user_id"])
+    async with get_process_semaphore():
+        with generation_deadline():
+            if item["kind"] == "csv":
+                return await _generate_csv_item(item["idx"], item["payload"])
+            return await _generate_batch_item(
+                item["idx"],
+                item["payload"],
+                options.get("batchTone", "professional"),
+                options.get("batchStyle", "amazon"),
+                options.get("languageCode", "en")
+            )
+
+async def _finish_batch_job(batch_id):
+    """Deduct credits once a background batch job has processed every item"""
+    snapshot = await asyncio.to_thread(get_batch_job_snapshot, batch_id)
+    if snapshot is None or credit_service is None:
+        return
+    charged_now = await asyncio.to_thread(mark_batch_job_charged, batch_id)
+    if not charged_now:
+        return
+    deduct_success, deduct_result = await credit_service.deduct_credits(
+        snapshot["user_id"], OperationType(snapshot["operation_type"]), snapshot["total_items"], batch_id=batch_id
+    )
+    if not deduct_success:
+        logging.warning(f"Failed to deduct credits for batch job {batch_id}: {deduct_result.get('error')}")
+    logging.info(f"Batch job {batch_id} completed: {summarize_progress(snapshot)}")
+
+async def _submit_batch_job(user_id, kind, operation_type, options, payloads):
+    """Persist a batch job and return the submission response"""
+    if batch_worker is None:
+        raise HTTPException(status_code=503, detail="Background batch processing is not enabled")
+    batch_id = f"batch_{timestamp()}_{uuid.uuid4().hex[:8]}"
+    try:
+        await asyncio.to_thread(
+            create_batch_job, batch_id, user_id, kind, operation_type.value, options, payloads
+        )
+    except Exception as e:
+        logging.error(f"Failed to create batch job: {str(e)}")
+        raise HTTPException(status_code=503, detail="Batch job storage unavailable")
+    
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "batch_id": batch_id,
+        "status": "pending",
+        "product_count": len(payloads),
+        "status_url": f"/batch/{batch_id}",
+        "download_url": f"/download/{batch_id}"
+    })
+
+@app.post("/api/batch-jobs")
+async def submit_batch_json(request: Dict[str, Any], user = Depends(get_current_user)):
+    """Queue a JSON batch for background generation and return its batch_id immediately"""
+    if credit_service is None:
+        raise HTTPException(status_code=500, detail="Credit service not initialized")
+    
+    user_id = user.get("uid")
+    await credit_service.check_and_refresh_credits(user_id)
+    
+    products, batch_tone, batch_style, language_code = _parse_batch_request(request)
+    
+    product_count = len(products)
+    operation_type = credit_service.determine_operation_type(product_count, is_regeneration=False)
+    can_proceed, credit_info = await credit_service.check_credits_and_limits(
+        user_id, operation_type, product_count
+    )
+    
+    if not can_proceed:
+        raise HTTPException(
+            status_code=402,  # Payment Required
+            detail={
+                "error": credit_info.get("error"),
+                "upgrade_required": credit_info.get("upgrade_required", False),
+                "current_credits": credit_info.get("current_credits", 0),
+                "required_credits": credit_info.get("required_credits", 1),
+                "subscription_tier": credit_info.get("subscription_tier", "free"),
+                "operation_type": operation_type.value,
+                "product_count": product_count,
+                "rate_limits": credit_info.get("rate_limits", {})
+            }
+        )
+    
+    options = {"batchTone": batch_tone, "batchStyle": batch_style, "languageCode": language_code}
+    return await _submit_batch_job(user_id, "json", operation_type, options, products)
+
+@app.post("/api/batch-jobs/csv")
+async def submit_batch_csv(file: UploadFile = File(...), audience: str = Form(...), languageCode: str = Form("en"), promptVariant: str = Form(""), user = Depends(get_current_user)):
+    """Queue a CSV batch for background generation and return its batch_id immediately"""
+    if credit_service is None:
+        raise HTTPException(status_code=500, detail="Credit service not initialized")
+    
+    user_id = user.get("uid")
+    await credit_service.check_and_refresh_credits(user_id)
+    
+    # Validate language code
+    SUPPORTED_LANGUAGES = ['en', 'es', 'fr', 'de', 'ja', 'zh']
+    if languageCode not in SUPPORTED_LANGUAGES:
+        raise HTTPException(status_code=400, detail=f"Unsupported language code: {languageCode}")
+    
+    variant = _checked_prompt_variant(promptVariant)
+    
+    try:
+        upload = await spool_upload(file)
+    except CSVTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    reader = CSVFrameReader(upload)
+    
+    payloads = []
+    try:
+        frame = await reader.next_frame()
+        mapping = CSVColumnMapping(frame.columns if frame is not None else [])
+        while frame is not None:
+            for row_dict in await asyncio.to_thread(mapping.records, frame, audience, languageCode, variant):
+                price = row_dict.get("price", "")
+                row_dict["price"] = "" if pd.isna(price) else str(price)  # Keep payload JSON-serializable
+                payloads.append(row_dict)
+            frame = await reader.next_frame()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read CSV: {str(e)}")
+    finally:
+        reader.close()
+    
+    product_count = len(payloads)
+    operation_type = OperationType.CSV_UPLOAD
+    can_proceed, credit_info = await credit_service.check_credits_and_limits(
+        user_id, operation_type, product_count
+    )
+    
+    if not can_proceed:
+        raise HTTPException(
+            status_code=402,  # Payment Required
+            detail={
+                "error": credit_info.get("error"),
+                "upgrade_required": credit_info.get("upgrade_required", False),
+                "current_credits": credit_info.get("current_credits", 0),
+                "required_credits": credit_info.get("required_credits", 1),
+                "subscription_tier": credit_info.get("subscription_tier", "free"),
+                "operation_type": operation_type.value,
+                "product_count": product_count,
+                "rate_limits": credit_info.get("rate_limits", {})
+            }
+        )
+    
+    options = {"audience": audience, "languageCode": languageCode}
+    return await _submit_batch_job(user_id, "csv", operation_type, options, payloads)
+
+async def _load_user_batch_job(batch_id, user):
+    try:
+        snapshot = await asyncio.to_thread(get_batch_job_snapshot, batch_id)
+    except Exception as e:
+        logging.error(f"Failed to load batch job {batch_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail="Batch job storage unavailable")
+    if snapshot is None or snapshot["user_id"] != user.get("uid"):
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return snapshot
+
 @app.get("/batch/{batch_id}")
-async def fetch_batch(batch_id: str):
-    """Fetch a batch by ID (placeholder - in real implementation, store in database)"""
-    # This is a placeholder. In a real implementation, you'd store batches in a database
-    # and retrieve them by ID. For now, return a 404.
-    raise HTTPException(status_code=404, detail="Batch not found. This is a placeholder endpoint.")
+async def fetch_batch(batch_id: str, user = Depends(get_current_user)):
+    """Report progress of a background batch job along with the items generated so far"""
+    snapshot = await _load_user_batch_job(batch_id, user)
+    items = [item["result"] for item in snapshot["items"] if item["status"] == "completed"]
+    errors = [
+        item["result"] or {"row": item["idx"], "id": item["payload"].get("id", ""), "error": item["error"]}
+        for item in snapshot["items"] if item["status"] in ("error", "skipped")
+    ]
+    
+    return {
+        "success": True,
+        "batch_id": batch_id,
+        "status": snapshot["status"],
+        "progress": summarize_progress(snapshot),
+        "items": items,
+        "errors": errors,
+        "total_processed": len(items),
+        "total_errors": len(errors),
+        "operation_type": snapshot["operation_type"],
+        "product_count": snapshot["total_items"]
+    }
 
 @app.get("/download/{batch_id}")
-async def download_batch(batch_id: str):
+async def download_batch(batch_id: str, user = Depends(get_current_user)):
     """Download a batch as a CSV file"""
-    # For now, we'll return a simple CSV with the batch ID
-    # In a real implementation, you'd store and retrieve the actual batch data
+    snapshot = await _load_user_batch_job(batch_id, user)
     
-    csv_content = f"""id,sku,title,description,bullets,meta,status
-{batch_id},,Generated Product,This is a placeholder download for batch {batch_id}.,"Placeholder bullet 1|Placeholder bullet 2",Placeholder meta description,completed"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["id", "sku", "title", "description", "bullets", "meta", "status"])
+    for item in snapshot["items"]:
+        payload = item["payload"] or {}
+        result = item["result"] if item["status"] == "completed" else {}
+        writer.writerow([
+            payload.get("id", ""),
+            payload.get("sku", ""),
+            result.get("product_name", "") or payload.get("title", "") or payload.get("product_name", ""),
+            result.get("description", ""),
+            "|".join(result.get("bullets", [])),
+            result.get("meta", ""),
+            item["status"]
+        ])
     
     from fastapi.responses import Response
     
     return Response(
-        content=csv_content,
+        content=buffer.getvalue(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename=batch_{batch_id}.csv"}
     )
@@ -1101,7 +1787,8 @@ async def regenerate_description(item: Dict[str, Any], user = Depends(get_curren
             "audience": item.get("audience", "general consumers"),
             "tone": item.get("tone", "professional"),
             "style_variation": item.get("style_variation", "amazon"),
-            "languageCode": item.get("languageCode", "en")
+            "languageCode": item.get("languageCode", "en"),
+            "prompt_variant": _checked_prompt_variant(item.get("prompt_variant"))
         }
         
         # Basic validation
@@ -1116,44 +1803,16 @@ async def regenerate_description(item: Dict[str, Any], user = Depends(get_curren
             raise HTTPException(status_code=400, detail=f"Invalid input: {validation_msg}")
         
         # Build prompt and generate
-        prompt = build_gemini_prompt(row_dict)
-        ai_text, tokens_used, response_time = call_gemini_generate(
-            model=model,
-            prompt=prompt,
-            temperature=0.8,  # Increased for more creative and persuasive content
-            cost_tracker=cost_tracker
-        )
-        
-        # Parse and process with compliance validation
-        ai_text = safety_filter.sanitize_output(ai_text)
+        prompt = build_product_prompt(row_dict)
+        usage_id = set_usage_context(user_id=user_id)
         try:
-            parsed = safe_extract_json(ai_text)
-            validated = validate_and_ensure_compliance(parsed)
+            # Regeneration asks for a fresh variant, so bypass (and refresh) the cache
+            with generation_deadline():
+                validated, tokens_used, response_time = await _generate_validated(
+                    prompt, row_dict, temperature=0.8, refresh=True, hedge=True  # Increased for more creative and persuasive content
+                )
         except ValueError as validation_error:
-            # If compliance validation fails, try to generate fallback bullets
-            logging.warning(f"Compliance validation failed for regenerate product {row_dict.get('id', 'Unknown')}: {validation_error}")
-            try:
-                # Extract what we can from the response
-                fallback_parsed = safe_extract_json(ai_text)
-                if fallback_parsed.get("title") and fallback_parsed.get("description"):
-                    # Generate fallback bullets
-                    fallback_bullets = generate_fallback_bullets(
-                        fallback_parsed.get("title", ""),
-                        fallback_parsed.get("description", ""),
-                        row_dict.get("features", "")
-                    )
-                    validated = {
-                        "title": fallback_parsed.get("title", row_dict.get("title", "")),
-                        "description": fallback_parsed.get("description", ""),
-                        "bullets": fallback_bullets,
-                        "meta": fallback_parsed.get("meta", "")
-                    }
-                    logging.info(f"Used fallback bullets for regenerate product {row_dict.get('id', 'Unknown')}")
-                else:
-                    raise validation_error
-            except Exception as fallback_error:
-                logging.error(f"Fallback generation failed for regenerate product {row_dict.get('id', 'Unknown')}: {fallback_error}")
-                raise HTTPException(status_code=500, detail=f"Regenerate description failed compliance validation: {validation_error}")
+            raise HTTPException(status_code=500, detail=f"Regenerate description failed compliance validation: {validation_error}")
         
         # Deduct credits after successful regeneration
         deduct_success, deduct_result = await credit_service.deduct_credits(
@@ -1178,6 +1837,7 @@ async def regenerate_description(item: Dict[str, Any], user = Depends(get_curren
             "seo_score": seo_evaluate(validated.get("description", ""), row_dict["primary_keyword"]),
             "tokens_used": tokens_used,
             "response_time": response_time,
+            "cost": cost_tracker.get_request_cost(usage_id),
             "regenerating": False,
             "credits_used": credit_info.get("required_credits", 1),
             "remaining_credits": deduct_result.get("remaining_credits", 0),
@@ -1193,6 +1853,10 @@ async def regenerate_description(item: Dict[str, Any], user = Depends(get_curren
         logging.error(f"Model status: {model is not None}")
         logging.error(f"Safety filter status: {safety_filter is not None}")
         logging.error(f"Cost tracker status: {cost_tracker is not None}")
+        if "CIRCUIT_OPEN" in str(e):
+            raise HTTPException(status_code=503, detail="AI service temporarily unavailable - please try again shortly")
+        if "DEADLINE_EXCEEDED" in str(e):
+            raise HTTPException(status_code=504, detail="Generation timed out - please try again")
         raise HTTPException(status_code=500, detail=f"Regeneration failed: {str(e)}")
 
 if __name__ == "__main__":
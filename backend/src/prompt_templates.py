@@ -1,6 +1,24 @@
 # backend/src/prompt_templates.py
+"""
+Category prompt templates
+
+``models/prompt_templates/<category>.md`` files are loaded and compiled once by
+``TemplateRegistry``. Compiling splits a template into literal text and field
+slots, so building a prompt is a dict lookup and one ``join`` with no disk
+I/O. The registry rescans the directory at most every
+``PROMPT_TEMPLATE_RELOAD_SECONDS`` and recompiles files whose mtime changed,
+so templates can be edited on a running server.
+"""
+
+import os
+import re
 import sys
+import time
+import string
+import logging
+import threading
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 # Add backend directory to path for imports
 THIS_DIR = Path(__file__).resolve().parent
@@ -10,36 +28,180 @@ sys.path.insert(0, str(BACKEND_DIR))
 from utils.helpers import read_text
 
 TEMPLATES_DIR = Path(__file__).resolve().parents[1] / "models" / "prompt_templates"
+DEFAULT_CATEGORY = "homegoods"
+
+# Seconds between directory rescans; 0 checks on every lookup, a negative value loads once
+PROMPT_TEMPLATE_RELOAD_SECONDS = float(os.getenv("PROMPT_TEMPLATE_RELOAD_SECONDS", "2"))
+
+_VERSION = re.compile(r"^#.*\bv(\d+(?:\.\d+)*)\s*$")
+
+
+class CompiledTemplate:
+    """A template split into literal segments and field names"""
+
+    def __init__(self, category: str, text: str, mtime_ns: int = 0):
+        self.category = category
+        self.text = text
+        self.mtime_ns = mtime_ns
+        first_line = text.split("\n", 1)[0]
+        match = _VERSION.match(first_line)
+        self.version = match.group(1) if match else None
+        self.literals: List[str] = [""]  # literals[i] precedes fields[i]; one more literal than fields
+        self.fields: List[str] = []
+        self.simple = True
+        try:
+            for literal, field, spec, conversion in string.Formatter().parse(text):
+                # Escaped braces ("{{") arrive as separate literal-only chunks
+                self.literals[-1] += literal
+                if field is None:
+                    continue
+                if spec or conversion or not field.isidentifier():
+                    self.simple = False  # Formatting options: leave these to str.format
+                self.fields.append(field)
+                self.literals.append("")
+        except ValueError:
+            self.simple = False  # Unbalanced braces: str.format fails, render() replaces fields naively
+
+    def render(self, mapping: Dict[str, str]) -> str:
+        """Same result as ``text.format(**mapping)``, falling back to plain replacement of ``{field}``"""
+        if self.simple and all(field in mapping for field in self.fields):
+            parts = [self.literals[0]]
+            for field, literal in zip(self.fields, self.literals[1:]):
+                parts.append(mapping[field])
+                parts.append(literal)
+            return "".join(parts)
+        try:
+            return self.text.format(**mapping)
+        except Exception:
+            prompt = self.text
+            for field, value in mapping.items():
+                prompt = prompt.replace("{" + field + "}", value)
+            return prompt
+
+
+class TemplateRegistry:
+    """Thread-safe, mtime-invalidated cache of compiled category templates"""
+
+    def __init__(self, templates_dir: Path = TEMPLATES_DIR, reload_seconds: float = PROMPT_TEMPLATE_RELOAD_SECONDS,
+                 clock=time.monotonic):
+        self.templates_dir = Path(templates_dir)
+        self.reload_seconds = reload_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._templates: Dict[str, CompiledTemplate] = {}
+        self._signature: Optional[Dict[str, int]] = None  # category -> mtime_ns at the last scan
+        self._checked_at: Optional[float] = None
+        self.compiles = 0
+        self.reloads = 0
+
+    def _scan(self) -> Dict[str, int]:
+        try:
+            entries = list(os.scandir(self.templates_dir))
+        except FileNotFoundError:
+            return {}
+        return {entry.name[:-3].lower(): entry.stat().st_mtime_ns
+                for entry in entries if entry.name.endswith(".md") and entry.is_file()}
+
+    def _due(self, now: float) -> bool:
+        if self._checked_at is None:
+            return True
+        return self.reload_seconds >= 0 and now - self._checked_at >= self.reload_seconds
+
+    def refresh(self, force: bool = False) -> None:
+        """Recompile templates that were added, changed or removed since the last scan"""
+        now = self._clock()
+        if not force and not self._due(now):
+            return
+        with self._lock:
+            if not force and not self._due(now):
+                return
+            self._checked_at = now
+            signature = self._scan()
+            if signature == self._signature:
+                return
+            templates = {}
+            for category, mtime_ns in signature.items():
+                template = self._templates.get(category)
+                if template is None or template.mtime_ns != mtime_ns:
+                    text = read_text(self.templates_dir / f"{category}.md")
+                    if not text.strip():
+                        logging.warning(f"Ignoring empty prompt template: {category}.md")
+                        continue
+                    template = CompiledTemplate(category, text, mtime_ns)
+                    self.compiles += 1
+                templates[category] = template
+            if self._signature is not None:
+                self.reloads += 1
+                logging.info(f"Prompt templates reloaded: {', '.join(sorted(templates)) or 'none'}")
+            self._templates = templates
+            self._signature = signature
+
+    def get(self, category) -> Optional[CompiledTemplate]:
+        """The template for ``category``, or ``None`` if there is no such file"""
+        self.refresh()
+        return self._templates.get(str(category or "").strip().lower())
+
+    def template_for(self, category) -> CompiledTemplate:
+        """The template for ``category``, falling back to the default category"""
+        template = self.get(category) or self._templates.get(DEFAULT_CATEGORY)
+        if template is None:
+            raise FileNotFoundError(f"No prompt template for '{category}' in {self.templates_dir}")
+        return template
+
+    def categories(self) -> List[str]:
+        self.refresh()
+        return sorted(self._templates)
+
+    def stats(self) -> Dict[str, Any]:
+        templates = self._templates
+        return {
+            "templates": {category: template.version for category, template in sorted(templates.items())},
+            "compiles": self.compiles,
+            "reloads": self.reloads,
+            "reload_seconds": self.reload_seconds
+        }
+
+
+_template_registry: Optional[TemplateRegistry] = None
+_template_registry_lock = threading.Lock()
+
+
+def get_template_registry() -> TemplateRegistry:
+    """Return the process-wide template registry"""
+    global _template_registry
+    with _template_registry_lock:
+        if _template_registry is None:
+            _template_registry = TemplateRegistry()
+        return _template_registry
+
 
 def load_template(category):
-    category = (category or "generic").lower()
-    fpath = TEMPLATES_DIR / f"{category}.md"
-    if not fpath.exists():
-        # fallback to homegoods
-        fpath = TEMPLATES_DIR / "homegoods.md"
-    return read_text(fpath)
-
-def build_prompt_from_row(row):
-    """
-    row: dict-like with keys: title, features, primary_keyword, tone
-    features string is semicolon-separated
-    """
-    tpl = load_template(row.get("category", "").lower())
+    return get_template_registry().template_for((category or "generic").lower()).text
+
+
+def template_fields(row, **fields):
+    """Template values for ``row``; ``fields`` adds or overrides entries"""
     features_list = row.get("features", "")
     features_formatted = "\n".join([f"- {x.strip()}" for x in features_list.split(";") if x.strip()])
     mapping = {
         "title": row.get("title","").strip(),
         "features_list": features_formatted,
         "primary_keyword": row.get("primary_keyword","").strip(),
-        "tone": row.get("tone","").strip() or "professional"
+        "tone": row.get("tone","").strip() or "professional",
+        "language": "English",
+        "audience": "general consumers",
+        "style_instructions": ""
     }
-    # use Python format (templates use {title}, etc.)
-    try:
-        prompt = tpl.format(**mapping)
-    except Exception:
-        # naive replace as final fallback
-        prompt = tpl.replace("{title}", mapping["title"])\
-                    .replace("{features_list}", mapping["features_list"])\
-                    .replace("{primary_keyword}", mapping["primary_keyword"])\
-                    .replace("{tone}", mapping["tone"])
-    return prompt
+    mapping.update(fields)
+    return mapping
+
+
+def build_prompt_from_row(row, template=None, **fields):
+    """
+    row: dict-like with keys: title, features, primary_keyword, tone
+    features string is semicolon-separated
+    template: compiled template to use instead of the row's category template
+    fields: extra template values (e.g. language, audience)
+    """
+    template = template or get_template_registry().template_for(row.get("category", "").lower())
+    return template.render(template_fields(row, **fields))
@@ -0,0 +1,103 @@
+import asyncio
+import time
+import types
+
+import pytest
+
+from src.generation import async_client, governor, retry_policy
+from src.generation.async_client import call_gemini_generate_async
+from src.generation.circuit_breaker import CircuitBreaker
+from src.generation.governor import RateGovernor
+from src.generation.retry_policy import generation_deadline
+
+
+class SlowModel:
+    """Blocking fake model: each call sleeps like a slow Gemini round trip."""
+
+    def __init__(self, delay=0.3, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, request_options=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise Exception("503 service unavailable")
+        return types.SimpleNamespace(text='{"title": "ok"}')
+
+
+def test_concurrent_calls_do_not_serialize():
+    model = SlowModel(delay=0.3)
+
+    async def run():
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            call_gemini_generate_async(model, f"prompt {i}") for i in range(8)
+        ])
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(run())
+    assert len(results) == 8
+    assert all(text == '{"title": "ok"}' for text, _, _ in results)
+    # 8 sequential calls would take 2.4s
+    assert elapsed < 1.2
+
+
+def test_event_loop_stays_responsive_during_call_and_backoff():
+    model = SlowModel(delay=0.2, failures=1)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        text, _, _ = await call_gemini_generate_async(model, "prompt")
+        task.cancel()
+        return text, ticks
+
+    text, ticks = asyncio.run(run())
+    assert text == '{"title": "ok"}'
+    assert model.calls == 2
+    # ~0.4s of calls plus ~1s backoff: the ticker must keep running throughout
+    assert ticks >= 15
+
+
+def test_executor_is_bounded(monkeypatch):
+    monkeypatch.setenv("GEMINI_MAX_WORKERS", "3")
+    async_client.shutdown_generation_executor()
+    try:
+        executor = async_client.get_generation_executor()
+        assert executor._max_workers == 3
+    finally:
+        async_client.shutdown_generation_executor()
+
+
+def test_attempt_timeout_starts_after_the_governor_permit(monkeypatch):
+    monkeypatch.setattr(retry_policy, "GEMINI_REQUEST_TIMEOUT", 0.3)
+    monkeypatch.setattr(async_client, "GEMINI_REQUEST_TIMEOUT", 0.3)
+    breaker = CircuitBreaker(min_calls=1, error_rate_threshold=0.01)
+    monkeypatch.setattr(async_client, "get_circuit_breaker", lambda: breaker)
+    narrow = RateGovernor(rate=100, burst=100, window=1, max_window=1, poll_interval=0.01)
+    monkeypatch.setattr(governor, "get_rate_governor", lambda: narrow)
+    model = SlowModel(delay=0.1)
+
+    async def queued_call(hold, deadline=None):
+        assert narrow.try_acquire()[0]  # another request holds the only permit
+        asyncio.get_running_loop().call_later(hold, narrow.release)
+        with generation_deadline(deadline):
+            return await call_gemini_generate_async(model, "prompt")
+
+    # Queueing longer than the request timeout is not a backend timeout
+    assert asyncio.run(queued_call(hold=0.5))[0] == '{"title": "ok"}'
+
+    # Running out of budget in the queue is a deadline error, not a breaker failure, and is not retried
+    with pytest.raises(Exception, match="DEADLINE_EXCEEDED"):
+        asyncio.run(queued_call(hold=2.0, deadline=0.2))
+    assert model.calls == 1
+    assert breaker.stats()["state"] == "closed"
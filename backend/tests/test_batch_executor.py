@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from src.generation.batch import run_batch, iter_batch, BatchStopped
+
+
+def test_results_keep_input_order_and_run_concurrently():
+    async def worker(idx, item):
+        # Later items finish first
+        await asyncio.sleep(0.05 * (5 - idx))
+        return item * 10
+
+    start = time.perf_counter()
+    outcomes = asyncio.run(run_batch([0, 1, 2, 3, 4], worker, concurrency=5))
+    elapsed = time.perf_counter() - start
+
+    assert outcomes == [0, 10, 20, 30, 40]
+    # Bounded by the slowest item (0.25s), not the sum (0.75s)
+    assert elapsed < 0.5
+
+
+def test_per_batch_limit_is_respected():
+    running = 0
+    peak = 0
+
+    async def worker(idx, item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return idx
+
+    outcomes = asyncio.run(run_batch(list(range(20)), worker, concurrency=3))
+    assert outcomes == list(range(20))
+    assert peak == 3
+
+
+def test_batch_stopped_skips_items_not_yet_started():
+    async def worker(idx, item):
+        if idx == 2:
+            raise BatchStopped(("error", {"row": idx, "error": "quota"}))
+        return ("item", idx)
+
+    outcomes = asyncio.run(run_batch(list(range(6)), worker, concurrency=1))
+    assert outcomes[:2] == [("item", 0), ("item", 1)]
+    assert outcomes[2] == ("error", {"row": 2, "error": "quota"})
+    assert outcomes[3:] == [None, None, None]
+
+
+def test_iter_batch_yields_in_completion_order():
+    async def worker(idx, item):
+        await asyncio.sleep(0.02 * (3 - idx))
+        return idx
+
+    async def collect():
+        return [idx async for idx, _ in iter_batch(range(3), worker, concurrency=3)]
+
+    assert asyncio.run(collect()) == [2, 1, 0]
+
+
+def test_iter_batch_pulls_async_items_as_they_arrive():
+    produced = []
+
+    async def items():
+        for n in range(6):
+            await asyncio.sleep(0.01)  # e.g. parsing the next chunk of an upload
+            produced.append(n)
+            yield n
+
+    async def worker(idx, item):
+        return idx, item, len(produced)
+
+    async def collect():
+        return [outcome async for _, outcome in iter_batch(items(), worker, concurrency=2)]
+
+    outcomes = sorted(asyncio.run(collect()))
+    assert [(idx, item) for idx, item, _ in outcomes] == [(n, n) for n in range(6)]
+    # The first item was generated before the source was exhausted
+    assert outcomes[0][2] < 6
@@ -0,0 +1,128 @@
+import asyncio
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.repos import batch_repo
+from src.generation.batch import BatchStopped
+from src.generation.jobs import BatchJobWorker, create_batch_job, get_batch_job_snapshot, summarize_progress
+
+
+def make_session_factory():
+    engine = create_engine(
+        "sqlite+pysqlite:///:memory:",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, future=True)
+
+    @contextmanager
+    def session_factory():
+        db = Session()
+        try:
+            yield db
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    return session_factory
+
+
+def submit(session_factory, batch_id, n):
+    payloads = [{"id": f"p{i}", "product_name": f"Product {i}"} for i in range(n)]
+    create_batch_job(batch_id, "u1", "json", "batch_small", {"languageCode": "en"}, payloads, session_factory)
+
+
+def test_worker_processes_job_and_reports_progress():
+    session_factory = make_session_factory()
+    submit(session_factory, "b1", 4)
+    finished = []
+
+    async def process(item):
+        if item["idx"] == 2:
+            return "error", {"row": 2, "id": "p2", "error": "Invalid input"}
+        return "item", {"id": item["payload"]["id"], "description": "done"}
+
+    async def on_finished(batch_id):
+        finished.append(batch_id)
+
+    worker = BatchJobWorker(process, on_finished, session_factory=session_factory, concurrency=1)
+    asyncio.run(worker.run_until_idle())
+
+    snapshot = get_batch_job_snapshot("b1", session_factory)
+    assert snapshot["status"] == "completed"
+    assert [item["status"] for item in snapshot["items"]] == ["completed", "completed", "error", "completed"]
+    assert snapshot["items"][3]["result"] == {"id": "p3", "description": "done"}
+    progress = summarize_progress(snapshot)
+    assert progress["done"] == 4 and progress["percent"] == 100.0
+    assert finished == ["b1"]
+
+
+def test_expired_lease_is_reclaimed_after_worker_crash():
+    session_factory = make_session_factory()
+    submit(session_factory, "b2", 1)
+
+    # A worker claimed the item and died: its lease is already expired
+    with session_factory() as db:
+        claimed, abandoned = batch_repo.claim_items(db, limit=1, lease_seconds=-1, max_attempts=3)
+        assert len(claimed) == 1 and abandoned == []
+
+    async def process(item):
+        return "item", {"attempt": item["attempt"]}
+
+    worker = BatchJobWorker(process, session_factory=session_factory)
+    asyncio.run(worker.run_until_idle())
+
+    snapshot = get_batch_job_snapshot("b2", session_factory)
+    assert snapshot["status"] == "completed"
+    assert snapshot["items"][0]["result"] == {"attempt": 2}
+
+
+def test_job_finishes_when_expired_lease_runs_out_of_attempts():
+    session_factory = make_session_factory()
+    submit(session_factory, "b4", 1)
+
+    # Every worker that claimed the item died before recording it
+    for _ in range(3):
+        with session_factory() as db:
+            claimed, _ = batch_repo.claim_items(db, limit=1, lease_seconds=-1, max_attempts=3)
+            assert len(claimed) == 1
+    finished = []
+
+    async def process(item):
+        raise AssertionError("an item out of attempts must not be processed again")
+
+    async def on_finished(batch_id):
+        finished.append(batch_id)
+
+    worker = BatchJobWorker(process, on_finished, session_factory=session_factory, max_attempts=3)
+    asyncio.run(worker.run_until_idle())
+
+    snapshot = get_batch_job_snapshot("b4", session_factory)
+    assert snapshot["status"] == "completed"
+    assert [item["status"] for item in snapshot["items"]] == ["error"]
+    assert snapshot["items"][0]["error"] == "Gave up after 3 attempts"
+    assert finished == ["b4"]
+
+
+def test_quota_stop_skips_remaining_items():
+    session_factory = make_session_factory()
+    submit(session_factory, "b3", 3)
+
+    async def process(item):
+        raise BatchStopped(("error", {"row": item["idx"], "error": "API quota exceeded"}))
+
+    worker = BatchJobWorker(process, session_factory=session_factory)
+    asyncio.run(worker.run_until_idle())
+
+    snapshot = get_batch_job_snapshot("b3", session_factory)
+    assert snapshot["status"] == "completed"
+    assert [item["status"] for item in snapshot["items"]] == ["error", "skipped", "skipped"]
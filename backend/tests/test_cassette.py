@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from src.ai_pipeline import build_gemini_prompt, gemini_generation_config, gemini_generate_once
+from src.generation.async_client import is_retryable_error
+from src.llm import CassetteBackend, CassetteMiss, StubBackend
+
+ROW = {"id": "1", "title": "Ceramic Mug", "features": "dishwasher safe; 350 ml; matte glaze",
+       "primary_keyword": "coffee mug", "tone": "professional", "style_variation": "amazon", "languageCode": "en"}
+
+
+def test_record_then_replay_serves_identical_responses(tmp_path):
+    path = str(tmp_path / "cassettes" / "run.jsonl")
+    stub = StubBackend(model_name="stub/gemini-1.5-pro", latency_ms=0, jitter_ms=0, error_rate=0.5, error_kinds="503")
+    recorder = CassetteBackend(path, mode="record", inner=stub)
+    prompts = [build_gemini_prompt(dict(ROW, title=f"Mug {n}")) for n in range(6)]
+    config = gemini_generation_config(0.8)
+
+    recorded = []
+    for prompt in prompts:
+        try:
+            recorded.append(recorder.generate(prompt, config).text)
+        except Exception as e:
+            recorded.append(str(e))
+
+    lines = [json.loads(line) for line in open(path, encoding="utf-8")]
+    assert len(lines) == 6 and "prompt" not in lines[0]
+    assert any("error" in line for line in lines) and any("text" in line for line in lines)
+
+    sleeps = []
+    player = CassetteBackend(path, mode="replay", model_name="gemini-1.5-pro", latency_scale=2.0, sleep=sleeps.append)
+    replayed = []
+    for prompt in prompts:
+        try:
+            replayed.append(player.generate(prompt, config).text)
+        except Exception as e:
+            replayed.append(str(e))
+    assert replayed == recorded
+    assert sleeps == [line["latency_ms"] / 1000.0 * 2.0 for line in lines]
+    assert player.model_name == "cassette/gemini-1.5-pro"
+
+
+def test_replay_through_pipeline_and_misses(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    prompt = build_gemini_prompt(ROW)
+    recorder = CassetteBackend(path, mode="record", inner=StubBackend(model_name="stub/gemini-1.5-flash", latency_ms=0, jitter_ms=0))
+    text, tokens, _ = gemini_generate_once(recorder, prompt, temperature=0.8)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"key": "trunc')  # partial line left by a crashed recorder
+
+    player = CassetteBackend(path, mode="replay", model_name="gemini-1.5-flash", latency_scale=0)
+    assert gemini_generate_once(player, prompt, temperature=0.8)[:2] == (text, tokens)
+
+    with pytest.raises(CassetteMiss) as excinfo:
+        gemini_generate_once(player, prompt, temperature=0.2)
+    assert not is_retryable_error(excinfo.value)
+    assert player.stats()["misses"] == 1
@@ -0,0 +1,77 @@
+import asyncio
+import time
+import types
+
+import pytest
+
+from src.generation import async_client
+from src.generation.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock):
+    return CircuitBreaker(window_seconds=60, min_calls=4, error_rate_threshold=0.5, open_seconds=30, clock=clock)
+
+
+def test_opens_on_error_rate_and_fails_fast():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+
+    breaker.record(None)
+    breaker.record(Exception("Content blocked by safety filters"))  # not a backend failure
+    breaker.record(Exception("503 service unavailable"))
+    assert breaker.state == CLOSED  # only 2 counted calls so far
+    breaker.record(Exception("504 deadline exceeded"))
+    breaker.record(None)
+    assert breaker.state == CLOSED  # the error rate is only evaluated when a failure is recorded
+    breaker.record(Exception("connection reset"))
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_admits_single_probe_that_decides_state():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 31
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()  # the probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN  # failed probe re-opens for another cool down
+
+    clock.now += 31
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_open_circuit_skips_gemini_and_retries(monkeypatch):
+    breaker = CircuitBreaker(min_calls=1, error_rate_threshold=0.5, open_seconds=30)
+    breaker.record_failure()
+    monkeypatch.setattr(async_client, "get_circuit_breaker", lambda: breaker)
+
+    calls = []
+    model = types.SimpleNamespace(generate_content=lambda *a, **kw: calls.append(1))
+
+    start = time.perf_counter()
+    with pytest.raises(Exception) as excinfo:
+        asyncio.run(async_client.call_gemini_generate_async(model, "prompt"))
+    assert "CIRCUIT_OPEN" in str(excinfo.value)
+    assert calls == []
+    assert time.perf_counter() - start < 0.5
@@ -0,0 +1,73 @@
+from src.ai_pipeline import build_gemini_prompt, split_gemini_prompt
+from src.llm import ContextCachingBackend, StubBackend
+
+ROW = {"title": "Ceramic Mug", "features": "dishwasher safe; 350 ml; matte glaze", "primary_keyword": "ceramic mug"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_backend(stub, clock, **kwargs):
+    return ContextCachingBackend(stub, split_gemini_prompt, ttl_seconds=100, refresh_margin=10,
+                                 retry_seconds=50, clock=clock, **kwargs)
+
+
+def test_handles_are_created_lazily_refreshed_and_expired():
+    stub = StubBackend(latency_ms=0, jitter_ms=0)
+    clock = FakeClock()
+    backend = make_backend(stub, clock)
+    instruction, product_block = split_gemini_prompt(build_gemini_prompt(ROW))
+    assert product_block.startswith("**PRODUCT INFORMATION:**") and "Ceramic Mug" not in instruction
+    assert split_gemini_prompt(build_gemini_prompt({**ROW, "title": "Lamp", "tone": "luxury"}))[0] == instruction
+
+    response = backend.generate(build_gemini_prompt(ROW))
+    backend.generate(build_gemini_prompt({**ROW, "title": "Teapot"}))
+    backend.generate(build_gemini_prompt({**ROW, "languageCode": "de"}))
+    assert stub.contexts_created == 2  # One handle per (style, language)
+    assert response.usage_metadata.cached_content_token_count == stub.count_tokens(instruction)
+    assert 'Ceramic Mug -' in response.text
+
+    clock.now = 95  # Inside the refresh margin: the TTL is extended, the handle kept
+    backend.generate(build_gemini_prompt(ROW))
+    clock.now = 180
+    backend.generate(build_gemini_prompt(ROW))
+    clock.now = 400  # Unused past its TTL: recreated
+    backend.generate(build_gemini_prompt(ROW))
+    stats = backend.stats()
+    assert (stats["created"], stats["refreshed"], stats["expired"]) == (3, 1, 1)
+    assert (stats["cached_calls"], stats["uncached_calls"]) == (6, 0)
+
+    backend.close()
+    assert list(stub.contexts) == ["cachedContents/stub-1"]  # The expired one (the stub keeps contexts past their TTL)
+
+
+def test_full_prompts_are_sent_when_no_handle_is_available():
+    stub = StubBackend(latency_ms=0, jitter_ms=0)
+    clock = FakeClock()
+    backend = make_backend(stub, clock)
+    prompt = build_gemini_prompt(ROW)
+
+    backend.generate(prompt)
+    stub.contexts.clear()  # Deleted server-side: the call is repeated in full and the handle dropped
+    assert 'Ceramic Mug -' in backend.generate(prompt).text
+    backend.generate(prompt)
+    assert stub.contexts_created == 2 and backend.stats()["lost"] == 1
+
+    def unavailable(instruction, ttl_seconds):
+        raise Exception("400 Cached content is too small")
+
+    stub.create_cached_context = unavailable
+    failing = make_backend(stub, clock)
+    failing.generate(prompt)
+    failing.generate(prompt)
+    failing.generate("Describe a mug")  # Nothing to cache
+    stats = failing.stats()
+    assert (stats["create_failures"], stats["cached_calls"], stats["uncached_calls"]) == (1, 0, 3)
+    clock.now = 60
+    failing.generate(prompt)
+    assert failing.stats()["create_failures"] == 2
@@ -0,0 +1,84 @@
+import threading
+import types
+
+import pytest
+
+from src.ai_pipeline import CostTracker, gemini_generate_once, model_pricing, set_usage_context, usage_context
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeModel:
+    model_name = "models/gemini-1.5-pro-002"
+
+    def __init__(self, usage):
+        self.usage = usage
+
+    def generate_content(self, prompt, **kwargs):
+        return types.SimpleNamespace(text="generated text", usage_metadata=self.usage)
+
+
+@pytest.fixture(autouse=True)
+def reset_usage_context():
+    token = usage_context.set(None)
+    yield
+    usage_context.reset(token)
+
+
+def test_usage_metadata_is_priced_per_model_and_direction():
+    tracker = CostTracker()
+    usage = types.SimpleNamespace(prompt_token_count=1000, candidates_token_count=200, total_token_count=1300)
+    set_usage_context("req_1", "user_a")
+
+    text, tokens, _ = gemini_generate_once(FakeModel(usage), "prompt", cost_tracker=tracker)
+
+    assert (text, tokens) == ("generated text", 1300)
+    input_price, output_price = model_pricing("gemini-1.5-pro")
+    # Thinking tokens (total - prompt - candidates) are billed as output
+    expected = (1000 * input_price + 300 * output_price) / 1_000_000
+    assert tracker.get_request_cost("req_1") == pytest.approx(expected)
+    assert tracker.get_user_usage("user_a")["output_tokens"] == 300
+    assert tracker.get_usage_stats()["by_model"]["models/gemini-1.5-pro-002"]["input_tokens"] == 1000
+
+
+def test_request_user_and_rolling_window_aggregates():
+    clock = FakeClock()
+    tracker = CostTracker(clock=clock)
+
+    tracker.add_usage(input_tokens=100, output_tokens=50, model="gemini-1.5-flash", request_id="a", user_id="u1")
+    clock.now += 7200
+    tracker.add_usage(input_tokens=10, output_tokens=5, model="gemini-1.5-flash", request_id="b", user_id="u1")
+    tracker.add_usage(input_tokens=1, model="gemini-1.5-flash", request_id="b", user_id="u2")
+
+    assert tracker.get_request_usage("b")["requests"] == 2
+    assert tracker.get_user_usage("u1")["total_tokens"] == 165
+    assert tracker.get_window_usage(3600)["total_tokens"] == 16
+    assert tracker.get_window_usage(24 * 3600)["total_tokens"] == 166
+
+    clock.now += 24 * 3600 + 1
+    assert tracker.get_window_usage(24 * 3600)["requests"] == 0
+    assert tracker.total_tokens == 166
+
+
+def test_concurrent_usage_is_not_lost():
+    tracker = CostTracker()
+
+    def worker(n):
+        for _ in range(500):
+            tracker.add_usage(input_tokens=2, output_tokens=1, request_id=f"r{n}", user_id="shared")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tracker.total_requests == 4000
+    assert tracker.get_user_usage("shared")["total_tokens"] == 12000
+    assert tracker.get_current_cost() == pytest.approx(sum(tracker.get_request_cost(f"r{n}") for n in range(8)))
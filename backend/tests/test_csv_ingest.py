@@ -0,0 +1,102 @@
+import asyncio
+import io
+
+import pytest
+
+import pandas as pd
+
+from src import csv_ingest
+from src.csv_ingest import CSVColumnMapping, CSVFrameReader, CSVTooLarge, spool_upload
+from src.generation.features import FeatureCompactor
+
+
+class FakeUpload:
+    def __init__(self, data, size=None):
+        self.stream = io.BytesIO(data)
+        self.size = size
+        self.reads = 0
+
+    async def read(self, size=-1):
+        self.reads += 1
+        return self.stream.read(size)
+
+
+CSV = b"name,price,notes\n" + b"".join(b"Lamp %d,%d.50,\n" % (n, n) for n in range(7))
+
+
+def test_upload_is_parsed_in_chunks_of_string_cells():
+    async def read_all():
+        reader = CSVFrameReader(await spool_upload(FakeUpload(CSV)), chunk_rows=3, parser="pandas")
+        frames = []
+        while (frame := await reader.next_frame()) is not None:
+            frames.append(frame)
+        reader.close()
+        return reader, frames
+
+    reader, frames = asyncio.run(read_all())
+
+    assert [len(frame) for frame in frames] == [3, 3, 1]
+    assert (reader.rows, reader.chunks, reader.parser) == (7, 3, "pandas")
+    assert frames[0].iloc[1].to_dict() == {"name": "Lamp 1", "price": "1.50", "notes": ""}
+
+
+def read_frames(data, parser):
+    async def read_all():
+        reader = CSVFrameReader(io.BytesIO(data), chunk_rows=50, parser=parser)
+        frames = []
+        while (frame := await reader.next_frame()) is not None:
+            frames.append(frame)
+        reader.close()
+        return reader, frames
+
+    return asyncio.run(read_all())
+
+
+def test_pyarrow_parses_multi_block_uploads_with_newlines_in_cells(monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(csv_ingest, "PYARROW_BLOCK_BYTES", 1 << 10)
+    data = b"title,description,notes\n" + b"".join(
+        b'Lamp %d,"<p>Brass lamp.</p>\n<ul><li>Dimmable</li>\n<li>%d cm, ""tall""</li></ul>",\n' % (n, 20 + n)
+        for n in range(200)
+    )
+
+    reader, frames = read_frames(data, "pyarrow")
+    expected = pd.concat(read_frames(data, "pandas")[1], ignore_index=True)
+
+    assert reader.parser == "pyarrow" and reader.chunks > 1
+    parsed = pd.concat(frames, ignore_index=True)
+    assert parsed.astype(object).to_dict("records") == expected.astype(object).to_dict("records")
+    assert parsed.loc[7, "description"] == '<p>Brass lamp.</p>\n<ul><li>Dimmable</li>\n<li>27 cm, "tall"</li></ul>'
+
+
+def test_oversized_uploads_are_rejected():
+    with pytest.raises(CSVTooLarge):
+        asyncio.run(spool_upload(FakeUpload(CSV * 10), max_bytes=len(CSV) * 3))
+    assert asyncio.run(spool_upload(FakeUpload(CSV), max_bytes=len(CSV))).read() == CSV
+
+    with pytest.raises(CSVTooLarge):
+        asyncio.run(spool_upload(FakeUpload(b"", size=10_000), max_bytes=100))
+
+
+def test_column_mapping_is_resolved_once_and_applied_to_whole_chunks(caplog):
+    frame = pd.DataFrame({
+        "SKU": ["A1", "A2"],
+        "Product Name": [" Oak Shelf ", "Pine Shelf"],
+        "Department": ["HomeGoods", "homegoods"],
+        "Material": ["oak", "<b>pine</b>"],
+        "price": ["19.90", ""],
+        "image_url": ["https://x/1.jpg", ""]
+    }, index=[10, 11])
+
+    with caplog.at_level("INFO"):
+        mapping = CSVColumnMapping(frame.columns)
+        records = mapping.records(frame, "readers", "de", "compact", compactor=FeatureCompactor())
+
+    assert (mapping.product_name_col, mapping.category_col, mapping.feature_columns) == ("Product Name", "Department", ["Material", "image_url"])
+    assert len([r for r in caplog.records if "Mapped" in r.getMessage()]) == 1
+    assert records[0] == {
+        "id": "", "sku": "", "title": "Oak Shelf", "category": "homegoods", "features": "Material: oak",
+        "primary_keyword": "", "tone": "", "price": "19.90", "images": "", "audience": "readers",
+        "languageCode": "de", "prompt_variant": "compact"
+    }
+    assert records[1]["features"] == "Material: pine"
@@ -0,0 +1,61 @@
+import pandas as pd
+
+from src.generation.features import FeatureCompactor, clean_cell
+from src.llm import estimate_token_count
+
+
+def test_cells_are_cleaned_deduplicated_and_ranked():
+    compactor = FeatureCompactor(token_budget=1000, max_cell_chars=40)
+    features = compactor.compact([
+        ("barcode", "4006381333931"),
+        ("notes", "Dishwasher safe"),
+        ("Material", "<p>Stoneware&nbsp;&amp; glaze</p>"),
+        ("colour", "nan"),
+        ("color", None),
+        ("name_copy", "Ceramic Mug"),
+        ("product_url", "https://example.com/mug"),
+        ("alt", "dishwasher  safe"),
+        ("long_description", "A sturdy everyday mug with a wide handle and a glossy finish that lasts"),
+    ], known_values=["Ceramic Mug"])
+
+    assert features == (
+        "Material: Stoneware & glaze. long_description: A sturdy everyday mug with a wide…. "
+        "notes: Dishwasher safe. barcode: 4006381333931"
+    )
+    stats = compactor.stats()
+    assert (stats["cells"], stats["kept"], stats["empty"], stats["duplicate"], stats["skipped"], stats["truncated"]) == (9, 4, 2, 2, 1, 1)
+    assert clean_cell("<ul><li>A</li><li>B</li></ul>") == ("A; B", False)
+
+
+def test_wide_rows_stay_within_the_token_budget():
+    compactor = FeatureCompactor(token_budget=100, max_cell_chars=200)
+    cells = [(f"spec_{n}", f"value {n} " + "x" * (n % 50)) for n in range(200)]
+
+    features = compactor.compact(cells)
+
+    assert features.startswith("spec_0: value 0. spec_1: value 1")
+    assert estimate_token_count(features) <= 100
+    stats = compactor.stats()
+    assert stats["over_budget"] == 200 - stats["kept"] > 0
+    assert stats["tokens"] <= 100
+
+
+def test_compact_frame_matches_row_by_row_compaction():
+    columns = ["material", "notes", "barcode", "image", "desc", 7]
+    frame = pd.DataFrame({
+        "material": ["<i>oak</i>", "Oak", None, "glass &amp; steel"],
+        "notes": ["oak", "n/a", "x " * 40, "Lamp"],
+        "barcode": ["4006381333931", "4006 3813 3393", "", "123"],
+        "image": ["a.jpg", "b.jpg", "", ""],
+        "desc": ["https://example.com", "日本語の説明", "word " * 30, "Lamp"],
+        7: [1.5, float("nan"), "spec", "  spaced\tout  "]
+    }, index=["a", "b", "c", "d"])
+    titles = pd.Series(["Oak Lamp", "", "Desk", "lamp"], index=frame.index)
+    per_row, whole = FeatureCompactor(token_budget=30, max_cell_chars=40), FeatureCompactor(token_budget=30, max_cell_chars=40)
+
+    expected = [per_row.compact([(column, frame.at[idx, column]) for column in columns], known_values=[titles[idx]]) for idx in frame.index]
+    features = whole.compact_frame(frame, columns, known_values=titles)
+
+    assert list(features.index) == list(frame.index)
+    assert list(features) == expected
+    assert whole.stats() == per_row.stats()
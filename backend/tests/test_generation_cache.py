@@ -0,0 +1,56 @@
+from src.generation.cache import GenerationCache, generation_cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_key_covers_prompt_model_and_config():
+    base = generation_cache_key("prompt", "gemini-1.5-flash", {"temperature": 0.8})
+    assert base == generation_cache_key("prompt", "gemini-1.5-flash", {"temperature": 0.8})
+    assert base != generation_cache_key("prompt!", "gemini-1.5-flash", {"temperature": 0.8})
+    assert base != generation_cache_key("prompt", "gemini-1.5-pro", {"temperature": 0.8})
+    assert base != generation_cache_key("prompt", "gemini-1.5-flash", {"temperature": 0.2})
+
+
+def test_lru_eviction_ttl_and_counters():
+    clock = FakeClock()
+    cache = GenerationCache(max_entries=2, ttl_seconds=60, clock=clock)
+
+    cache.set("a", {"title": "A"})
+    cache.set("b", {"title": "B"})
+    assert cache.get("a") == {"title": "A"}  # "a" is now most recently used
+    cache.set("c", {"title": "C"})           # evicts "b"
+    assert cache.get("b") is None
+
+    hit = cache.get("a")
+    hit["title"] = "mutated"
+    assert cache.get("a") == {"title": "A"}  # callers get their own copy
+
+    clock.now += 61
+    assert cache.get("c") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 2
+    assert stats["entries"] == 1
+
+
+def test_persistent_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "cache" / "generations.sqlite3")
+    first = GenerationCache(max_entries=4, ttl_seconds=0, path=path)
+    first.set("key", {"title": "Stored", "bullets": ["one", "two", "three"]})
+    first.close()
+
+    second = GenerationCache(max_entries=4, ttl_seconds=0, path=path)
+    assert second.get("key") == {"title": "Stored", "bullets": ["one", "two", "three"]}
+    assert second.get("key") is not None
+    stats = second.stats()
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["persistent"] is True
+    second.close()
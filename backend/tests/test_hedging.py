@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from src.generation.hedging import Hedger, LatencyTracker
+
+
+def warmed_hedger(budget=1.0, samples=20, latency=0.01):
+    hedger = Hedger(enabled=True, percentile=95, budget=budget, min_samples=samples, min_delay=0.02)
+    for _ in range(samples):
+        hedger.attempt_latency.observe(latency)
+    return hedger
+
+
+def test_slow_call_is_hedged_and_loser_cancelled():
+    hedger = warmed_hedger()
+    started = []
+    cancelled = []
+
+    async def attempt():
+        n = len(started)
+        started.append(n)
+        try:
+            await asyncio.sleep(5 if n == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(n)
+            raise
+        return f"attempt {n}"
+
+    async def main():
+        result = await hedger.run(attempt)
+        await asyncio.sleep(0)  # let the cancellation land
+        return result
+
+    assert asyncio.run(main()) == "attempt 1"
+    assert cancelled == [0]
+    stats = hedger.stats()
+    assert (stats["hedges"], stats["hedge_wins"]) == (1, 1)
+    assert stats["request_latency"]["samples"] == 1
+
+
+def test_hedge_budget_caps_extra_calls():
+    hedger = warmed_hedger(budget=0.25, samples=200)
+    calls = 0
+
+    async def attempt():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        for _ in range(8):
+            await hedger.run(attempt)
+
+    asyncio.run(main())
+    assert hedger.hedges == 2
+    assert hedger.budget_denied == 6
+    assert calls == 10
+
+
+def test_failed_attempt_waits_for_the_other():
+    hedger = warmed_hedger()
+    started = []
+
+    async def attempt():
+        n = len(started)
+        started.append(n)
+        await asyncio.sleep(0.1 if n == 0 else 0.3)
+        if n == 0:
+            raise ValueError("invalid output")
+        return "valid"
+
+    assert asyncio.run(hedger.run(attempt)) == "valid"
+
+    async def always_fails():
+        await asyncio.sleep(0.05)
+        raise ValueError("invalid output")
+
+    with pytest.raises(ValueError):
+        asyncio.run(hedger.run(always_fails))
+
+
+def test_latency_tracker_percentiles_and_histogram():
+    tracker = LatencyTracker()
+    for value in [0.1] * 90 + [3.0] * 9 + [20.0]:
+        tracker.observe(value)
+
+    assert tracker.percentile(50) == 0.1
+    assert tracker.percentile(95) == 3.0
+    assert tracker.percentile(100) == 20.0
+    counts = {bucket["le"]: bucket["count"] for bucket in tracker.histogram()}
+    assert (counts["0.25"], counts["4"], counts["32"], counts["+Inf"]) == (90, 9, 1, 0)
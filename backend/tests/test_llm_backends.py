@@ -0,0 +1,67 @@
+import json
+import types
+
+import pytest
+
+from src.ai_pipeline import CostTracker, build_gemini_prompt, gemini_generate_once
+from src.generation.packing import packed_request, split_packed_response
+from src.llm import GeminiBackend, StubBackend, create_backend
+from utils.helpers import safe_extract_json, validate_and_ensure_compliance
+
+ROW = {"id": "1", "title": "Ceramic Mug", "features": "dishwasher safe; 350 ml; matte glaze",
+       "primary_keyword": "coffee mug", "tone": "professional", "style_variation": "amazon", "languageCode": "en"}
+
+
+def no_sleep(seconds):
+    pass
+
+
+def test_stub_answers_are_schema_valid_and_deterministic():
+    prompt = build_gemini_prompt(ROW)
+    first = StubBackend(sleep=no_sleep).generate(prompt)
+    second = StubBackend(sleep=no_sleep).generate(prompt)
+
+    assert first.text == second.text
+    validated = validate_and_ensure_compliance(safe_extract_json(first.text))
+    assert "coffee mug" in validated["description"]
+    assert first.usage_metadata.prompt_token_count > 0
+
+    rows = [dict(ROW, id=str(n), title=f"Mug {n}") for n in range(3)]
+    packed_prompt, slot_ids, _ = packed_request(rows)
+    text = StubBackend(sleep=no_sleep).generate(packed_prompt).text
+    assert sorted(split_packed_response(text, slot_ids, 30, 0.1)) == [0, 1, 2]
+
+
+def test_stub_error_and_malformed_rates():
+    stub = StubBackend(error_rate=0.3, error_kinds="503", malformed_rate=0.3, malformed_kinds="prose", sleep=no_sleep)
+    outcomes = {"ok": 0, "error": 0, "malformed": 0}
+    for n in range(200):
+        try:
+            text = stub.generate(f"- **Product Name:** Item {n}").text
+        except Exception as e:
+            assert "503" in str(e)
+            outcomes["error"] += 1
+            continue
+        outcomes["malformed" if not text.startswith("{") else "ok"] += 1
+
+    assert 40 < outcomes["error"] < 80
+    assert 25 < outcomes["malformed"] < 70
+    assert stub.stats() == {"calls": 200, "errors": outcomes["error"], "malformed": outcomes["malformed"]}
+    with pytest.raises(ValueError):
+        StubBackend(error_kinds="teapot")
+
+
+def test_generate_once_accepts_backends_and_plain_gemini_models():
+    tracker = CostTracker()
+    stub = create_backend("stub", "gemini-1.5-flash")
+    stub._sleep = no_sleep
+    text, tokens, _ = gemini_generate_once(stub, build_gemini_prompt(ROW), cost_tracker=tracker)
+    assert json.loads(text)["bullets"] and tokens == tracker.total_tokens
+    assert stub.model_name == "stub/gemini-1.5-flash"
+
+    calls = []
+    plain = types.SimpleNamespace(model_name="models/gemini-1.5-pro",
+                                  generate_content=lambda prompt, **kw: calls.append(kw) or types.SimpleNamespace(text="ok"))
+    assert gemini_generate_once(plain, "prompt")[0] == "ok"
+    assert calls[0]["safety_settings"] and calls[0]["generation_config"].max_output_tokens == 2000
+    assert GeminiBackend(plain).model_name == "models/gemini-1.5-pro"
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from src.ai_pipeline import CostTracker
+from src.generation.cascade import ModelCascade, QualityCheckFailed
+
+
+def test_escalates_only_on_quality_failures():
+    cost_tracker = CostTracker()
+    cascade = ModelCascade(["flash", "pro"], names=["gemini-1.5-flash", "gemini-1.5-pro"], cost_tracker=cost_tracker)
+    calls = []
+
+    async def attempt(model, last_tier):
+        calls.append((model, last_tier))
+        cost_tracker.add_usage(input_tokens=100, model=f"gemini-1.5-{model}")
+        if model == "flash":
+            raise QualityCheckFailed("SEO check failed: primary keyword missing", tokens_used=100, response_time=0.5)
+        return "pro answer", 120, 2.0
+
+    assert asyncio.run(cascade.run(attempt)) == ("pro answer", 220, 2.5)
+    assert calls == [("flash", False), ("pro", True)]
+
+    stats = {tier["model"]: tier for tier in cascade.stats()["tiers"]}
+    assert (stats["gemini-1.5-flash"]["rejected"], stats["gemini-1.5-flash"]["pass_rate"]) == (1, 0.0)
+    assert (stats["gemini-1.5-pro"]["passed"], stats["gemini-1.5-pro"]["tokens"]) == (1, 100)
+    assert stats["gemini-1.5-pro"]["cost"] > stats["gemini-1.5-flash"]["cost"] > 0
+
+
+def test_first_tier_answer_is_used_when_it_passes():
+    cascade = ModelCascade(["flash", "pro"], names=["flash", "pro"])
+
+    async def attempt(model, last_tier):
+        return f"{model} answer", 10, 0.1
+
+    assert asyncio.run(cascade.run(attempt)) == ("flash answer", 10, 0.1)
+    assert [tier["attempts"] for tier in cascade.stats()["tiers"]] == [1, 0]
+
+
+def test_api_errors_and_last_tier_failures_are_raised():
+    cascade = ModelCascade(["flash", "pro"], names=["flash", "pro"])
+
+    async def api_error(model, last_tier):
+        raise Exception("503 service unavailable")
+
+    with pytest.raises(Exception, match="503"):
+        asyncio.run(cascade.run(api_error))
+    assert [tier["attempts"] for tier in cascade.stats()["tiers"]] == [1, 0]
+
+    async def never_valid(model, last_tier):
+        raise QualityCheckFailed("Invalid JSON", tokens_used=5)
+
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        asyncio.run(cascade.run(never_valid))
+    assert cascade.key == "flash>pro"
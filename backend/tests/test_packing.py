@@ -0,0 +1,47 @@
+import json
+
+from src.ai_pipeline import build_gemini_prompt
+from src.generation.packing import iter_packs, packed_request, split_packed_response
+
+BULLETS = ["First meaningful bullet", "Second meaningful bullet", "Third meaningful bullet"]
+
+
+def make_row(n, tone="professional", lang="en"):
+    return {"id": str(n), "title": f"Lamp {n}", "features": "bright; warm", "primary_keyword": "lamp",
+            "tone": tone, "style_variation": "amazon", "languageCode": lang}
+
+
+def test_iter_packs_groups_compatible_rows():
+    rows = [(0, make_row(0)), (1, make_row(1, lang="de")), (2, make_row(2)), (3, make_row(3)), (4, make_row(4, lang="de"))]
+
+    packs = [[key for key, _ in pack] for pack in iter_packs(rows, pack_size=2)]
+
+    assert packs == [[0, 2], [1, 4], [3]]
+
+
+def test_packed_prompt_states_instructions_once():
+    rows = [make_row(n) for n in range(5)]
+    prompt, slot_ids, max_output_tokens = packed_request(rows)
+
+    assert slot_ids == ["P1", "P2", "P3", "P4", "P5"]
+    assert all(f"**PRODUCT {slot_id}:**" in prompt for slot_id in slot_ids)
+    assert prompt.count("CRITICAL REQUIREMENTS") == 1
+    assert len(prompt) < sum(len(build_gemini_prompt(row)) for row in rows) / 2
+    assert max_output_tokens > 2000
+
+
+def test_split_packed_response_validates_and_reports_missing_items():
+    answer = "```json\n" + json.dumps([
+        {"id": "P1", "title": "Bright Lamp", "description": "A lamp.", "bullets": BULLETS, "meta": "m"},
+        {"id": "P2", "title": "Warm Lamp", "description": "A lamp.", "bullets": ["too short"], "meta": "m"},
+        {"title": "No id", "description": "A lamp.", "bullets": BULLETS, "meta": "m"},
+    ]) + "\n```"
+
+    results = split_packed_response(answer, ["P1", "P2", "P3"], tokens_used=90, response_time=1.5)
+
+    assert list(results) == [0]
+    validated, tokens, response_time = results[0]
+    assert validated["title"] == "Bright Lamp"
+    assert validated["bullets"] == BULLETS
+    assert (tokens, response_time) == (90, 1.5)
+    assert split_packed_response("not json", ["P1"], 10, 1.0) == {}
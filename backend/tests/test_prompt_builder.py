@@ -0,0 +1,46 @@
+import itertools
+
+import pytest
+
+from src.ai_pipeline import (
+    CompiledPromptBuilder, build_gemini_prompt, build_gemini_prompt_legacy, render_compact_gemini_prompt, split_gemini_prompt
+)
+
+STYLES = ["amazon", "Etsy", "shopify", "ebay", "unknown"]
+LANGUAGES = ["en", "es", "fr", "de", "ja", "zh", "pt"]
+TONES = ["casual", "Professional", "luxury", "sporty", "modern", "playful", "grumpy"]
+PRODUCTS = [
+    {"title": "Ceramic Mug", "features": "dishwasher safe; 350 ml; matte glaze", "primary_keyword": "ceramic mug"},
+    {"title": "Set {of} 2 \"Café\" cups – 日本", "features": "a; ;b;  {x}  ", "primary_keyword": "{0}"},
+    {"title": "", "features": "", "primary_keyword": ""},
+    {}
+]
+
+
+def test_compiled_prompts_match_the_legacy_builder_byte_for_byte():
+    for style, language, tone, product in itertools.product(STYLES, LANGUAGES, TONES, PRODUCTS):
+        row = {**product, "style_variation": style, "languageCode": language, "tone": tone}
+        assert build_gemini_prompt(row) == build_gemini_prompt_legacy(row), (style, language, tone, product)
+    assert build_gemini_prompt(PRODUCTS[0]) == build_gemini_prompt_legacy(PRODUCTS[0])
+
+
+def test_templates_are_compiled_once_per_key():
+    builder = CompiledPromptBuilder()
+    rows = [{**PRODUCTS[0], "style_variation": style, "tone": "casual"} for style in ("amazon", "shopify", "ebay")]
+    for row in rows:
+        builder.build(row)
+    assert len(builder._templates) == 1
+    assert builder.precompile() == 2 * 6 * 7
+
+
+def test_compact_variant_is_selected_per_row_and_keeps_the_product_block():
+    for style, language, tone in itertools.product(STYLES, LANGUAGES, TONES):
+        row = {**PRODUCTS[1], "style_variation": style, "languageCode": language, "tone": tone, "prompt_variant": "compact"}
+        assert build_gemini_prompt(row) == render_compact_gemini_prompt(row)
+
+    row = {**PRODUCTS[0], "languageCode": "de"}
+    compact = build_gemini_prompt({**row, "prompt_variant": "Compact"})
+    assert len(compact) < len(build_gemini_prompt(row)) / 2
+    assert split_gemini_prompt(compact)[1] == split_gemini_prompt(build_gemini_prompt(row))[1]
+    with pytest.raises(ValueError, match="Unknown prompt variant"):
+        build_gemini_prompt({**row, "prompt_variant": "tiny"})
@@ -0,0 +1,52 @@
+import os
+
+from src import ai_pipeline
+from src.ai_pipeline import build_gemini_prompt, build_product_prompt
+from src.prompt_templates import TemplateRegistry, build_prompt_from_row
+
+ROW = {"title": " Power Bank ", "features": "10000mAh; ;USB-C", "primary_keyword": "power bank", "tone": "casual"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def write(path, text, mtime_ns):
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_templates_are_compiled_once_and_reloaded_when_changed(tmp_path):
+    write(tmp_path / "homegoods.md", "# homegoods template v1.0\nHome: {title}", 1_000)
+    write(tmp_path / "electronics.md", "# electronics template v1.0\n{title}|{features_list}|{primary_keyword}|{tone} {{json}}", 1_000)
+    clock = FakeClock()
+    registry = TemplateRegistry(tmp_path, reload_seconds=5, clock=clock)
+
+    prompt = build_prompt_from_row({**ROW, "category": "Electronics"}, template=registry.template_for("Electronics"))
+    assert prompt == "# electronics template v1.0\nPower Bank|- 10000mAh\n- USB-C|power bank|casual {json}"
+    assert registry.template_for("toys").text.endswith("Home: {title}")
+    assert registry.compiles == 2
+
+    write(tmp_path / "electronics.md", "# electronics template v2.0\n{title} {missing}", 2_000)
+    assert registry.get("electronics").version == "1.0"  # Not rescanned within the interval
+    clock.now = 5
+    template = registry.get("electronics")
+    assert template.version == "2.0" and registry.compiles == 3 and registry.reloads == 1
+    # Unknown fields fall back to plain replacement, like str.format failures always did
+    assert template.render({"title": "Mug"}) == "# electronics template v2.0\nMug {missing}"
+
+
+def test_products_are_routed_to_category_templates(tmp_path, monkeypatch):
+    write(tmp_path / "fashion.md", "{title} in {language} for {audience}\n{features_list}", 1_000)
+    monkeypatch.setattr(ai_pipeline, "get_template_registry", lambda: TemplateRegistry(tmp_path))
+
+    row = {**ROW, "category": "fashion", "languageCode": "fr"}
+    assert build_product_prompt(row) == "Power Bank in French for everyday consumers looking for comfort and style\n- 10000mAh\n- USB-C"
+    assert build_product_prompt({**row, "category": "electronics"}) == build_gemini_prompt(row)
+
+    monkeypatch.setattr(ai_pipeline, "CATEGORY_PROMPTS_ENABLED", False)
+    assert build_product_prompt(row) == build_gemini_prompt(row)
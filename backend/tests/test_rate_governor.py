@@ -0,0 +1,75 @@
+import asyncio
+
+from src.generation.governor import RateGovernor, is_throttle_error, run_governed
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_aimd_increases_on_success_and_halves_once_per_throttle_burst():
+    clock = FakeClock()
+    governor = RateGovernor(rate=4, burst=4, window=4, max_window=16, rate_increase=0.5, clock=clock)
+
+    for _ in range(4):
+        assert governor.try_acquire()[0]
+        governor.release(success=True)
+    assert governor.rate == 6
+    assert 4.9 < governor.window < 5
+
+    for _ in range(3):  # one burst of 429s
+        governor.release(throttled=True)
+    assert governor.rate == 3
+    assert 2.4 < governor.window < 2.5
+
+    clock.now += 1.5
+    governor.release(throttled=True)
+    assert governor.rate == 1.5
+    assert governor.stats()["throttles"] == 4
+
+
+def test_token_bucket_and_window_gate_permits():
+    clock = FakeClock()
+    governor = RateGovernor(rate=2, burst=2, window=8, clock=clock)
+
+    assert governor.try_acquire()[0]
+    assert governor.try_acquire()[0]
+    granted, delay = governor.try_acquire()
+    assert not granted and delay >= 0.5
+
+    clock.now += 0.5  # one token refilled
+    assert governor.try_acquire()[0]
+
+    narrow = RateGovernor(rate=100, burst=100, window=1, clock=clock)
+    assert narrow.try_acquire()[0]
+    assert not narrow.try_acquire()[0]
+    narrow.release(success=True)
+    assert narrow.try_acquire()[0]
+
+
+def test_throttled_calls_are_queued_instead_of_failing():
+    governor = RateGovernor(rate=50, burst=5, window=2, decrease_cooldown=0, poll_interval=0.01)
+    attempts = 0
+    peak = 0
+
+    async def call():
+        nonlocal attempts, peak
+        attempts += 1
+        peak = max(peak, governor.in_flight)
+        await asyncio.sleep(0.01)
+        if attempts <= 2:
+            raise Exception("429 Resource has been exhausted (e.g. check quota).")
+        return "ok"
+
+    async def main():
+        return await asyncio.gather(*(run_governed(call, governor, max_wait=5) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["ok"] * 4
+    assert governor.throttles == 2
+    assert peak <= 2
+    assert is_throttle_error(Exception("429 Too Many Requests"))
+    assert not is_throttle_error(Exception("503 service unavailable"))
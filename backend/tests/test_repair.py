@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+from src.generation.repair import Repairer
+from utils.helpers import extract_partial_product
+
+ROW = {"id": "1", "title": "Ceramic Mug", "features": "dishwasher safe; 350 ml; matte glaze",
+       "primary_keyword": "ceramic mug", "languageCode": "en"}
+DESCRIPTION = ("This ceramic mug holds 350 ml of coffee or tea and is finished with a soft matte glaze. "
+               "It is dishwasher safe, comfortable to hold and sturdy enough for daily use at home or in the office. "
+               "The simple shape suits any kitchen, stacks neatly in cupboards and makes a thoughtful gift "
+               "for friends, family and colleagues who enjoy a warm drink every morning.")
+
+
+def make_call(answer, tokens=40):
+    calls = []
+
+    async def call(prompt, max_output_tokens):
+        calls.append((prompt, max_output_tokens))
+        return answer, tokens, 0.2
+
+    return call, calls
+
+
+def test_missing_bullets_are_requested_and_merged():
+    response = json.dumps({"title": "Ceramic Mug", "description": DESCRIPTION,
+                           "bullets": ["Dishwasher safe for easy cleaning", "Nice"], "meta": "A mug"})
+    partial = extract_partial_product(response)
+    assert partial["bullets"] == ["Dishwasher safe for easy cleaning", "Nice"]
+
+    repairer = Repairer(enabled=True, bullets_max_tokens=128)
+    call, calls = make_call('["Generous 350 ml capacity for coffee", "Soft matte glaze finish"]')
+    validated, tokens, response_time = asyncio.run(repairer.repair_bullets(partial, ROW, call))
+
+    assert validated["bullets"] == ["Dishwasher safe for easy cleaning", "Generous 350 ml capacity for coffee",
+                                    "Soft matte glaze finish"]
+    assert validated["description"] == DESCRIPTION
+    assert (tokens, response_time) == (40, 0.2)
+    assert calls[0][1] == 128 and "Write 2 product bullet point(s)" in calls[0][0]
+    assert repairer.stats()["bullets"]["repaired"] == 1
+
+
+def test_description_is_rewritten_only_when_the_rewrite_passes_seo():
+    product = {"title": "Ceramic Mug", "description": "A nice cup.", "bullets": ["a" * 12] * 3, "meta": ""}
+    seo = {"keyword_count": 0, "length_words": 3, "passes": False}
+    repairer = Repairer(enabled=True)
+
+    call, calls = make_call(DESCRIPTION)
+    validated, _, _ = asyncio.run(repairer.repair_description(product, ROW, seo, call))
+    assert validated == {**product, "description": DESCRIPTION}
+    assert '"ceramic mug"' in calls[0][0] and "60-140 words" in calls[0][0]
+
+    call, _ = make_call("Still short.")
+    assert asyncio.run(repairer.repair_description(product, ROW, seo, call)) == (None, 40, 0.2)
+    assert repairer.stats()["description"]["failed"] == 1
+
+    call, calls = make_call(DESCRIPTION)
+    assert asyncio.run(Repairer(enabled=False).repair_description(product, ROW, seo, call)) == (None, 0, 0.0)
+    assert calls == []
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from src.generation import async_client
+from src.generation.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.generation.retry_policy import (
+    COST_LIMIT, INVALID, SAFETY, THROTTLED, TRANSIENT, GenerationDeadlineExceeded, RetriesExhausted,
+    attempt_timeout, classify_error, generation_deadline, retry_blocking
+)
+from src.llm import StubBackend
+
+PROMPT = "**Product Name:** Ceramic Mug\n**Key Features:** dishwasher safe; 350 ml; matte glaze"
+
+
+def test_only_transient_errors_are_retryable():
+    assert classify_error(Exception("503 Service Unavailable: the model is overloaded")) == TRANSIENT
+    assert classify_error(TimeoutError("Gemini call timed out after 60s")) == TRANSIENT
+    assert classify_error(Exception("Daily cost limit exceeded: $5.0100")) == COST_LIMIT
+    assert classify_error(Exception("429 Resource has been exhausted (e.g. check quota).")) == THROTTLED
+    assert classify_error(Exception("Response blocked by safety filters")) == SAFETY
+    assert classify_error(Exception("400 Request contains an invalid argument.")) == INVALID
+    assert not async_client.is_retryable_error(CircuitOpenError(10))
+
+
+def test_retries_wait_for_server_hint_and_stop_on_permanent_errors():
+    sleeps = []
+    outcomes = [Exception("503 model overloaded. Please retry in 7s."), Exception("503 model overloaded"), "ok"]
+
+    def attempt():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert retry_blocking(attempt, max_attempts=3, sleep=sleeps.append) == "ok"
+    assert len(sleeps) == 2 and sleeps[0] >= 7
+
+    calls = []
+
+    def over_budget():
+        calls.append(1)
+        raise Exception("Daily cost limit exceeded: $5.0100")
+
+    with pytest.raises(Exception, match="cost limit"):
+        retry_blocking(over_budget, max_attempts=3, sleep=sleeps.append)
+    assert calls == [1]
+
+    with pytest.raises(RetriesExhausted) as excinfo:
+        retry_blocking(lambda: (_ for _ in ()).throw(Exception("500 internal error")), max_attempts=2, sleep=lambda _: None)
+    assert excinfo.value.attempts == 2
+
+
+def test_deadline_bounds_attempts_and_stops_retries(monkeypatch):
+    monkeypatch.setattr(async_client, "get_circuit_breaker", lambda: CircuitBreaker(min_calls=100))
+
+    with generation_deadline(5):
+        with generation_deadline(60):  # an inner block never extends the outer budget
+            assert attempt_timeout() <= 5
+
+    slow = StubBackend(latency_ms=2000, jitter_ms=0, sleep=time.sleep)
+
+    async def slow_call():
+        with generation_deadline(0.2):
+            return await async_client.call_gemini_generate_async(slow, PROMPT)
+
+    start = time.perf_counter()
+    with pytest.raises(Exception, match="DEADLINE_EXCEEDED"):
+        asyncio.run(slow_call())
+    assert time.perf_counter() - start < 1.5
+
+    # The backoff after a transient error would outlive the budget, so it is not retried
+    failing = StubBackend(latency_ms=10, jitter_ms=0, error_rate=1.0, error_kinds="503")
+
+    async def failing_call():
+        with generation_deadline(0.4):
+            return await async_client.call_gemini_generate_async(failing, PROMPT)
+
+    with pytest.raises(Exception, match="DEADLINE_EXCEEDED"):
+        asyncio.run(failing_call())
+    assert failing.stats()["calls"] == 1
+
+    with generation_deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(GenerationDeadlineExceeded):
+            attempt_timeout()
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from src.generation.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"title": "Shared"}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", generate) for _ in range(3)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True]
+    assert all(value == {"title": "Shared"} for value, _ in results)
+    assert results[1][0] is not results[0][0]  # followers get their own copy
+    assert flight.stats() == {"executed": 1, "coalesced": 2, "in_flight": 0}
+
+
+def test_errors_reach_every_caller_and_key_is_released():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Gemini API Error (NETWORK_ERROR): boom")
+
+    async def fresh():
+        return "fresh"
+
+    async def main():
+        outcomes = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+        value, shared = await flight.do("key", fresh)
+        return outcomes, value, shared
+
+    outcomes, value, shared = asyncio.run(main())
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert (value, shared) == ("fresh", False)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = SingleFlight()
+
+    async def generate():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("key", generate))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", generate))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == ("done", True)
@@ -0,0 +1,54 @@
+import asyncio
+import types
+
+import pytest
+
+from src.ai_pipeline import CostTracker
+from src.generation import streaming
+from src.generation.circuit_breaker import CircuitBreaker
+from src.generation.streaming import GenerationStream, partial_json_fields
+from src.llm import GeminiBackend, StubBackend
+
+PROMPT = "**Product Name:** Ceramic Mug\n**Key Features:** dishwasher safe; 350 ml; matte glaze"
+
+
+async def drain(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_partial_fields_are_read_from_incomplete_json():
+    assert partial_json_fields('{"title": "Mug \\"Classic\\"", "descr') == {"title": 'Mug "Classic"'}
+    assert partial_json_fields('{"title": "Mug", "description": "Holds 350\\u00a0ml and') == {
+        "title": "Mug", "description": "Holds 350\u00a0ml and"}
+    assert partial_json_fields('{"title": "Caf\\') == {"title": "Caf"}
+    assert partial_json_fields("") == {}
+
+
+def test_stream_yields_chunks_and_accounts_usage(monkeypatch):
+    monkeypatch.setattr(streaming, "get_circuit_breaker", lambda: CircuitBreaker(min_calls=100))
+    cost_tracker = CostTracker()
+    backend = StubBackend(latency_ms=100, jitter_ms=0, chunk_chars=20)
+    stream = GenerationStream(backend, PROMPT, cost_tracker=cost_tracker)
+
+    chunks = asyncio.run(drain(stream))
+    assert len(chunks) > 3 and "".join(chunks) == stream.text
+    assert partial_json_fields(stream.text)["title"].endswith("Ceramic Mug - Ceramic")
+    assert stream.time_to_first_token < stream.response_time
+    assert stream.tokens_used > 0 and cost_tracker.total_tokens == stream.tokens_used
+
+    failing = GenerationStream(StubBackend(latency_ms=10, jitter_ms=0, error_rate=1.0, error_kinds="503"), PROMPT)
+    with pytest.raises(Exception, match="503"):
+        asyncio.run(drain(failing))
+
+
+def test_stream_accounts_usage_reported_with_the_last_chunk(monkeypatch):
+    monkeypatch.setattr(streaming, "get_circuit_breaker", lambda: CircuitBreaker(min_calls=100))
+    usage = types.SimpleNamespace(prompt_token_count=120, candidates_token_count=45, total_token_count=165)
+    chunks = [types.SimpleNamespace(text='{"title": "Mug", ', usage_metadata=None),
+              types.SimpleNamespace(text='"description": "Holds 350 ml"}', usage_metadata=usage)]
+    model = types.SimpleNamespace(model_name="models/gemini-1.5-flash", generate_content=lambda prompt, **kw: iter(chunks))
+    cost_tracker = CostTracker()
+    stream = GenerationStream(GeminiBackend(model), PROMPT, cost_tracker=cost_tracker)
+
+    assert asyncio.run(drain(stream)) == [chunk.text for chunk in chunks]
+    assert stream.tokens_used == 165 and cost_tracker.total_tokens == 165
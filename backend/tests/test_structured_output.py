@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from src.ai_pipeline import gemini_generation_config
+from src.generation.structured import ParseStats, parse_product_response
+from src.generation import structured as structured_module
+
+PRODUCT = {"title": "Ceramic Mug", "description": "A matte ceramic mug.",
+           "bullets": ["Dishwasher safe for easy cleaning", "Generous 350 ml capacity", "Soft matte glaze finish"],
+           "meta": "Matte ceramic mug"}
+
+
+def test_structured_config_requests_json_schema():
+    config = gemini_generation_config(0.8, structured=True)
+    assert config["response_mime_type"] == "application/json"
+    assert config["response_schema"]["properties"]["bullets"]["max_items"] == 3
+    assert "response_schema" not in gemini_generation_config(0.8)
+
+
+def test_structured_answers_skip_the_legacy_cascade(monkeypatch):
+    stats = ParseStats()
+    monkeypatch.setattr(structured_module, "get_parse_stats", lambda: stats)
+
+    assert parse_product_response(json.dumps(PRODUCT), structured=True) == PRODUCT
+    fenced = "Here you go:\n```json\n" + json.dumps(PRODUCT) + "\n```"
+    assert parse_product_response(fenced, structured=True) == PRODUCT
+    assert parse_product_response(fenced, structured=False) == PRODUCT
+    with pytest.raises(ValueError):
+        parse_product_response("Sorry, I cannot help with that.", structured=True)
+
+    counts = stats.stats()
+    assert (counts["structured"], counts["legacy_fallback"], counts["legacy"], counts["failed"]) == (1, 1, 1, 1)
+    assert counts["fallback_rate"] == 0.5
@@ -129,6 +129,49 @@ def extract_structured_data(text):
     
     return None
 
+def extract_partial_product(text):
+    """
+    Extract a product JSON without enforcing the bullet point requirements.
+    Returns the normalized title/description/bullets/meta when at least the
+    title and description are present, otherwise None. Used to repair answers
+    that fail validation only on their bullets.
+    """
+    if not text or not isinstance(text, str):
+        return None
+
+    candidates = []
+    codeblock = re.search(r"```(?:json)?\s*({.*?})\s*```", text, re.S)
+    if codeblock:
+        candidates.append(codeblock.group(1))
+    first = text.find("{")
+    last = text.rfind("}")
+    if first != -1 and last > first:
+        candidates.append(text[first:last+1])
+
+    data = None
+    for payload in candidates:
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError:
+            data = repair_json(payload)
+        if isinstance(data, dict):
+            break
+    if not isinstance(data, dict):
+        data = extract_structured_data(text)
+    if not isinstance(data, dict):
+        return None
+
+    bullets = data.get("bullets", [])
+    partial = {
+        "title": str(data.get("title") or "").strip(),
+        "description": str(data.get("description") or "").strip(),
+        "bullets": [str(bullet).strip() for bullet in bullets if bullet and str(bullet).strip()] if isinstance(bullets, list) else [],
+        "meta": str(data.get("meta") or "").strip()
+    }
+    if not partial["title"] or not partial["description"]:
+        return None
+    return partial
+
 def validate_and_ensure_compliance(parsed_data, max_retries=2):
     """
     Validation gate that ensures bullet points compliance.
@@ -234,6 +277,50 @@ def validate_product_json(data):
     
     return validated
 
+def extract_packed_products(text):
+    """
+    Extract the per-product objects from a packed (multi-product) response.
+    Returns a dict mapping each object's "id" to the product JSON, validated
+    with validate_product_json. Objects that are missing an id or fail
+    validation are left out so the caller can regenerate them individually.
+    """
+    if not text or not isinstance(text, str):
+        raise ValueError("No text to parse")
+    
+    items = None
+    candidates = []
+    codeblock = re.search(r"```(?:json)?\s*(\[.*?\])\s*```", text, re.S)
+    if codeblock:
+        candidates.append(codeblock.group(1))
+    first = text.find("[")
+    last = text.rfind("]")
+    if first != -1 and last > first:
+        candidates.append(text[first:last+1])
+    
+    for payload in candidates:
+        try:
+            items = json.loads(payload)
+        except json.JSONDecodeError:
+            items = repair_json(payload)
+        if isinstance(items, list):
+            break
+    
+    if not isinstance(items, list):
+        raise ValueError("Could not extract a JSON array from packed response")
+    
+    products = {}
+    for item in items:
+        if not isinstance(item, dict) or item.get("id") in (None, ""):
+            continue
+        product_id = str(item["id"]).strip()
+        if product_id in products:
+            continue
+        try:
+            products[product_id] = validate_product_json(item)
+        except (ValueError, AttributeError):
+            continue
+    return products
+
 def write_ndjson(path, records):
     path = Path(path)
     ensure_dir(path.parent)